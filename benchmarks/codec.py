@@ -0,0 +1,60 @@
+"""
+Compares the cost of encoding and decoding gateway frames with each codec.
+
+Ready frames are decoded whole and section by section like :meth:`WebSocketHandler.run` streams them,
+Message frames are the bulk of the traffic of a busy bot.
+
+Run with ``python -m benchmarks.codec``.
+"""
+
+from importlib import import_module
+from timeit import timeit
+from typing import Any, Dict, List, Tuple
+
+from voltage.internals import Codec, JSONCodec, MsgpackCodec
+
+from .payloads import message, ready
+
+NUMBER = 20_000
+
+
+def codecs() -> List[Tuple[str, Codec]]:
+    found: List[Tuple[str, Codec]] = [("json", JSONCodec())]
+    for module in ("orjson", "ujson"):
+        try:
+            library = import_module(module)
+        except ImportError:
+            continue
+        found.append((f"json ({module})", JSONCodec(library.loads, library.dumps)))
+    try:
+        found.append(("msgpack", MsgpackCodec()))
+    except RuntimeError:
+        print("msgpack isn't installed, skipping it")
+    return found
+
+
+def report(name: str, seconds: float, number: int, size: int):
+    print(f"  {name:<34} {seconds / number * 1e6:10.1f} us/frame {size:>12,} bytes")
+
+
+def measure(payload: Dict[str, Any], number: int, *, sections: bool = False):
+    for name, codec in codecs():
+        data = codec.dumps(payload)
+        encode = timeit(lambda: codec.dumps(payload), number=number)
+        decode = timeit(lambda: codec.loads(data), number=number)
+        report(f"{name} encode", encode, number, len(data))
+        report(f"{name} decode", decode, number, len(data))
+        if sections and codec.iter_sections(data) is not None:
+            streamed = timeit(lambda: [_ for _ in codec.iter_sections(data)], number=number)  # type: ignore
+            report(f"{name} decode by section", streamed, number, len(data))
+
+
+def main():
+    print("Message")
+    measure(message(), NUMBER)
+    print("Ready, 100 servers")
+    measure(ready(100), 20, sections=True)
+
+
+if __name__ == "__main__":
+    main()
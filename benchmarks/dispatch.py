@@ -0,0 +1,65 @@
+"""
+Measures the per-frame overhead of routing a gateway payload to its handler and listeners.
+
+``lookup`` compares the lowercasing and ``getattr`` every frame used to go through with the precomputed route
+table, ``handle`` runs whole payloads through :meth:`WebSocketHandler.handle_event` and
+:meth:`Client.dispatch` with a listener registered.
+
+Run with ``python -m benchmarks.dispatch``.
+"""
+
+import asyncio
+from timeit import timeit
+
+from voltage import Client
+from voltage.internals import CacheHandler, HTTPHandler, MockTransport, WebSocketHandler
+
+NUMBER = 200_000
+TYPES = ("Message", "MessageUpdate", "ChannelStartTyping", "UserUpdate", "ServerMemberJoin", "Unknown")
+
+
+def report(name: str, seconds: float, number: int = NUMBER):
+    print(f"{name:<40} {seconds / number * 1e9:8.1f} ns/frame")
+
+
+async def main():
+    client = Client()
+    http = HTTPHandler(None, "token", transport=MockTransport())
+    cache = CacheHandler(http, client.loop)
+    ws = WebSocketHandler(None, http, cache, "token", client.dispatch, client.raw_dispatch)  # type: ignore
+    ws.ready = True
+
+    def before():
+        for type in TYPES:
+            event = type.lower()
+            getattr(ws, f"handle_{event}", None)
+
+    def after():
+        for type in TYPES:
+            ws.route(type)
+
+    print("lookup")
+    report("  lower + getattr", timeit(before, number=NUMBER), NUMBER * len(TYPES))
+    report("  route table", timeit(after, number=NUMBER), NUMBER * len(TYPES))
+
+    handled = 0
+
+    @client.listen("bulk")
+    async def on_bulk(events):
+        nonlocal handled
+        handled += 1
+
+    payload = {"type": "Bulk", "v": []}
+    number = NUMBER // 10
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(number):
+        await ws.handle_event(payload)
+    while handled < number:  # The listeners run in their own tasks, they're part of the cost.
+        await asyncio.sleep(0)
+    print("handle")
+    report("  handle_event + dispatch", loop.time() - start, number)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
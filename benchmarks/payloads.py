@@ -0,0 +1,98 @@
+"""
+Synthetic gateway payloads shaped like the ones revolt sends, for the benchmarks.
+"""
+
+from typing import Any, Dict
+
+
+def make_id(kind: int, index: int) -> str:
+    """
+    Builds a valid id, unique per kind and index.
+    """
+    return f"01G{kind}{index:022d}"
+
+
+def user(index: int) -> Dict[str, Any]:
+    return {
+        "_id": make_id(1, index),
+        "username": f"user{index}",
+        "discriminator": f"{index % 10000:04d}",
+        "avatar": {"_id": make_id(9, index), "tag": "avatars", "filename": "avatar.png", "content_type": "image/png"},
+        "relationship": "None",
+        "online": index % 3 == 0,
+        "status": {"text": "Hello", "presence": "Online"},
+    }
+
+
+def ready(servers: int, *, channels: int = 10, members: int = 20) -> Dict[str, Any]:
+    """
+    Builds a Ready payload, the users are shared between servers like they would be.
+
+    Parameters
+    ----------
+    servers: :class:`int`
+        The amount of servers.
+    channels: :class:`int`
+        The amount of text channels per server.
+    members: :class:`int`
+        The amount of members per server.
+    """
+    users = max(members * 4, servers)
+    payload: Dict[str, Any] = {
+        "type": "Ready",
+        "users": [user(index) for index in range(users)],
+        "servers": [],
+        "channels": [],
+        "members": [],
+        "emojis": [],
+    }
+    for server in range(servers):
+        server_id = make_id(2, server)
+        channel_ids = [make_id(3, server * channels + channel) for channel in range(channels)]
+        payload["servers"].append(
+            {
+                "_id": server_id,
+                "owner": make_id(1, server % users),
+                "name": f"Server {server}",
+                "description": "A server " * 10,
+                "channels": channel_ids,
+                "categories": [{"id": "category", "title": "Text channels", "channels": channel_ids}],
+                "roles": {make_id(4, server): {"name": "Member", "permissions": {"a": 0, "d": 0}, "rank": 1}},
+                "default_permissions": 0,
+            }
+        )
+        for index, channel_id in enumerate(channel_ids):
+            payload["channels"].append(
+                {
+                    "_id": channel_id,
+                    "channel_type": "TextChannel",
+                    "server": server_id,
+                    "name": f"channel-{index}",
+                    "description": "A channel",
+                    "last_message_id": make_id(5, index),
+                }
+            )
+        for member in range(members):
+            payload["members"].append(
+                {
+                    "_id": {"server": server_id, "user": make_id(1, (server + member) % users)},
+                    "joined_at": "2022-01-01T00:00:00.000Z",
+                    "roles": [make_id(4, server)],
+                }
+            )
+    return payload
+
+
+def message(index: int = 0) -> Dict[str, Any]:
+    """
+    Builds a Message payload.
+    """
+    return {
+        "type": "Message",
+        "_id": make_id(5, index),
+        "nonce": make_id(6, index),
+        "channel": make_id(3, 0),
+        "author": make_id(1, index),
+        "content": "Hello there, this is a message of a reasonable length with an emoji :smile:",
+        "mentions": [make_id(1, index + 1)],
+    }
@@ -0,0 +1,71 @@
+"""
+Measures the memory and time it takes to decode and cache a Ready frame, whole or incrementally.
+
+``loads`` decodes the whole frame before caching it like :meth:`CacheHandler.handle_ready_caching` expects,
+``sections`` streams the entities into the cache as they're decoded like :meth:`WebSocketHandler.run` does with
+:meth:`Codec.iter_sections`. The peak is the most memory allocated at once while caching the frame (the frame
+itself excluded), what's retained is the cache it left behind, the difference is the intermediate structure.
+
+Run with ``python -m benchmarks.ready [servers]``, the default is a 5,000 server bot. Tracing the allocations
+slows building the cached objects down a lot, so the times are only comparable with each other.
+"""
+
+import asyncio
+import io
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter
+from typing import List, Tuple, Union
+
+from voltage import Client
+from voltage.internals import (
+    CacheHandler,
+    Codec,
+    HTTPHandler,
+    JSONCodec,
+    MockTransport,
+    MsgpackCodec,
+    WebSocketHandler,
+)
+
+from .payloads import ready
+
+
+async def measure(name: str, codec: Codec, frame: Union[str, bytes], *, sections: bool):
+    transport = MockTransport()
+    transport.add_route("GET", "servers/{id}/members", {"users": [], "members": []})
+    client = Client()
+    http = HTTPHandler(None, "token", transport=transport)
+    cache = CacheHandler(http, client.loop)
+    ws = WebSocketHandler(None, http, cache, "token", client.dispatch, client.raw_dispatch)  # type: ignore
+    tracemalloc.start()
+    start = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        if sections:
+            await cache.handle_ready_stream(codec.iter_sections(frame), ws)  # type: ignore
+        else:
+            await cache.handle_ready_caching(codec.loads(frame), ws)  # type: ignore
+    seconds = perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<24} {seconds:8.2f} s {peak / 2**20:10.1f} MiB peak {retained / 2**20:10.1f} MiB retained")
+
+
+async def main(servers: int):
+    payload = ready(servers)
+    print(f"{servers} servers, {len(payload['channels'])} channels, {len(payload['members'])} members")
+    codecs: List[Tuple[str, Codec]] = [("json", JSONCodec())]
+    try:
+        codecs.append(("msgpack", MsgpackCodec()))
+    except RuntimeError:
+        print("msgpack isn't installed, skipping it")
+    for name, codec in codecs:
+        frame = codec.dumps(payload)
+        print(f"{name}, {len(frame) / 2**20:.1f} MiB frame")
+        await measure("loads", codec, frame, sections=False)
+        await measure("sections", codec, frame, sections=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
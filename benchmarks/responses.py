@@ -0,0 +1,78 @@
+"""
+Measures the per-request overhead of decoding responses in :meth:`HTTPHandler.request`.
+
+``read + json`` is what the handler used to do: read the body to check if it's empty then decode it again through
+:meth:`aiohttp.ClientResponse.json`. ``single pass`` reads the body once and decodes it with a json codec, the
+standard library and orjson (when installed) are compared. ``request`` is the whole of :meth:`HTTPHandler.request`
+around it, ``not decoded`` skips decoding like the endpoints whose response is discarded do.
+
+Run with ``python -m benchmarks.responses``.
+"""
+
+import asyncio
+from importlib import import_module
+from time import perf_counter
+from typing import Any, Dict, List, Tuple
+
+from voltage.internals import HTTPHandler, JSONCodec, MockResponse, MockTransport
+
+from .payloads import message
+
+NUMBER = 5_000
+URL = "channels/01FZ0000000000000000000002/messages"
+
+
+def report(name: str, seconds: float, number: int = NUMBER):
+    print(f"  {name:<28} {seconds / number * 1e6:8.1f} us/request")
+
+
+async def measure(body: Any):
+    codecs: List[Tuple[str, JSONCodec]] = [("json", JSONCodec())]
+    try:
+        orjson = import_module("orjson")
+        codecs.append(("orjson", JSONCodec(orjson.loads, orjson.dumps)))
+    except ImportError:
+        pass
+    transport = MockTransport()
+    transport.add_route("POST", "channels/{id}/messages", MockResponse(200, body))  # Only encoded once.
+    url = f"https://api.revolt.chat/{URL}"
+
+    start = perf_counter()
+    for _ in range(NUMBER):
+        async with transport.request("POST", url) as response:
+            if await response.read() != b"":
+                await response.json()
+    report("read + json", perf_counter() - start)
+
+    for name, codec in codecs:
+        start = perf_counter()
+        for _ in range(NUMBER):
+            async with transport.request("POST", url) as response:
+                if (data := await response.read()) != b"":
+                    codec.loads(data)
+        report(f"single pass, {name}", perf_counter() - start)
+
+    # A POST isn't coalesced or cached, so every one goes through the whole request path.
+    for name, codec in codecs:
+        http = HTTPHandler(None, "token", transport=transport, json_codec=codec)
+        start = perf_counter()
+        for _ in range(NUMBER):
+            await http.request("POST", URL)
+        report(f"request, {name}", perf_counter() - start)
+
+    http = HTTPHandler(None, "token", transport=transport)
+    start = perf_counter()
+    for _ in range(NUMBER):
+        await http.request("POST", URL, decode=False)
+    report("request, not decoded", perf_counter() - start)
+
+
+async def main():
+    bodies: Dict[str, Any] = {"message": message(), "100 messages": [message(i) for i in range(100)]}
+    for name, body in bodies.items():
+        print(name)
+        await measure(body)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
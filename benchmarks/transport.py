@@ -0,0 +1,65 @@
+"""
+Measures the client-side overhead of an api call, without the network.
+
+``transport`` is what :class:`MockTransport` itself costs per request, ``request`` adds everything
+:meth:`HTTPHandler.request` does around it: rate limiting, scheduling, metrics and decoding. ``concurrent`` sends
+the requests in batches through a transport with latency, to show the overhead under load, and ``ratelimited``
+shows the requests queued behind a rate limit being released instead of failing.
+
+Run with ``python -m benchmarks.transport``.
+"""
+
+import asyncio
+from time import perf_counter
+
+from voltage.internals import HTTPHandler, MockTransport
+
+NUMBER = 20_000
+MESSAGE = {"_id": "01FZ0000000000000000000001", "channel": "01FZ0000000000000000000002", "content": "Hello" * 20}
+
+
+def report(name: str, seconds: float, number: int = NUMBER):
+    print(f"{name:<40} {seconds / number * 1e6:8.1f} us/request")
+
+
+async def main():
+    transport = MockTransport()
+    transport.add_route("GET", "channels/{id}/messages/{id}", MESSAGE)
+    transport.add_route("PUT", "channels/{id}/messages/{id}/reactions/{id}", b"")
+    http = HTTPHandler(None, "token", transport=transport)
+    url = "channels/01FZ0000000000000000000002/messages/01FZ0000000000000000000001"
+
+    start = perf_counter()
+    for _ in range(NUMBER):
+        await transport.respond("GET", http.api_url + url)
+    report("transport", perf_counter() - start)
+
+    start = perf_counter()
+    for _ in range(NUMBER):
+        await http.request("GET", url)
+    report("request GET", perf_counter() - start)
+
+    start = perf_counter()
+    for _ in range(NUMBER):
+        await http.request("PUT", f"{url}/reactions/01FZ0000000000000000000003", decode=False)
+    report("request PUT, not decoded", perf_counter() - start)
+
+    transport.latency = 0.01
+    batch = 500
+    start = perf_counter()
+    for _ in range(NUMBER // batch):
+        await asyncio.gather(*(http.request("GET", f"{url}?{i}") for i in range(batch)))
+    report(f"concurrent, {batch} at a time, 10ms", perf_counter() - start)
+
+    transport = MockTransport(rate_limit=(10, 0.1))
+    transport.add_route("GET", "channels/{id}/messages/{id}", MESSAGE)
+    http = HTTPHandler(None, "token", transport=transport)
+    number = 100
+    start = perf_counter()
+    await asyncio.gather(*(http.request("GET", f"{url}?{i}") for i in range(number)))
+    report("ratelimited, 10 per 100ms", perf_counter() - start, number)
+    print(f"  {transport.ratelimited} requests rejected and sent again")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -28,6 +28,7 @@ setup(
     license="MIT",
     packages=["voltage", "voltage.types", "voltage.internals", "voltage.ext.commands"],
     install_requires=requirements,
+    extras_require={"msgpack": ["msgpack"], "speed": ["orjson"]},
     description="A Simple Pythonic Asynchronous API wrapper for Revolt.",
     long_description=readme,
     long_description_content_type="text/x-rst",
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Union
+
+from aiohttp import WSMessage
+
+from voltage import Client
+from voltage.internals import CacheHandler, HTTPHandler, MockTransport, WebSocketHandler
+
+
+def offline_client(transport: MockTransport | None = None, **kwargs: Any) -> Client:
+    """
+    Builds a client wired up like :meth:`Client.start` does, minus the network: the api is answered by a
+    :class:`MockTransport` and payloads are fed straight to the pipeline.
+
+    Has to be called from a running event loop.
+    """
+    client = Client(transport=transport or MockTransport(), **kwargs)
+    client.http = HTTPHandler(None, "token", transport=client.transport)
+    client.cache = CacheHandler(client.http, client.loop, client.cache_message_limit)
+    client.ws = WebSocketHandler(
+        None,  # type: ignore
+        client.http,
+        client.cache,
+        "token",
+        client.dispatch,
+        client.raw_dispatch,
+        event_workers=client.event_workers,
+        event_overflow=client.event_overflow,
+        event_low_priority=client.event_low_priority,
+        subscribed=client.is_subscribed,
+        raw_subscribed=client.is_raw_subscribed,
+    )
+    client.ws.ready = True
+    client.ws.pipeline.start()
+    return client
+
+
+USER_ID = "01FZ0000000000000000000001"
+CHANNEL_ID = "01FZ0000000000000000000002"
+
+
+def message_id(index: int) -> str:
+    """
+    Builds a valid message id, the later the index the newer the message.
+    """
+    return f"01G{index:023d}"
+
+
+def add_messages(client: Client, amount: int, *, live: bool = False) -> List[str]:
+    """
+    Caches a user, their saved messages channel and ``amount`` messages in it.
+    """
+    if USER_ID not in client.cache.users:
+        client.cache.add_user({"_id": USER_ID, "username": "user", "discriminator": "0001"})  # type: ignore
+        client.cache.add_channel({"_id": CHANNEL_ID, "channel_type": "SavedMessages", "user": USER_ID})  # type: ignore
+    ids = [message_id(index) for index in range(amount)]
+    for id in ids:
+        client.cache.add_message({"_id": id, "channel": CHANNEL_ID, "author": USER_ID, "content": id}, live=live)  # type: ignore
+    return ids
+
+
+class FakeWebSocket:
+    """
+    Replays frames like an :class:`aiohttp.ClientWebSocketResponse` then stops, as if the connection dropped.
+    """
+
+    def __init__(self, messages: Iterable[WSMessage] = ()):
+        self.messages = list(messages)
+        self.sent: List[Union[str, bytes]] = []
+        self.closed = False
+
+    async def send_str(self, data: str):
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+    async def close(self):
+        self.closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> WSMessage:
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+
+class FakeSession:
+    """
+    Hands out a :class:`FakeWebSocket` per connection.
+    """
+
+    def __init__(self, *connections: FakeWebSocket):
+        self.connections = list(connections)
+        self.connector = None
+
+    async def ws_connect(self, url: str) -> FakeWebSocket:
+        return self.connections.pop(0)
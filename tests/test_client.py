@@ -0,0 +1,62 @@
+import asyncio
+
+import aiohttp
+
+from voltage import Client
+from voltage.internals import MockTransport
+
+from .helpers import USER_ID, FakeSession, FakeWebSocket
+
+API_INFO = {"ws": "wss://ws.revolt.chat", "features": {"autumn": {"url": "https://autumn.revolt.chat"}}}
+
+
+class OpenWebSocket(FakeWebSocket):
+    """
+    Stays connected until it's closed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.closing = asyncio.Event()
+
+    async def close(self):
+        await super().close()
+        self.closing.set()
+
+    async def __anext__(self):
+        await self.closing.wait()
+        raise StopAsyncIteration
+
+
+def test_close_stops_the_metrics_server():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "", API_INFO)
+        transport.add_route("GET", "users/@me", {"_id": USER_ID, "username": "bot", "discriminator": "0001"})
+        websocket = OpenWebSocket()
+        client = Client(
+            session=FakeSession(websocket),  # type: ignore
+            transport=transport,
+            reconnect=False,
+            metrics_address=("127.0.0.1", 0),
+        )
+        started = asyncio.ensure_future(client.start("token", banner=False))
+        while client.metrics_runner is None or not client.metrics_runner.addresses:
+            assert not started.done(), started.exception()
+            await asyncio.sleep(0.01)
+        host, port = client.metrics_runner.addresses[0][:2]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://{host}:{port}/metrics") as response:
+                assert response.status == 200
+
+            await client.close()
+            await asyncio.wait_for(started, 5)
+            assert client.metrics_runner is None and websocket.closed
+            try:
+                await session.get(f"http://{host}:{port}/metrics")
+            except aiohttp.ClientConnectionError:
+                pass
+            else:
+                raise AssertionError("The metrics server is still running")
+
+    asyncio.run(main())
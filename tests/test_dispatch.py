@@ -0,0 +1,53 @@
+import asyncio
+
+from voltage import Client
+
+from .helpers import offline_client
+
+
+def test_raw_listener_can_wait_for_a_later_event():
+    async def main():
+        client = offline_client(event_workers=1)
+        seen = asyncio.get_running_loop().create_future()
+
+        @client.listen("authenticated", raw=True)
+        async def on_authenticated(payload):
+            seen.set_result(await client.wait_for("bulk", timeout=1))
+
+        await client.ws.pipeline.put({"type": "Authenticated"})
+        while not client.waits.get("bulk"):  # The worker must be free to pick up the next event.
+            await asyncio.sleep(0.01)
+        await client.ws.pipeline.put({"type": "Bulk", "v": []})
+        assert await asyncio.wait_for(seen, 2) == []
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_listener_can_wait_for_a_later_event():
+    async def main():
+        client = offline_client(event_workers=1)
+        seen = asyncio.get_running_loop().create_future()
+
+        @client.listen("bulk")
+        async def on_bulk(events):
+            if events:
+                seen.set_result(await client.wait_for("bulk", timeout=1))
+
+        await client.ws.pipeline.put({"type": "Bulk", "v": [{"type": "Authenticated"}]})
+        while not client.waits.get("bulk"):  # The worker must be free to pick up the next event.
+            await asyncio.sleep(0.01)
+        await client.ws.pipeline.put({"type": "Bulk", "v": []})
+        assert await asyncio.wait_for(seen, 2) == []
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_subscriptions():
+    async def main():
+        assert Client().subscriptions is None
+        assert Client(subscriptions="auto").subscriptions == "auto"
+        assert Client(subscriptions=["Message", "ready"]).subscriptions == {"message", "ready"}
+
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+import asyncio
+import gc
+
+import pytest
+
+from voltage import SortType
+from voltage.internals import MockTransport
+
+from .helpers import CHANNEL_ID, USER_ID, add_messages, message_id, offline_client
+
+
+def serve_history(transport: MockTransport, total: int):
+    """Answers the history of a channel with ``total`` messages, newest first."""
+
+    def messages(request):
+        limit = int(request.params["limit"])
+        before = request.params.get("before")
+        ids = [message_id(index) for index in reversed(range(total))]
+        ids = [id for id in ids if before is None or id < before][:limit]
+        return {"messages": [{"_id": id, "channel": CHANNEL_ID, "author": USER_ID} for id in ids], "users": []}
+
+    transport.add_route("GET", "channels/{id}/messages", messages)
+
+
+def test_history_paginates_lazily():
+    async def main():
+        transport = MockTransport()
+        serve_history(transport, 250)
+        client = offline_client(transport)
+        add_messages(client, 0)
+        channel = client.cache.get_channel(CHANNEL_ID)
+        messages = await channel.history(limit=None, use_cache=False)
+        assert len(messages) == 250
+        assert [message.id for message in messages] == sorted((message.id for message in messages), reverse=True)
+        assert transport.calls["GET channels/{id}/messages"] == 3
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_history_rejects_relevance():
+    async def main():
+        client = offline_client()
+        add_messages(client, 0)
+        with pytest.raises(ValueError):
+            client.cache.get_channel(CHANNEL_ID).history(sort=SortType.relevance)
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_stopping_early_cancels_the_prefetch():
+    async def main():
+        transport = MockTransport(latency=0.05)
+        serve_history(transport, 250)
+        client = offline_client(transport)
+        add_messages(client, 0)
+        channel = client.cache.get_channel(CHANNEL_ID)
+
+        async with channel.history(limit=None, use_cache=False) as messages:
+            async for _ in messages:
+                break
+            prefetch = messages.task
+            assert prefetch is not None and not prefetch.done()
+        assert prefetch.cancelled()
+
+        messages = channel.history(limit=None, use_cache=False)
+        await messages.__anext__()
+        prefetch = messages.task
+        del messages
+        gc.collect()
+        await asyncio.sleep(0)
+        assert prefetch is not None and prefetch.cancelled()
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import asyncio
+
+from voltage.internals import EventPipeline
+
+from .helpers import offline_client
+
+
+async def handle(payload):
+    pass
+
+
+def test_drop_only_discards_low_priority_events():
+    async def main():
+        pipeline = EventPipeline(handle, asyncio.get_running_loop(), maxsize=1, overflow="drop")
+        await pipeline.put({"type": "Message"})
+        await pipeline.put({"type": "ChannelStartTyping"})
+        assert pipeline.dropped == 1
+        # Events that update the cache wait for room rather than being lost.
+        update = asyncio.ensure_future(pipeline.put({"type": "UserUpdate"}))
+        await asyncio.sleep(0.01)
+        assert not update.done() and pipeline.dropped == 1
+        update.cancel()
+
+    asyncio.run(main())
+
+
+def test_low_priority_events_are_configurable():
+    async def main():
+        client = offline_client(event_overflow="drop", event_low_priority={"UserUpdate"})
+        assert client.ws.pipeline.low_priority == {"UserUpdate"}
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
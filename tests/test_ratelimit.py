@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Tuple
+
+import pytest
+
+from voltage.errors import HTTPError
+from voltage.internals import HTTPHandler, MockResponse, MockTransport, RetryPolicy
+
+URL = "channels/01FZ0000000000000000000001/messages"
+ROUTE = "POST channels/{id}/messages"
+
+
+def make_http(rate_limit) -> Tuple[HTTPHandler, MockTransport]:
+    transport = MockTransport(rate_limit=rate_limit)
+    transport.add_route("POST", "channels/{id}/messages", {})
+    return HTTPHandler(None, "token", transport=transport), transport
+
+
+def test_rate_limited_requests_are_requeued():
+    async def main():
+        http, transport = make_http((3, 0.1))
+        await http.request("POST", URL, json={})
+        # Another client using the token takes what's left of the window, so the next requests get a 429.
+        for _ in range(2):
+            await transport.respond("POST", http.api_url + URL)
+        assert await asyncio.gather(*(http.request("POST", URL, json={}) for _ in range(5))) == [{}] * 5
+        assert transport.ratelimited
+        assert http.retry_stats[ROUTE].ratelimited == transport.ratelimited
+        assert http.retry_stats[ROUTE].exhausted == 0
+
+    asyncio.run(main())
+
+
+def test_known_buckets_queue_requests_instead_of_sending_them():
+    async def main():
+        http, transport = make_http((3, 0.1))
+        await http.request("POST", URL, json={})
+        state = http.ratelimiter.snapshot()[ROUTE]
+        assert (state.limit, state.remaining) == (3, 2)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(http.request("POST", URL, json={}) for _ in range(8)))
+        # 2 left in the first window, then 3 per window: two more windows had to reset.
+        assert time.perf_counter() - start >= 0.15
+        assert transport.ratelimited == 0 and ROUTE not in http.retry_stats
+
+    asyncio.run(main())
+
+
+def test_retry_after_of_the_body_is_waited_out():
+    async def main():
+        transport = MockTransport()
+        responses = [MockResponse(429, {"retry_after": 100}), MockResponse(200, {})]
+        transport.add_route("POST", "channels/{id}/messages", lambda request: responses.pop(0))
+        http = HTTPHandler(None, "token", transport=transport)
+        start = time.perf_counter()
+        assert await http.request("POST", URL, json={}) == {}
+        assert time.perf_counter() - start >= 0.09
+        assert http.retry_stats[ROUTE].ratelimited == 1
+
+    asyncio.run(main())
+
+
+def test_endlessly_rate_limited_requests_give_up():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("POST", "channels/{id}/messages", MockResponse(429, {"retry_after": 0}))
+        http = HTTPHandler(None, "token", transport=transport, retry_policy=RetryPolicy(max_ratelimited=3))
+        with pytest.raises(HTTPError) as error:
+            await asyncio.wait_for(http.request("POST", URL, json={}), 5)
+        assert error.value.response.status == 429
+        assert transport.calls[ROUTE] == 4
+        stats = http.retry_stats[ROUTE]
+        assert (stats.ratelimited, stats.exhausted) == (3, 1)
+        assert http.scheduler.in_flight == 0  # The slot was given back.
+
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import asyncio
+
+from voltage.internals import HTTPHandler, MockTransport, ResponseCache
+
+SERVER = "01FZ0000000000000000000001"
+CHANNEL = "01FZ0000000000000000000002"
+
+
+def test_creating_an_invite_invalidates_the_invites_of_its_server():
+    async def main():
+        transport = MockTransport()
+        invites = []
+
+        def create_invite(request):
+            invites.append({"_id": f"invite{len(invites)}", "server": SERVER, "channel": CHANNEL, "creator": "user"})
+            return invites[-1]
+
+        transport.add_route("GET", "servers/{id}/invites", lambda request: list(invites))
+        transport.add_route("POST", "channels/{id}/invites", create_invite)
+        http = HTTPHandler(None, "token", transport=transport, response_cache=ResponseCache())
+        assert await http.fetch_invites(SERVER) == []
+        assert await http.fetch_invites(SERVER) == []
+        assert transport.calls["GET servers/{id}/invites"] == 1  # Cached.
+        invite = await http.create_invite(CHANNEL)
+        assert await http.fetch_invites(SERVER) == [invite]
+        assert transport.calls["GET servers/{id}/invites"] == 2
+
+    asyncio.run(main())
+
+
+def test_a_write_during_a_read_keeps_its_response_out_of_the_cache():
+    async def main():
+        transport = MockTransport()
+        server = {"_id": SERVER, "name": "before"}
+        sent, release = asyncio.Event(), asyncio.Event()
+
+        async def fetch_server(request):
+            response = dict(server)  # Read before the write lands, like the api would have.
+            sent.set()
+            await release.wait()
+            return response
+
+        def edit_server(request):
+            server.update(request.json())
+            return server
+
+        transport.add_route("GET", "servers/{id}", fetch_server)
+        transport.add_route("PATCH", "servers/{id}", edit_server)
+        http = HTTPHandler(None, "token", transport=transport, response_cache=ResponseCache())
+        fetch = asyncio.ensure_future(http.request("GET", f"servers/{SERVER}"))
+        await sent.wait()
+        await http.request("PATCH", f"servers/{SERVER}", json={"name": "after"})
+        release.set()
+        assert (await fetch)["name"] == "before"
+        assert (await http.request("GET", f"servers/{SERVER}"))["name"] == "after"
+        assert transport.calls["GET servers/{id}"] == 2
+
+    asyncio.run(main())
+
+
+def test_forgotten_generations_still_tell_requests_apart():
+    cache = ResponseCache(max_size=2)
+    generation = cache.generation(f"servers/{SERVER}")
+    for index in range(3):  # The server's generation is bumped then forgotten.
+        cache.invalidate(f"servers/{SERVER}" if index == 0 else f"servers/{index}")
+    cache.put(f"servers/{SERVER}", {}, generation)
+    assert not cache.entries
+    cache.put(f"servers/{SERVER}", {}, cache.generation(f"servers/{SERVER}"))
+    assert f"servers/{SERVER}" in cache.entries
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from voltage.errors import HTTPError
+from voltage.internals import HTTPHandler, MockResponse, MockTransport, RetryPolicy
+
+URL = "channels/01FZ0000000000000000000001"
+
+
+def failing(times: int, status: int = 503):
+    """Answers with ``status`` the first ``times`` requests and with an empty object after."""
+    calls = 0
+
+    def respond(request):
+        nonlocal calls
+        calls += 1
+        return MockResponse(status) if calls <= times else {}
+
+    return respond
+
+
+def make_http(transport: MockTransport, **kwargs) -> HTTPHandler:
+    return HTTPHandler(None, "token", transport=transport, retry_policy=RetryPolicy(base_delay=0, **kwargs))
+
+
+def test_transient_failures_are_retried():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "channels/{id}", failing(2))
+        http = make_http(transport)
+        assert await http.request("GET", URL) == {}
+        assert transport.calls["GET channels/{id}"] == 3
+        stats = http.retry_stats["GET channels/{id}"]
+        assert (stats.retries, stats.ratelimited, stats.exhausted) == (2, 0, 0)
+        assert http.metrics.route("GET channels/{id}").retries == 2
+
+    asyncio.run(main())
+
+
+def test_retries_give_up_after_the_last_attempt():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "channels/{id}", failing(5))
+        http = make_http(transport, max_attempts=3)
+        with pytest.raises(HTTPError):
+            await http.request("GET", URL)
+        assert transport.calls["GET channels/{id}"] == 3
+        assert http.retry_stats["GET channels/{id}"].exhausted == 1
+
+    asyncio.run(main())
+
+
+def test_non_idempotent_requests_are_only_retried_if_allowed():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("POST", "channels/{id}/messages", failing(1))
+        with pytest.raises(HTTPError):
+            await make_http(transport).request("POST", f"{URL}/messages", json={})
+        assert transport.calls["POST channels/{id}/messages"] == 1
+
+        transport.add_route("POST", "channels/{id}/messages", failing(1))
+        assert await make_http(transport, retry_non_idempotent=True).request("POST", f"{URL}/messages", json={}) == {}
+        assert transport.calls["POST channels/{id}/messages"] == 3
+
+    asyncio.run(main())
+
+
+def test_client_errors_are_not_retried():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "channels/{id}", failing(1, 404))
+        http = make_http(transport)
+        with pytest.raises(HTTPError):
+            await http.request("GET", URL)
+        assert transport.calls["GET channels/{id}"] == 1
+        assert not http.retry_stats
+
+    asyncio.run(main())
+
+
+def test_connection_errors_are_retried():
+    async def main():
+        transport = MockTransport(error_rate=0.5, error_status=None, seed=0)
+        transport.add_route("GET", "channels/{id}", {})
+        http = make_http(transport, max_attempts=20)
+        await asyncio.gather(*(http.request("GET", f"{URL}?{i}") for i in range(20)))
+        assert transport.errors and http.retry_stats["GET channels/{id}"].retries == transport.errors
+
+        transport.error_rate = 1
+        with pytest.raises(ClientConnectionError):
+            await make_http(transport, max_attempts=2).request("GET", URL)
+
+    asyncio.run(main())
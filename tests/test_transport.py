@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from voltage.errors import HTTPError
+from voltage.internals import HTTPHandler, MockResponse, MockTransport
+
+API_INFO = {"features": {"autumn": {"url": "https://autumn.revolt.chat"}}}
+
+
+def test_routes_answer_and_unknown_routes_get_a_404():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "users/{id}", {"_id": "user"})
+        http = HTTPHandler(None, "token", transport=transport)
+        assert await http.request("GET", "users/01FZ0000000000000000000001") == {"_id": "user"}
+        with pytest.raises(HTTPError):
+            await http.request("GET", "servers/01FZ0000000000000000000001")
+        assert transport.calls == {"GET users/{id}": 1, "GET servers/{id}": 1}
+        assert transport.history[0].headers["x-bot-token"] == "token"
+
+    asyncio.run(main())
+
+
+def test_handlers_get_the_request_and_can_be_async():
+    async def main():
+        transport = MockTransport()
+
+        async def echo(request):
+            await asyncio.sleep(0)
+            return MockResponse(201, request.json())
+
+        transport.add_route("POST", "channels/{id}/messages", echo)
+        http = HTTPHandler(None, "token", transport=transport)
+        assert await http.request("POST", "channels/01FZ0000000000000000000001/messages", json={"a": 1}) == {"a": 1}
+
+    asyncio.run(main())
+
+
+def test_multipart_bodies_are_read():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("POST", "attachments", {"id": "file"})
+        http = HTTPHandler(None, "token", transport=transport)
+        http.api_info = API_INFO  # type: ignore
+        assert await http.upload_file(b"file content", "a.txt", "attachments") == {"id": "file"}
+        body = transport.history[-1].body
+        assert b"file content" in body and b'filename="a.txt"' in body
+
+    asyncio.run(main())
+
+
+def test_rate_limit():
+    async def main():
+        transport = MockTransport(rate_limit=(2, 60))
+        transport.add_route("GET", "users/@me", {})
+        responses = [await transport.respond("GET", "https://api.revolt.chat/users/@me") for _ in range(3)]
+        assert [response.status for response in responses] == [200, 200, 429]
+        assert [response.headers["X-RateLimit-Remaining"] for response in responses] == ["1", "0", "0"]
+        assert transport.ratelimited == 1
+
+    asyncio.run(main())
+
+
+def test_injected_errors_are_reproducible():
+    async def main(seed):
+        transport = MockTransport(error_rate=0.5, seed=seed)
+        statuses = [(await transport.respond("GET", f"https://api.revolt.chat/users/{i}")).status for i in range(20)]
+        assert transport.errors == statuses.count(503)
+        return statuses
+
+    assert asyncio.run(main(1)) == asyncio.run(main(1))
+
+
+def test_injected_connection_errors():
+    async def main():
+        transport = MockTransport(error_rate=1, error_status=None)
+        with pytest.raises(ClientConnectionError):
+            await transport.respond("GET", "https://api.revolt.chat/users/@me")
+
+    asyncio.run(main())
+
+
+def test_latency():
+    async def main():
+        transport = MockTransport(latency=0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(transport.respond("GET", "https://api.revolt.chat/") for _ in range(10)))
+        assert 0.05 <= time.perf_counter() - start < 0.5  # Concurrent requests wait at the same time.
+
+    asyncio.run(main())
+
+
+def test_files_are_downloaded_and_streamed():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "attachments/{id}", b"x" * 10)
+        http = HTTPHandler(None, "token", transport=transport)
+        url = "https://autumn.revolt.chat/attachments/01FZ0000000000000000000001"
+        assert await http.get_file_binary(url) == b"x" * 10
+        assert [chunk async for chunk in http.stream_file(url, chunk_size=4)] == [b"xxxx", b"xxxx", b"xx"]
+
+    asyncio.run(main())
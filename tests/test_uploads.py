@@ -0,0 +1,78 @@
+import asyncio
+from itertools import count
+
+from voltage import File
+from voltage.internals import HTTPHandler, MockResponse, MockTransport
+
+CHANNEL = "01FZ0000000000000000000000"
+API_INFO = {"features": {"autumn": {"url": "https://autumn.revolt.chat"}}}
+
+
+def make_http(**kwargs):
+    transport = MockTransport()
+    ids = count()
+    transport.add_route("POST", "attachments", lambda request: {"id": f"file{next(ids)}"})
+    http = HTTPHandler(None, "token", transport=transport, **kwargs)
+    http.api_info = API_INFO  # type: ignore
+    return http, transport
+
+
+class CountingFile(File):
+    __slots__ = ("reads",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    async def chunks(self):
+        self.reads += 1
+        async for chunk in super().chunks():
+            yield chunk
+
+
+def test_identical_files_are_uploaded_again_by_default():
+    async def main():
+        http, transport = make_http()
+        file = CountingFile(b"content", filename="a.txt")
+        first = await file.get_id(http)
+        assert file.reads == 1 and file.content_hash is None  # Not hashed without deduplication.
+        second = await File(b"content", filename="a.txt").get_id(http)
+        assert first != second
+        assert transport.calls["POST attachments"] == 2
+
+    asyncio.run(main())
+
+
+def test_dedup_reuses_ids():
+    async def main():
+        http, transport = make_http(upload_dedup=True)
+        file = CountingFile(b"content", filename="a.txt")
+        first = await file.get_id(http)
+        assert file.content_hash is not None
+        assert await File(b"content", filename="a.txt").get_id(http) == first
+        assert transport.calls["POST attachments"] == 1
+        assert http.uploads.deduplicated == 1
+
+    asyncio.run(main())
+
+
+def test_rejected_reused_id_is_uploaded_again():
+    async def main():
+        http, transport = make_http(upload_dedup=True)
+        used = set()
+
+        def send_message(request):
+            attachments = request.json()["attachments"]
+            if used.intersection(attachments):
+                return MockResponse(400, {"type": "InvalidOperation"})
+            used.update(attachments)
+            return {"attachments": attachments}
+
+        transport.add_route("POST", "channels/{id}/messages", send_message)
+        first = await http.send_message(CHANNEL, attachments=[File(b"content", filename="a.txt")])
+        second = await http.send_message(CHANNEL, attachments=[File(b"content", filename="a.txt")])
+        assert first["attachments"] != second["attachments"]
+        assert transport.calls["POST attachments"] == 2
+        assert [id for _, id in http.uploads.uploaded.values()] == second["attachments"]
+
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+from aiohttp import WSMessage, WSMsgType
+
+from voltage.internals import MockTransport
+
+from .helpers import (
+    CHANNEL_ID,
+    FakeSession,
+    FakeWebSocket,
+    add_messages,
+    message_id,
+    offline_client,
+)
+
+
+def test_bulk_message_delete_removes_cached_messages():
+    async def main():
+        client = offline_client()
+        ids = add_messages(client, 3)
+        deleted = asyncio.get_running_loop().create_future()
+
+        @client.listen("bulk_message_delete")
+        async def on_bulk_message_delete(messages):
+            deleted.set_result(messages)
+
+        await client.ws.pipeline.put(
+            {"type": "BulkMessageDelete", "channel": CHANNEL_ID, "ids": ids[:2] + [message_id(9)]}
+        )
+        messages = await asyncio.wait_for(deleted, 1)
+        assert [message.id for message in messages] == ids[:2]
+        assert list(client.cache.messages) == ids[2:]
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_histories_are_closed_when_the_connection_drops():
+    async def main():
+        client = offline_client()
+        add_messages(client, 3, live=True)
+        history = client.cache.histories[CHANNEL_ID]
+        assert history.open
+        client.ws.client = FakeSession(FakeWebSocket())  # type: ignore
+        await client.ws.run("wss://ws.revolt.chat")
+        assert not history.open
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def frame(payload) -> WSMessage:
+    return WSMessage(WSMsgType.TEXT, json.dumps(payload), None)
+
+
+def ready(users, channels=()) -> WSMessage:
+    return frame({"type": "Ready", "users": users, "servers": [], "channels": list(channels), "members": []})
+
+
+def user(id, online=False):
+    return {"_id": id, "username": "user", "discriminator": "0001", "online": online}
+
+
+async def settle(client, processed: int):
+    """Waits for the pipeline to have handled ``processed`` payloads and for the listeners to have run."""
+    while client.ws.pipeline.processed < processed:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+
+
+async def connect(client, *messages: WSMessage):
+    processed = client.ws.pipeline.processed + len(messages)
+    client.ws.client = FakeSession(FakeWebSocket(messages))  # type: ignore
+    await client.ws.run("wss://ws.revolt.chat")
+    await settle(client, processed)
+
+
+def test_reconnect_only_dispatches_what_changed_while_away():
+    async def main():
+        client = offline_client()
+        client.ws.ready = False
+        events = []
+
+        for event in ("user_update", "channel_create", "channel_delete"):
+            client.listen(event)(lambda *args, event=event: asyncio.sleep(0, events.append(event)))
+
+        first, second, third = message_id(1), message_id(2), message_id(3)
+        channel = {"_id": CHANNEL_ID, "channel_type": "SavedMessages", "user": first}
+        await connect(client, ready([user(first), user(second), user(third)], [channel]))
+        assert client.cache.ready_frame is not None
+        events.clear()
+
+        # The first user changes live, the second while we're away and the third doesn't.
+        processed = client.ws.pipeline.processed + 1
+        await client.ws.pipeline.put({"type": "UserUpdate", "id": first, "data": {"online": True}})
+        await settle(client, processed)
+        await connect(client, ready([user(first, True), user(second, True), user(third)]))
+        # The live update of the first user and the update of the second, not a second one for the first.
+        assert sorted(events) == ["channel_delete", "user_update", "user_update"]
+        assert client.cache.get_user(second).online
+        assert not client.cache.changed
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_ready_phases_are_measured():
+    async def main():
+        transport = MockTransport()
+        transport.add_route("GET", "servers/{id}/members", {"users": [], "members": []})
+        client = offline_client(transport)
+        client.ws.ready = False
+        server = {"_id": message_id(3), "owner": message_id(1), "name": "server", "channels": [message_id(4)], "default_permissions": 0}
+        channel = {"_id": message_id(4), "channel_type": "TextChannel", "server": message_id(3), "name": "channel"}
+        # The channel comes before its server so it has to be held back until the server is cached.
+        payload = {"type": "Ready", "users": [user(message_id(1)), user(message_id(2))], "channels": [channel]}
+        await connect(client, frame({**payload, "servers": [server], "members": []}))
+        stats = client.cache.ready_stats  # Text frames are streamed, the phases are the same as decoded whole.
+        assert list(stats) == ["users", "servers", "channels", "members", "populate"]
+        assert stats["users"].entities == 2
+        assert stats["channels"].entities == 1 and stats["servers"].entities == 1
+        assert stats["members"].entities == 0 and stats["populate"].entities == 1
+        assert stats["users"].seconds > 0 and stats["users"].allocated is None
+        assert client.cache.get_channel(message_id(4)).server.id == message_id(3)  # type: ignore
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_unexpected_frames_end_the_connection():
+    async def main():
+        client = offline_client()
+        for message in (
+            WSMessage(WSMsgType.ERROR, ConnectionResetError(), None),
+            WSMessage(WSMsgType.TEXT, "{not json", None),
+        ):
+            websocket = FakeWebSocket([message, frame({"type": "Authenticated"})])
+            client.ws.client = FakeSession(websocket)  # type: ignore
+            await client.ws.run("wss://ws.revolt.chat")
+            assert websocket.closed
+            assert websocket.messages  # Stopped at the bad frame.
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_routes_are_precomputed_by_gateway_type():
+    async def main():
+        client = offline_client()
+        routes = dict(client.ws.routes)
+        assert routes["BulkMessageDelete"] == ("bulkmessagedelete", client.ws.handle_bulkmessagedelete)
+        assert client.ws.route("ChannelAck") == ("channelack", None)
+        assert client.ws.routes == routes  # Known types never miss.
+        client.ws.pipeline.stop()
+
+    asyncio.run(main())
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import os
+from asyncio import get_running_loop
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Union
 
 # Internal imports
 from .enums import AssetType
@@ -73,6 +75,13 @@ class Asset:
         else:
             self.url = ""  # this cannot happen lmfao
 
+    @property
+    def cache_key(self) -> Optional[str]:
+        """What identifies the asset in the asset cache, None for assets without an id."""
+        if self.id is None or self.id == "0":
+            return None
+        return f"{self.tag}/{self.id}"
+
     async def get_binary(self) -> bytes:
         """
         Gets the binary data of the asset.
@@ -82,7 +91,51 @@ class Asset:
         :class:`bytes`
             The binary data of the asset.
         """
-        return await self.http.get_file_binary(self.url)
+        if self.http.asset_cache is None:
+            return await self.http.get_file_binary(self.url)
+        return b"".join([chunk async for chunk in self.stream()])
+
+    def stream(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        Downloads the asset in chunks, served from the asset cache if it's there.
+
+        Parameters
+        ----------
+        chunk_size: :class:`int`
+            The maximum size of the chunks.
+
+        Returns
+        -------
+        AsyncIterator[:class:`bytes`]
+            The chunks of the asset.
+        """
+        return self.http.stream_file(self.url, key=self.cache_key, chunk_size=chunk_size)
+
+    async def save(self, path: Union[str, os.PathLike], chunk_size: int = 64 * 1024) -> int:
+        """
+        Downloads the asset to a file without loading all of it in memory.
+
+        Parameters
+        ----------
+        path: Union[:class:`str`, :class:`os.PathLike`]
+            The path of the file.
+        chunk_size: :class:`int`
+            The maximum size of the chunks.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of bytes written.
+        """
+        loop = get_running_loop()
+        file = await loop.run_in_executor(None, open, path, "wb")
+        written = 0
+        try:
+            async for chunk in self.stream(chunk_size):
+                written += await loop.run_in_executor(None, file.write, chunk)
+        finally:
+            await loop.run_in_executor(None, file.close)
+        return written
 
 
 class PartialAsset(Asset):
@@ -1,16 +1,49 @@
 from __future__ import annotations
 
 from asyncio import Future, get_event_loop, wait_for
-from typing import TYPE_CHECKING, Any, Callable, Dict, Literal, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import aiohttp
 
 # Internal imports
-from .internals import CacheHandler, HTTPHandler, WebSocketHandler
+from .internals import (
+    DEFAULT_LOW_PRIORITY,
+    CacheHandler,
+    HTTPHandler,
+    JSONCodec,
+    WebSocketHandler,
+)
 
 if TYPE_CHECKING:
+    from aiohttp import web
+
     from .channels import Channel
     from .enums import PresenceType
+    from .internals import (
+        AssetCache,
+        Codec,
+        MetricsRegistry,
+        OverflowPolicy,
+        PipelineStats,
+        PoolStats,
+        ResponseCache,
+        RetryPolicy,
+        Transport,
+    )
     from .member import Member
     from .server import Server
     from .user import User
@@ -24,6 +57,61 @@ class Client:
     ----------
     cache_message_limit: :class:`int`
         The maximum amount of messages to cache.
+    event_queue_size: :class:`int`
+        The maximum amount of gateway events waiting to be handled.
+    event_workers: :class:`int`
+        The amount of gateway events handled concurrently.
+    event_overflow: Literal["block", "drop", "spill"]
+        What to do with incoming events when the event queue is full, see :class:`voltage.internals.EventPipeline`.
+    event_low_priority: Iterable[:class:`str`]
+        The event types the ``drop`` overflow policy may discard, typing indicators and acks by default. Events
+        that update the cache shouldn't be dropped or it will fall out of sync.
+    event_lanes: Optional[:class:`int`]
+        If set, events are sharded into this many serial lanes so events about the same channel, server or user
+        are handled in order.
+    event_key: Optional[Callable[[Dict], Optional[:class:`str`]]]
+        The function used to get the key events are sharded by, defaults to the channel, server or user id.
+    codec: Optional[:class:`voltage.internals.Codec`]
+        The codec used for gateway frames, for example :class:`voltage.internals.MsgpackCodec` for the binary
+        transport or :meth:`voltage.internals.JSONCodec.best_available` for a faster json library. A json codec
+        is also used for the api's responses.
+    reconnect: :class:`bool`
+        Whether or not to reconnect, with exponential backoff, when the websocket connection drops.
+    subscriptions: Optional[Union[Literal["auto"], Set[:class:`str`]]]
+        The events the bot consumes, the others aren't built or dispatched. ``"auto"`` derives them from the
+        registered listeners and waiters, None (the default) consumes every event.
+    retry_policy: Optional[:class:`voltage.internals.RetryPolicy`]
+        Which failed api requests are sent again and when, defaults to retrying idempotent requests that failed
+        with a 5xx status code or a connection error up to 3 times.
+    response_cache: Optional[:class:`voltage.internals.ResponseCache`]
+        If set, the api responses that rarely change (profiles, invites, bans...) are cached for a while.
+    session: Optional[:class:`aiohttp.ClientSession`]
+        An existing session to use, for example to share one between several clients. The client won't create
+        its own session and ``connector`` is ignored.
+    connector: Optional[Union[:class:`aiohttp.BaseConnector`, Mapping[:class:`str`, Any]]]
+        The connector of the session the client creates, or the keyword arguments to create a
+        :class:`aiohttp.TCPConnector` with at startup (``limit``, ``limit_per_host``, ``keepalive_timeout``,
+        ``ttl_dns_cache``...).
+    asset_cache: Optional[:class:`voltage.internals.AssetCache`]
+        If set, downloaded assets (avatars, attachments...) are stored on disk and reused when they're
+        downloaded again.
+    upload_concurrency: :class:`int`
+        The maximum amount of files uploaded at once.
+    upload_dedup: :class:`bool`
+        Whether or not to reuse the autumn id of a file whose content was uploaded recently instead of uploading it
+        again. Off by default as an id can only be attached to one message, rejected ids are uploaded again.
+    metrics: Optional[:class:`voltage.internals.MetricsRegistry`]
+        The registry the latency, status codes, bytes and retries of the api requests are recorded in, per route.
+        One is created if not given.
+    metrics_address: Optional[Tuple[:class:`str`, :class:`int`]]
+        If set, the host and port the metrics are served on in the prometheus text format, at ``/metrics``.
+    request_concurrency: Optional[:class:`int`]
+        The maximum amount of api requests sent at once. Replies and reactions go first, bulk work like fetching
+        the members of every server at startup goes last. Defaults to the connection limit of the session minus
+        two.
+    transport: Optional[:class:`voltage.internals.Transport`]
+        What sends the api requests, uploads and downloads, for example a :class:`voltage.internals.MockTransport`
+        to benchmark or reproduce failures offline. Defaults to the session.
     user: :class:`User`
         The user of the client.
     members: List[:class:`Member`]
@@ -44,13 +132,36 @@ class Client:
     """
 
     __slots__ = (
+        "asset_cache",
         "cache_message_limit",
         "client",
+        "codec",
+        "connector",
+        "dispatch_table",
         "error_handlers",
+        "event_key",
+        "event_lanes",
+        "event_low_priority",
+        "event_overflow",
+        "event_queue_size",
+        "event_workers",
         "listeners",
         "loop",
+        "metrics",
+        "metrics_address",
+        "metrics_runner",
+        "raw_dispatch_table",
         "raw_listeners",
         "raw_waits",
+        "reconnect",
+        "request_concurrency",
+        "response_cache",
+        "retry_policy",
+        "session",
+        "subscriptions",
+        "transport",
+        "upload_concurrency",
+        "upload_dedup",
         "waits",
         "ws",
         "http",
@@ -58,8 +169,57 @@ class Client:
         "user",
     )
 
-    def __init__(self, *, cache_message_limit: int = 5000):
+    def __init__(
+        self,
+        *,
+        cache_message_limit: int = 5000,
+        event_queue_size: int = 1000,
+        event_workers: int = 4,
+        event_overflow: OverflowPolicy = "block",
+        event_low_priority: Iterable[str] = DEFAULT_LOW_PRIORITY,
+        event_lanes: Optional[int] = None,
+        event_key: Optional[Callable[[Dict[Any, Any]], Optional[str]]] = None,
+        codec: Optional[Codec] = None,
+        reconnect: bool = True,
+        subscriptions: Optional[Union[Literal["auto"], Iterable[str]]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        response_cache: Optional[ResponseCache] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        connector: Optional[Union[aiohttp.BaseConnector, Mapping[str, Any]]] = None,
+        asset_cache: Optional[AssetCache] = None,
+        upload_concurrency: int = 4,
+        upload_dedup: bool = False,
+        metrics: Optional[MetricsRegistry] = None,
+        metrics_address: Optional[Tuple[str, int]] = None,
+        request_concurrency: Optional[int] = None,
+        transport: Optional[Transport] = None,
+    ):
         self.cache_message_limit = cache_message_limit
+        self.event_queue_size = event_queue_size
+        self.event_workers = event_workers
+        self.event_overflow: OverflowPolicy = event_overflow
+        self.event_low_priority = event_low_priority
+        self.event_lanes = event_lanes
+        self.event_key = event_key
+        self.codec = codec
+        self.reconnect = reconnect
+        self.retry_policy = retry_policy
+        self.response_cache = response_cache
+        self.session = session
+        self.connector = connector
+        self.asset_cache = asset_cache
+        self.upload_concurrency = upload_concurrency
+        self.upload_dedup = upload_dedup
+        self.metrics = metrics
+        self.metrics_address = metrics_address
+        self.request_concurrency = request_concurrency
+        self.transport = transport
+        self.metrics_runner: Optional[web.AppRunner] = None
+        self.subscriptions: Optional[Union[Literal["auto"], Set[str]]] = None
+        if subscriptions == "auto":
+            self.subscriptions = "auto"
+        elif subscriptions is not None:
+            self.subscriptions = {event.lower() for event in subscriptions}
         self.client = None
         self.http: HTTPHandler
         self.ws: WebSocketHandler
@@ -70,6 +230,8 @@ class Client:
         self.cache: CacheHandler
         self.user: User
         self.error_handlers: Dict[str, Callable[..., Any]] = {}
+        self.dispatch_table: Dict[str, List[Callable[..., Coroutine[Any, Any, Any]]]] = {}
+        self.raw_dispatch_table: Dict[str, List[Callable[[Dict], Coroutine[Any, Any, Any]]]] = {}
 
     def listen(self, event: str, *, raw: bool = False):
         """
@@ -109,6 +271,7 @@ class Client:
                 self.raw_listeners[event.lower()] = func
             else:
                 self.listeners[event.lower()] = func  # Why would we have more than one listener for the same event?
+            self.update_dispatch_table(event.lower(), raw=raw)
             return func
 
         return inner  # Returns the function so the user can use it by itself
@@ -138,6 +301,7 @@ class Client:
 
         def inner(func: Callable[..., Any]):
             self.error_handlers[event.lower()] = func
+            self.update_dispatch_table(event.lower())
             return func
 
         return inner
@@ -239,6 +403,39 @@ class Client:
             members += list(servermembers.values())
         return members
 
+    @property
+    def latency(self) -> float:
+        """The round trip time, in seconds, of the last gateway heartbeat, ``inf`` if there hasn't been one."""
+        latest = self.ws.latency.latest
+        return latest if latest is not None else float("inf")
+
+    def latency_percentile(self, percent: float) -> float:
+        """
+        Gets a percentile of the recent gateway heartbeat round trip times.
+
+        Parameters
+        ----------
+        percent: :class:`float`
+            The percentile to get, between 0 and 100.
+
+        Returns
+        -------
+        :class:`float`
+            The round trip time in seconds, ``inf`` if there hasn't been a heartbeat yet.
+        """
+        value = self.ws.latency.percentile(percent)
+        return value if value is not None else float("inf")
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        """The connections in use, idle connections and requests waiting for one in the http connection pool."""
+        return self.http.pool_stats()
+
+    @property
+    def event_stats(self) -> PipelineStats:
+        """The queue depth, lag, drop counters and lane occupancy of the gateway event pipeline."""
+        return self.ws.pipeline.stats()
+
     async def start(self, token: str, *, bot: bool = True, banner: bool = True):
         """
         Start the client.
@@ -252,35 +449,183 @@ class Client:
         banner: :class:`bool`
             Whether or not to print startup banner.
         """
-        self.client = aiohttp.ClientSession()
-        self.http = HTTPHandler(self.client, token, bot=bot)
+        if self.session is not None:
+            self.client = self.session
+        else:
+            connector = self.connector
+            if connector is not None and not isinstance(connector, aiohttp.BaseConnector):
+                connector = aiohttp.TCPConnector(**connector)
+            self.client = aiohttp.ClientSession(connector=connector)
+        self.http = HTTPHandler(
+            self.client,
+            token,
+            bot=bot,
+            retry_policy=self.retry_policy,
+            response_cache=self.response_cache,
+            json_codec=self.codec if isinstance(self.codec, JSONCodec) else None,
+            asset_cache=self.asset_cache,
+            upload_concurrency=self.upload_concurrency,
+            upload_dedup=self.upload_dedup,
+            metrics=self.metrics,
+            request_concurrency=self.request_concurrency,
+            transport=self.transport,
+        )
+        self.metrics = self.http.metrics
+        if self.metrics_address is not None and self.metrics_runner is None:
+            self.metrics_runner = await self.http.metrics.serve(*self.metrics_address)
         self.cache = CacheHandler(self.http, self.loop, self.cache_message_limit)
-        self.ws = WebSocketHandler(self.client, self.http, self.cache, token, self.dispatch, self.raw_dispatch)
-        await self.http.get_api_info()
-        self.user = self.cache.add_user(await self.http.fetch_self())
-        await self.ws.connect(banner)
+        self.ws = WebSocketHandler(
+            self.client,
+            self.http,
+            self.cache,
+            token,
+            self.dispatch,
+            self.raw_dispatch,
+            event_queue_size=self.event_queue_size,
+            event_workers=self.event_workers,
+            event_overflow=self.event_overflow,
+            event_low_priority=self.event_low_priority,
+            event_lanes=self.event_lanes,
+            event_key=self.event_key,
+            codec=self.codec,
+            reconnect=self.reconnect,
+            subscribed=self.is_subscribed,
+            raw_subscribed=self.is_raw_subscribed,
+        )
+        try:
+            await self.http.get_api_info()
+            self.user = self.cache.add_user(await self.http.fetch_self())
+            await self.ws.connect(banner)
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stops the client.
+
+        The websocket is closed without reconnecting, the metrics server is stopped and the session is closed
+        unless it was given to the client.
+        """
+        if (ws := getattr(self, "ws", None)) is not None:
+            await ws.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+        if self.client is not None and self.client is not self.session:
+            await self.client.close()
+        self.client = None
+
+    def is_subscribed(self, event: str) -> bool:
+        """
+        Checks whether the client consumes an event.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The name of the event.
+        """
+        if self.subscriptions is None:
+            return True
+        if self.subscriptions != "auto":
+            return event in self.subscriptions
+        return event in self.dispatch_table or bool(self.waits.get(event))
+
+    def is_raw_subscribed(self, event: str) -> bool:
+        """
+        Checks whether the client has a raw listener for an event.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The lowercased type of the event.
+        """
+        return event in self.raw_dispatch_table
+
+    def with_error_handler(
+        self, event: str, func: Callable[..., Coroutine[Any, Any, Any]]
+    ) -> Callable[..., Coroutine[Any, Any, Any]]:
+        """
+        Wraps a listener so its exceptions go to the error handler of the event if there is one.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The name of the event.
+        func: Callable[..., Coroutine[Any, Any, Any]]
+            The listener.
+        """
+        if (handler := self.error_handlers.get(event)) is None:
+            return func
+
+        async def guarded(*args, **kwargs):
+            try:
+                await func(*args, **kwargs)
+            except Exception as e:
+                await handler(e, *args, **kwargs)
+
+        return guarded
+
+    def get_listeners(self, event: str) -> List[Callable[..., Coroutine[Any, Any, Any]]]:
+        """
+        Collects the functions to call when an event is dispatched.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The name of the event.
+        """
+        if func := self.listeners.get(event):
+            return [self.with_error_handler(event, func)]
+        return []
+
+    def get_raw_listeners(self, event: str) -> List[Callable[[Dict], Coroutine[Any, Any, Any]]]:
+        """
+        Collects the functions to call when a raw event is dispatched.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The lowercased type of the event.
+        """
+        if func := self.raw_listeners.get(event):
+            return [func]
+        return []
+
+    def update_dispatch_table(self, event: str, *, raw: bool = False):
+        """
+        Rebuilds the dispatch table entry of an event, this has to be called when its listeners change.
+
+        Parameters
+        ----------
+        event: :class:`str`
+            The lowercased name of the event.
+        raw: :class:`bool`
+            Whether to rebuild the raw entry instead.
+        """
+        table: Dict[str, List[Callable[..., Coroutine[Any, Any, Any]]]] = (
+            self.raw_dispatch_table if raw else self.dispatch_table
+        )
+        if funcs := (self.get_raw_listeners(event) if raw else self.get_listeners(event)):
+            table[event] = funcs
+        else:
+            table.pop(event, None)
 
     async def dispatch(self, event: str, *args, **kwargs):
         event = event.lower()
 
-        for i in self.waits.get(event, []):
-            if i[0](*args, **kwargs):
-                i[1].set_result(*args, **kwargs)
-                self.waits[event].remove(i)
+        if waits := self.waits.get(event):
+            for i in list(waits):
+                if i[0](*args, **kwargs):
+                    i[1].set_result(*args, **kwargs)
+                    waits.remove(i)
 
-        if func := self.listeners.get(event):
-            if self.error_handlers.get(event):
-                try:
-                    await func(*args, **kwargs)
-                except Exception as e:
-                    await self.error_handlers[event](e, *args, **kwargs)
-            else:
-                await func(*args, **kwargs)
+        # Every listener gets its own task so one that waits for another event can't hold up the dispatch.
+        for func in self.dispatch_table.get(event, ()):
+            self.loop.create_task(func(*args, **kwargs))
 
     async def raw_dispatch(self, payload: Dict[Any, Any]):
-        event = payload["type"].lower()  # Subject to change
-        if func := self.raw_listeners.get(event):
-            await func(payload)
+        for func in self.raw_dispatch_table.get(payload["type"].lower(), ()):  # Subject to change
+            self.loop.create_task(func(payload))
 
     def get_user(self, user: str) -> Optional[User]:
         """
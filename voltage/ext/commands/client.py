@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import sys
+from functools import partial
 from importlib import import_module, reload
 from os import listdir, sep
 from types import ModuleType
-from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Optional,
+    Type,
+    Union,
+)
 
 # internal imports
 from voltage import Client, CommandNotFound, Message
@@ -46,11 +56,13 @@ class CommandsClient(Client):
         prefix: Union[str, list[str], Callable[[Message, CommandsClient], Awaitable[Any]]],
         help_command: Type[HelpCommand] = HelpCommand,
         cache_message_limit: int = 5000,
+        **kwargs,
     ):
-        super().__init__(cache_message_limit=cache_message_limit)
+        super().__init__(cache_message_limit=cache_message_limit, **kwargs)
         self.listeners = {"message": self.handle_commands}
         self.prefix = prefix
         self.cogs: dict[str, Cog] = {}
+        self.update_dispatch_table("message")
         self.extensions: dict[str, tuple[ModuleType, str]] = {}
         self.help_command = help_command(self)
         self.commands: dict[str, Command] = {
@@ -113,6 +125,7 @@ class CommandsClient(Client):
         self.cogs[cog.name] = cog
         for command in cog.commands:
             self.add_command(command)
+        self.update_cog_events(cog)
         if func := cog.listeners.get("load"):
             func()
 
@@ -136,6 +149,7 @@ class CommandsClient(Client):
                     cmd = self.commands.pop(command_name)
                     del cmd
         cog = self.cogs.pop(cog.name)
+        self.update_cog_events(cog)
         if func := cog.listeners.get("unload"):
             func()
         return cog
@@ -224,55 +238,26 @@ class CommandsClient(Client):
 
         return decorator
 
-    async def cog_dispatch(self, event: str, cog: Cog, *args, **kwargs):
-        if func := cog.listeners.get(event):
-            if cog.subclassed:
-                coro = func(cog, *args, **kwargs)
-            else:
-                coro = func(*args, **kwargs)
-            if self.error_handlers.get(event):
-                try:
-                    await coro
-                except Exception as e:
-                    await self.error_handlers[event](e, *args, **kwargs)
-            else:
-                await coro
-
-    async def dispatch(self, event: str, *args, **kwargs):
-        event = event.lower()
-
-        for i in self.waits.get(event, []):
-            if i[0](*args, **kwargs):
-                i[1].set_result(*args, **kwargs)
-                self.waits[event].remove(i)
+    def update_cog_events(self, cog: Cog):
+        """Rebuilds the dispatch table entries of the events a cog listens to."""
+        for event in cog.listeners:
+            self.update_dispatch_table(event)
+        for event in cog.raw_listeners:
+            self.update_dispatch_table(event, raw=True)
 
+    def get_listeners(self, event: str) -> list[Callable[..., Coroutine[Any, Any, Any]]]:
+        funcs = super().get_listeners(event)
         for cog in self.cogs.values():
-            self.loop.create_task(self.cog_dispatch(event, cog, *args, **kwargs))
-
-        if func := self.listeners.get(event):
-            if self.error_handlers.get(event):
-                try:
-                    await func(*args, **kwargs)
-                except Exception as e:
-                    await self.error_handlers[event](e, *args, **kwargs)
-            else:
-                await func(*args, **kwargs)
-
-    async def cog_raw_dispatch(self, event: str, cog: Cog, payload: dict[Any, Any]):
-        if func := cog.raw_listeners.get(event):
-            if cog.subclassed:
-                await func(payload)
-            else:
-                await func(cog, payload)
-
-    async def raw_dispatch(self, payload: dict[Any, Any]):
-        event = payload["type"].lower()
+            if func := cog.listeners.get(event):
+                funcs.append(self.with_error_handler(event, partial(func, cog) if cog.subclassed else func))
+        return funcs
 
+    def get_raw_listeners(self, event: str) -> list[Callable[[dict], Coroutine[Any, Any, Any]]]:
+        funcs = super().get_raw_listeners(event)
         for cog in self.cogs.values():
-            self.loop.create_task(self.cog_raw_dispatch(event, cog, payload))
-
-        if func := self.raw_listeners.get(event):
-            await func(payload)
+            if func := cog.raw_listeners.get(event):
+                funcs.append(partial(func, cog) if cog.subclassed else func)
+        return funcs
 
     async def handle_commands(self, message: Message):
         prefix = await self.get_prefix(message, self.prefix)
@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional, Union
+import os
+from asyncio import get_running_loop
+from hashlib import sha256
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Optional,
+    Union,
+)
 
 # Internal imports
 if TYPE_CHECKING:
@@ -34,14 +46,30 @@ class File:
     """
     The Object representing a generic file that can be sent in a Message.
 
+    Files are streamed to autumn in chunks when they're uploaded, so a file on disk is never fully loaded in
+    memory and reading it doesn't block the event loop.
+
     Parameters
     ----------
-    f: Union[:class:`str`, :class:`bytes`]
-        The file to send, can either be a local filename (str) or bytes.
+    f: Union[:class:`str`, :class:`os.PathLike`, :class:`bytes`, BinaryIO, AsyncIterable[:class:`bytes`]]
+        The file to send, can either be a local filename, bytes, a binary file object or an async iterable of
+        bytes. Async iterables can only be uploaded once.
     filename: Optional[:class:`str`]
-        The name of the file.
+        The name of the file, defaults to the name of the local file if there's one.
     spoiler: Optional[:class:`bool`]
         Whether or not the file is a spoiler.
+    chunk_size: :class:`int`
+        The size of the chunks local files and file objects are read in, that's the most memory an upload uses.
+    progress: Optional[Callable[[:class:`int`, Optional[:class:`int`]], Any]]
+        Called with the amount of bytes uploaded so far and the size of the file (None if it isn't known) after
+        each chunk is uploaded.
+
+    Attributes
+    ----------
+    size: Optional[:class:`int`]
+        The size of the file in bytes, None if it isn't known ahead of time.
+    content_hash: Optional[:class:`str`]
+        The sha256 of the content of the file once :meth:`get_hash` computed it.
 
     Examples
     --------
@@ -59,22 +87,43 @@ class File:
 
     """
 
-    __slots__ = ("file", "filename", "spoiler")
+    __slots__ = ("file", "filename", "spoiler", "chunk_size", "progress", "size", "offset", "content_hash")
 
     def __init__(
         self,
-        f: Union[str, bytes],
+        f: Union[str, os.PathLike, bytes, BinaryIO, AsyncIterable[bytes]],
         *,
         filename: Optional[str] = None,
         spoiler: Optional[bool] = False,
+        chunk_size: int = 64 * 1024,
+        progress: Optional[Callable[[int, Optional[int]], Any]] = None,
     ) -> None:
-        if isinstance(f, str):
-            with open(f, "rb") as file:
-                self.file = file.read()
-        elif isinstance(f, bytes):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.size: Optional[int] = None
+        self.offset = 0
+        self.content_hash: Optional[str] = None
+        if isinstance(f, (str, os.PathLike)):
+            self.file: Union[str, os.PathLike, bytes, BinaryIO, AsyncIterable[bytes]] = f
+            if filename is None:
+                filename = os.path.basename(f)
+            try:
+                self.size = os.path.getsize(f)
+            except OSError:  # Reported when it's uploaded.
+                pass
+        elif isinstance(f, (bytes, bytearray, memoryview)):
+            self.file = bytes(f) if isinstance(f, memoryview) else f
+            self.size = len(f)
+        elif hasattr(f, "read"):
+            self.file = f
+            if f.seekable():  # type: ignore
+                self.offset = f.tell()  # type: ignore
+                self.size = f.seek(0, os.SEEK_END) - self.offset  # type: ignore
+                f.seek(self.offset)  # type: ignore
+        elif hasattr(f, "__aiter__"):
             self.file = f
         else:
-            raise TypeError("f must be a string or bytes")
+            raise TypeError("f must be a path, bytes, a binary file object or an async iterable of bytes")
 
         filename = filename if not filename is None else "file"
 
@@ -98,5 +147,78 @@ class File:
         :class:`str`
             The autumn id of the file.
         """
-        file = await http.upload_file(self.file, self.filename, "attachments")
-        return file["id"]
+        return await http.uploads.upload(self, "attachments")
+
+    @property
+    def rereadable(self) -> bool:
+        """Whether or not the file can be read more than once, async iterables and unseekable files can't."""
+        if isinstance(self.file, (str, os.PathLike, bytes, bytearray)):
+            return True
+        return hasattr(self.file, "read") and self.file.seekable()  # type: ignore
+
+    async def get_hash(self) -> Optional[str]:
+        """
+        Computes the sha256 of the content of the file, reading it in chunks.
+
+        Returns
+        -------
+        Optional[:class:`str`]
+            The hex digest, None if the file can only be read once.
+        """
+        if self.content_hash is None and self.rereadable:
+            hasher = sha256()
+            if isinstance(self.file, (bytes, bytearray)):
+                hasher.update(self.file)
+            else:
+                async for chunk in self.chunks():
+                    hasher.update(chunk)
+            self.content_hash = hasher.hexdigest()
+        return self.content_hash
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        Reads the file in chunks, local files and file objects are read in a thread.
+
+        Yields
+        ------
+        :class:`bytes`
+            The next chunk of the file.
+        """
+        f = self.file
+        if isinstance(f, (bytes, bytearray)):
+            view = memoryview(f)
+            for start in range(0, len(view), self.chunk_size):
+                yield view[start : start + self.chunk_size]  # type: ignore
+        elif isinstance(f, (str, os.PathLike)):
+            loop = get_running_loop()
+            file = await loop.run_in_executor(None, open, f, "rb")
+            try:
+                while chunk := await loop.run_in_executor(None, file.read, self.chunk_size):
+                    yield chunk
+            finally:
+                await loop.run_in_executor(None, file.close)
+        elif hasattr(f, "read"):
+            loop = get_running_loop()
+            if f.seekable():  # type: ignore
+                await loop.run_in_executor(None, f.seek, self.offset)  # type: ignore
+            while chunk := await loop.run_in_executor(None, f.read, self.chunk_size):  # type: ignore
+                yield chunk
+        else:
+            async for chunk in f:  # type: ignore
+                yield chunk
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """
+        Reads the file in chunks like :meth:`chunks`, reporting the progress as they're consumed.
+
+        Yields
+        ------
+        :class:`bytes`
+            The next chunk of the file.
+        """
+        sent = 0
+        async for chunk in self.chunks():
+            yield chunk
+            sent += len(chunk)
+            if self.progress is not None:
+                self.progress(sent, self.size)
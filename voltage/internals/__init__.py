@@ -4,6 +4,31 @@ The Voltage internal library, aka where the magic happens.
 You probably shouldn't be using this directly, but rather through the client unless you're curious or are helping out developing Voltage.
 """
 
-from .cache import CacheHandler
-from .http import HTTPHandler
+from .assetcache import AssetCache
+from .cache import CacheHandler, ReadyPhase
+from .codec import Codec, JSONCodec, MsgpackCodec
+from .history import ChannelHistory
+from .http import HTTPHandler, PoolStats
+from .latency import LatencyHistogram
+from .metrics import DEFAULT_BUCKETS, MetricsRegistry, RouteMetrics, RouteSnapshot
+from .pipeline import (
+    DEFAULT_LOW_PRIORITY,
+    EventPipeline,
+    OverflowPolicy,
+    PipelineStats,
+    default_event_key,
+)
+from .priority import Priority, PriorityScheduler, prioritized
+from .ratelimit import Bucket, BucketState, RateLimiter, route_key
+from .responsecache import DEFAULT_TTLS, ResponseCache
+from .retry import RetryPolicy, RetryStats
+from .singleflight import SingleFlight
+from .transport import (
+    AiohttpTransport,
+    MockRequest,
+    MockResponse,
+    MockTransport,
+    Transport,
+)
+from .uploads import UploadManager
 from .ws import WebSocketHandler
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import os
+from asyncio import get_running_loop
+from collections import OrderedDict
+from hashlib import sha256
+from tempfile import mkstemp
+from typing import AsyncIterable, AsyncIterator, List, Optional, Union
+
+
+class AssetCache:
+    """
+    An on-disk cache of downloaded assets with a size cap and least recently used eviction.
+
+    Assets are stored under the hash of their key (their tag and id), and all the disk access happens in the
+    default executor. Files already in the directory are picked up, oldest first.
+
+    Parameters
+    ----------
+    directory: Union[:class:`str`, :class:`os.PathLike`]
+        The directory the assets are stored in, created if it doesn't exist.
+    max_size: :class:`int`
+        The maximum amount of bytes stored, the least recently used assets are evicted first.
+
+    Attributes
+    ----------
+    entries: OrderedDict[:class:`str`, :class:`int`]
+        The size of each stored asset by file name, least recently used first.
+    size: :class:`int`
+        The amount of bytes stored.
+    hits: :class:`int`
+        The amount of lookups that found the asset on disk.
+    misses: :class:`int`
+        The amount of lookups that didn't.
+    """
+
+    __slots__ = ("directory", "max_size", "entries", "size", "hits", "misses")
+
+    def __init__(self, directory: Union[str, os.PathLike], max_size: int = 512 * 1024 * 1024):
+        self.directory = os.fspath(directory)
+        self.max_size = max_size
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime):
+            if entry.name.endswith(".tmp"):  # Left over by an interrupted download.
+                os.remove(entry.path)
+            elif entry.is_file():
+                self.entries[entry.name] = entry.stat().st_size
+                self.size += self.entries[entry.name]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: str):
+        return self.name_of(key) in self.entries
+
+    @staticmethod
+    def name_of(key: str) -> str:
+        """
+        Gets the name of the file an asset is stored in.
+        """
+        return sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Gets the path of a stored asset, marking it as recently used.
+
+        Parameters
+        ----------
+        key: :class:`str`
+            The key of the asset.
+
+        Returns
+        -------
+        Optional[:class:`str`]
+            The path, None if the asset isn't stored.
+        """
+        name = self.name_of(key)
+        if name not in self.entries:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(name)
+        self.hits += 1
+        return os.path.join(self.directory, name)
+
+    async def read(self, path: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        Reads a stored asset in chunks.
+
+        Parameters
+        ----------
+        path: :class:`str`
+            The path given by :meth:`get`.
+        chunk_size: :class:`int`
+            The size of the chunks.
+        """
+        loop = get_running_loop()
+        file = await loop.run_in_executor(None, open, path, "rb")
+        try:
+            while chunk := await loop.run_in_executor(None, file.read, chunk_size):
+                yield chunk
+        finally:
+            await loop.run_in_executor(None, file.close)
+
+    async def store(self, key: str, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """
+        Passes the chunks of an asset through while storing them.
+
+        The asset is only stored once all of it went through, if the consumer stops early nothing is stored.
+
+        Parameters
+        ----------
+        key: :class:`str`
+            The key of the asset.
+        chunks: AsyncIterable[:class:`bytes`]
+            The chunks of the asset.
+        """
+        loop = get_running_loop()
+        name = self.name_of(key)
+        fd, temp = await loop.run_in_executor(None, lambda: mkstemp(".tmp", name, self.directory))
+        file = os.fdopen(fd, "wb")
+        size = 0
+        complete = False
+        try:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, file.write, chunk)
+                size += len(chunk)
+                yield chunk
+            complete = True
+        finally:
+            await loop.run_in_executor(None, file.close)
+            if complete and size <= self.max_size:
+                await loop.run_in_executor(None, os.replace, temp, os.path.join(self.directory, name))
+                self.size += size - self.entries.pop(name, 0)
+                self.entries[name] = size
+                await loop.run_in_executor(None, self.remove, self.evict())
+            else:
+                await loop.run_in_executor(None, os.remove, temp)
+
+    def evict(self) -> List[str]:
+        """
+        Forgets the least recently used assets until the cache fits its size cap.
+
+        Returns
+        -------
+        List[:class:`str`]
+            The paths of the forgotten assets, to be removed with :meth:`remove`.
+        """
+        paths = []
+        while self.size > self.max_size and self.entries:
+            name, size = self.entries.popitem(last=False)
+            self.size -= size
+            paths.append(os.path.join(self.directory, name))
+        return paths
+
+    @staticmethod
+    def remove(paths: List[str]):
+        """
+        Removes files, ignoring the ones that are already gone.
+        """
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,8 +1,22 @@
 from __future__ import annotations
 
-from asyncio import AbstractEventLoop, gather
-from time import time
-from typing import TYPE_CHECKING, Dict, Optional
+import tracemalloc
+from asyncio import AbstractEventLoop, gather, sleep
+from copy import copy
+from time import perf_counter, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from ..channels import Channel, DMChannel, create_channel
 from ..errors import HTTPError
@@ -12,7 +26,10 @@ from ..server import Server
 from ..user import User
 
 # Internal imports
+from .history import ChannelHistory
 from .http import HTTPHandler
+from .priority import Priority
+from .singleflight import SingleFlight
 from .ws import WebSocketHandler
 
 if TYPE_CHECKING:
@@ -27,6 +44,58 @@ if TYPE_CHECKING:
     )
 
 
+class ReadyPhase(NamedTuple):
+    """
+    The measurements of one phase of caching the ready payload.
+
+    Attributes
+    ----------
+    entities: :class:`int`
+        The amount of entities that went through the phase.
+    seconds: :class:`float`
+        How long the phase took.
+    allocated: Optional[:class:`int`]
+        The net amount of bytes allocated during the phase, only measured while :mod:`tracemalloc` is tracing.
+    """
+
+    entities: int
+    seconds: float
+    allocated: Optional[int]
+
+
+# The lists of the ready payload that hold cached entities.
+READY_SECTIONS = ("users", "servers", "channels", "members")
+
+
+def entity_key(section: str, data: Any) -> str:
+    """
+    Gets the key an entity of the ready payload is tracked by, members are keyed by server and user.
+    """
+    if section == "members":
+        return f"{data['_id']['server']}:{data['_id']['user']}"
+    return data["_id"]
+
+
+def refresh(target: Any, fresh: Any, keep: Tuple[str, ...] = ()):
+    """
+    Copies the state of a freshly built object onto a cached one so existing references stay valid.
+
+    Parameters
+    ----------
+    target: Any
+        The cached object.
+    fresh: Any
+        The newly built object of the same type.
+    keep: Tuple[:class:`str`, ...]
+        The attributes to leave untouched.
+    """
+    for cls in type(target).__mro__:
+        for attr in getattr(cls, "__slots__", ()):
+            if attr in keep or not hasattr(fresh, attr):
+                continue
+            setattr(target, attr, getattr(fresh, attr))
+
+
 class CacheHandler:
     """
     CacheHandler is a class that handles caching of messages, channels, members, servers, users and dm channels.
@@ -41,24 +110,66 @@ class CacheHandler:
     ---------
     message_limit: :class:`int`
         The maximum amount of messages to cache.
+    ready_frame: Optional[Union[:class:`str`, :class:`bytes`]]
+        The raw frame of the ready payload the cache was last built or reconciled from, only kept when the
+        websocket reconnects. It's decoded again on reconnect to tell what changed while the bot was away.
+    changed: Set[:class:`str`]
+        The keys of the entities created or updated by live events since :attr:`ready_frame`, their entry in it
+        is stale so they're refreshed without an update event on reconnect.
+    ready_chunk_size: :class:`int`
+        How many entities are cached between each yield to the event loop while handling the ready payload.
+    ready_stats: Dict[:class:`str`, :class:`ReadyPhase`]
+        The measurements of each phase of the last ready caching, keyed by phase name.
+    single_flight: :class:`SingleFlight`
+        Coalesces concurrent fetches of the same object so they share one request and end up with the same object.
+    histories: Dict[:class:`str`, :class:`ChannelHistory`]
+        The cached messages of each channel and the ranges of its history that are fully cached.
+    history_hits: :class:`int`
+        The amount of history requests fully served from the cache.
+    history_partial_hits: :class:`int`
+        The amount of history requests partly served from the cache, the rest being fetched.
+    history_misses: :class:`int`
+        The amount of history requests fully fetched.
     """
 
     __slots__ = (
         "channels",
+        "changed",
         "dm_channels",
+        "histories",
+        "history_hits",
+        "history_misses",
+        "history_partial_hits",
         "http",
         "loop",
         "ws",
         "message_limit",
         "members",
         "messages",
+        "ready_chunk_size",
+        "ready_frame",
+        "ready_stats",
         "servers",
+        "single_flight",
         "users",
     )
 
-    def __init__(self, http: HTTPHandler, loop: AbstractEventLoop, message_limit: int = 5000):
+    def __init__(
+        self,
+        http: HTTPHandler,
+        loop: AbstractEventLoop,
+        message_limit: int = 5000,
+        ready_chunk_size: int = 500,
+    ):
         self.http = http
         self.message_limit = message_limit
+        self.ready_chunk_size = ready_chunk_size
+        self.ready_stats: Dict[str, ReadyPhase] = {}
+        self.single_flight = SingleFlight()
+        self.histories: Dict[str, ChannelHistory] = {}
+        self.history_hits = 0
+        self.history_partial_hits = 0
+        self.history_misses = 0
         self.loop = loop
         self.ws: WebSocketHandler
 
@@ -68,6 +179,8 @@ class CacheHandler:
         self.servers: Dict[str, Server] = {}
         self.users: Dict[str, User] = {}
         self.dm_channels: Dict[str, DMChannel] = {}
+        self.ready_frame: Optional[Union[str, bytes]] = None
+        self.changed: Set[str] = set()
 
     def get_message(self, message_id: str) -> Message:
         """
@@ -184,7 +297,11 @@ class CacheHandler:
         """
         if message := self.messages.get(message_id):
             return message
-        return self.add_message(await self.http.fetch_message(channel_id, message_id))
+
+        async def fetch():
+            return self.add_message(await self.http.fetch_message(channel_id, message_id))
+
+        return await self.single_flight.run(("message", message_id), fetch)
 
     async def fetch_member(self, server_id: str, member_id: str) -> Member:
         """
@@ -204,7 +321,11 @@ class CacheHandler:
         """
         if member := self.members[server_id].get(member_id):
             return member
-        return self.add_member(server_id, await self.http.fetch_member(server_id, member_id))
+
+        async def fetch():
+            return self.add_member(server_id, await self.http.fetch_member(server_id, member_id))
+
+        return await self.single_flight.run(("member", server_id, member_id), fetch)
 
     async def fetch_dm_channel(self, user_id: str) -> DMChannel:
         """
@@ -222,9 +343,13 @@ class CacheHandler:
         """
         if dm_channel := self.dm_channels.get(user_id):
             return dm_channel
-        return self.add_dm_channel(await self.http.open_dm(user_id))
 
-    def add_message(self, data: MessagePayload) -> Message:
+        async def fetch():
+            return self.add_dm_channel(await self.http.open_dm(user_id))
+
+        return await self.single_flight.run(("dm_channel", user_id), fetch)
+
+    def add_message(self, data: MessagePayload, *, live: bool = False) -> Message:
         """
         Creates a message object and adds it to the cache if it doesn't exist already.
 
@@ -232,20 +357,106 @@ class CacheHandler:
         ----------
         data: :class:`MessagePayload`
             The data of the message to add.
+        live: :class:`bool`
+            Whether or not the message was received from the websocket, making it part of the channel's history
+            that's fully cached.
 
         Returns
         -------
         :class:`Message`
             The message that was added.
         """
+        history = self.histories.setdefault(data["channel"], ChannelHistory())
         if message := self.messages.get(data["_id"]):
+            if live:
+                history.add(message.id, live=True)
             return message
         message = Message(data, self)
         self.messages[message.id] = message
+        history.add(message.id, live=live)
         if len(self.messages) > self.message_limit:
-            self.messages.pop(next(iter(self.messages)))
+            evicted = self.messages.pop(next(iter(self.messages)))
+            self.histories[evicted.channel.id].discard(evicted.id, evicted=True)
+        return message
+
+    def remove_message(self, message_id: str) -> Message:
+        """
+        Removes a deleted message from the cache.
+
+        Parameters
+        ----------
+        message_id: :class:`str`
+            The id of the message to remove.
+
+        Returns
+        -------
+        :class:`Message`
+            The message that was removed.
+        """
+        message = self.messages.pop(message_id)
+        if history := self.histories.get(message.channel.id):
+            history.discard(message_id)
         return message
 
+    def cached_history(
+        self,
+        channel_id: str,
+        limit: Optional[int],
+        oldest_first: bool = False,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Message], bool]:
+        """
+        Gets the messages of a history request that can be served from the cache.
+
+        Parameters
+        ----------
+        channel_id: :class:`str`
+            The id of the channel.
+        limit: Optional[:class:`int`]
+            The maximum amount of messages, None for no limit.
+        oldest_first: :class:`bool`
+            Whether the oldest messages are wanted first rather than the newest.
+        before: Optional[:class:`str`]
+            The id to get the messages older than.
+        after: Optional[:class:`str`]
+            The id to get the messages newer than.
+
+        Returns
+        -------
+        Tuple[List[:class:`Message`], :class:`bool`]
+            The cached messages in the requested order and whether or not they're all the messages requested.
+        """
+        history = self.histories.get(channel_id)
+        if history is None:
+            ids, complete = [], False
+        elif oldest_first:
+            ids, complete = history.oldest(limit, before, after)
+        else:
+            ids, complete = history.newest(limit, before, after)
+        if complete:
+            self.history_hits += 1
+        elif ids:
+            self.history_partial_hits += 1
+        else:
+            self.history_misses += 1
+        return [self.messages[id] for id in ids], complete
+
+    @property
+    def history_hit_rate(self) -> float:
+        """
+        The share of history requests that were at least partly served from the cache.
+        """
+        total = self.history_hits + self.history_partial_hits + self.history_misses
+        return (self.history_hits + self.history_partial_hits) / total if total else 0.0
+
+    def close_histories(self):
+        """
+        Marks every channel's history as possibly missing messages newer than the cached ones, used on reconnect.
+        """
+        for history in self.histories.values():
+            history.open = False
+
     def add_channel(self, data: ChannelPayload) -> Channel:
         """
         Creates a channel object and adds it to the cache if it doesn't exist already.
@@ -290,12 +501,16 @@ class CacheHandler:
         """
         if channel := self.channels.get(channel_id):
             return channel
-        try:
-            return self.add_channel(await self.http.fetch_channel(channel_id))
-        except HTTPError as e:
-            if e.response.status != 404:
-                raise
-            return None  # mypy wtf bro
+
+        async def fetch():
+            try:
+                return self.add_channel(await self.http.fetch_channel(channel_id))
+            except HTTPError as e:
+                if e.response.status != 404:
+                    raise
+                return None  # mypy wtf bro
+
+        return await self.single_flight.run(("channel", channel_id), fetch)
 
     def add_member(self, server_id: str, data: MemberPayload) -> Member:
         """
@@ -369,6 +584,31 @@ class CacheHandler:
         self.users[user.id] = user
         return user
 
+    def add_messages_response(self, data: Any) -> List[MessagePayload]:
+        """
+        Caches the users and members included in a response of the messages endpoints, if any.
+
+        Parameters
+        ----------
+        data: Any
+            The response, either a list of messages or a dict of messages, users and members.
+
+        Returns
+        -------
+        List[:class:`MessagePayload`]
+            The messages of the response.
+        """
+        if not isinstance(data, dict):
+            return data
+        for user in data.get("users", []):
+            if user["_id"] not in self.users:
+                self.add_user(user)
+        for member in data.get("members", []):
+            server_id, user_id = member["_id"]["server"], member["_id"]["user"]
+            if server_id in self.servers and user_id not in self.members.get(server_id, {}):
+                self.add_member(server_id, member)
+        return data["messages"]
+
     def add_dm_channel(self, data: DMChannelPayload) -> DMChannel:
         """
         Creates a dm channel object and adds it to the cache if it doesn't exist already.
@@ -389,7 +629,7 @@ class CacheHandler:
         self.dm_channels[dm_channel.id] = dm_channel
         return dm_channel
 
-    async def populate_server(self, server_id: str) -> Server:
+    async def populate_server(self, server_id: str, *, priority: Priority = Priority.background) -> Server:
         """
         Adds all the members of a server to the server object present in the cache.
 
@@ -397,6 +637,8 @@ class CacheHandler:
         ----------
         server_id: :class:`str`
             The id of the server to populate.
+        priority: :class:`Priority`
+            How urgent fetching the members is, it yields to the other requests by default.
 
         Returns
         -------
@@ -404,13 +646,13 @@ class CacheHandler:
             The server with the given id.
         """
         server = self.get_server(server_id)
-        data = await self.http.fetch_members(server_id)
-        for user in data["users"]:
-            self.add_user(user)
-        for member in data["members"]:
-            if member["_id"]["user"] not in self.users:
-                continue  # Ignore deleted accounts.
-            self.add_member(server_id, member)
+        data = await self.http.fetch_members(server_id, priority=priority)
+        await self.ingest(data["users"], self.add_user)
+        await self.ingest(
+            # Ignore deleted accounts.
+            (member for member in data["members"] if member["_id"]["user"] in self.users),
+            lambda member: self.add_member(server_id, member),
+        )
         return server
 
     async def populate_all_servers(self):
@@ -419,9 +661,54 @@ class CacheHandler:
         """
         await gather(*[self.populate_server(server_id) for server_id in self.servers])
 
-    async def handle_ready_user(self, data: UserPayload):
+    async def ingest(self, items: Iterable[Any], add: Callable[[Any], Any]) -> int:
         """
-        Adds a user to the cache asynchroneously.
+        Adds entities to the cache in chunks, yielding to the event loop between chunks.
+
+        Parameters
+        ----------
+        items: Iterable[Any]
+            The payloads of the entities.
+        add: Callable[[Any], Any]
+            The function that adds a single entity.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of entities added.
+        """
+        count = 0
+        for item in items:
+            add(item)
+            count += 1
+            if count % self.ready_chunk_size == 0:
+                await sleep(0)
+        return count
+
+    async def ingest_phase(self, name: str, items: Iterable[Any], add: Callable[[Any], Any]):
+        """
+        Runs :meth:`ingest` and records its measurements in :attr:`ready_stats`.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            The name of the phase.
+        items: Iterable[Any]
+            The payloads of the entities.
+        add: Callable[[Any], Any]
+            The function that adds a single entity.
+        """
+        print(f"\033[1;34m[CACHE]      Started caching {name}.\033[0m")
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = perf_counter()
+        count = await self.ingest(items, add)
+        allocated = tracemalloc.get_traced_memory()[0] - before if tracing else None
+        self.ready_stats[name] = ReadyPhase(count, perf_counter() - start, allocated)
+
+    def handle_ready_user(self, data: UserPayload):
+        """
+        Adds a user from the ready payload to the cache.
 
         Parameters
         ----------
@@ -430,9 +717,9 @@ class CacheHandler:
         """
         self.add_user(data)
 
-    async def handle_ready_channel(self, data: ChannelPayload):
+    def handle_ready_channel(self, data: ChannelPayload):
         """
-        Adds a channel to the cache asynchroneously.
+        Adds a channel from the ready payload to the cache.
 
         Parameters
         ----------
@@ -441,9 +728,9 @@ class CacheHandler:
         """
         self.add_channel(data)
 
-    async def handle_ready_server(self, data: ServerPayload):
+    def handle_ready_server(self, data: ServerPayload) -> Server:
         """
-        Adds a server to the cache asynchroneously.
+        Adds a server from the ready payload to the cache without populating it.
 
         Parameters
         ----------
@@ -457,9 +744,9 @@ class CacheHandler:
         self.servers[server.id] = server
         return server
 
-    async def handle_ready_member(self, data: MemberPayload):
+    def handle_ready_member(self, data: MemberPayload):
         """
-        Adds a member to the cache asynchroneously.
+        Adds a member from the ready payload to the cache.
 
         Parameters
         ----------
@@ -469,21 +756,209 @@ class CacheHandler:
         self.add_member(data["_id"]["server"], data)
 
     async def handle_ready_caching(self, data: OnReadyPayload, ws: WebSocketHandler):
-        self.ws = ws
         """
         Handles the caching of the ready event.
+
+        The measurements of each phase end up in :attr:`ready_stats`.
         """
+        self.ws = ws
         start = time()
-        print("\033[1;34m[CACHE]      Started caching users.\033[0m")
-        await gather(*[self.handle_ready_user(user) for user in data["users"]])
-        print("\033[1;34m[CACHE]      Started caching servers.\033[0m")
-        await gather(*[self.handle_ready_server(server) for server in data["servers"]])
-        print("\033[1;34m[CACHE]      Started caching channels.\033[0m")
-        await gather(*[self.handle_ready_channel(channel) for channel in data["channels"]])
-        print("\033[1;34m[CACHE]      Started caching members.\033[0m")
-        await gather(*[self.handle_ready_member(member) for member in data["members"]])
+        self.ready_stats = {}
+        await self.ingest_phase("users", data["users"], self.handle_ready_user)
+        await self.ingest_phase("servers", data["servers"], self.handle_ready_server)
+        await self.ingest_phase("channels", data["channels"], self.handle_ready_channel)
+        await self.ingest_phase("members", data["members"], self.handle_ready_member)
         print("\033[1;34m[CACHE]      Populating servers.\033[0m")
+        populate_start = perf_counter()
         await self.populate_all_servers()
+        self.ready_stats["populate"] = ReadyPhase(len(self.servers), perf_counter() - populate_start, None)
         print(
             f"\033[1;32m[CACHE]      Finished caching {len(self.servers)} servers, {len(self.channels)} channels, {len(self.users)} users and {(sum([len(i) for i in self.members.values()]))} members in {time() - start:.2f} seconds.\033[0m"
         )
+
+    async def handle_ready_stream(self, sections: Iterable[Tuple[str, Any]], ws: WebSocketHandler):
+        """
+        Handles the caching of a ready event that's being decoded incrementally.
+
+        Entities are cached as they're decoded so the full payload never has to exist in memory. Entities that
+        show up before the ones they depend on (a channel before its server for example) are held back until the
+        rest of the payload went through. The measurements of each type of entity end up in :attr:`ready_stats`
+        under the same phases as :meth:`handle_ready_caching`, the time spent decoding excluded.
+
+        Parameters
+        ----------
+        sections: Iterable[Tuple[:class:`str`, Any]]
+            The key-element pairs of the payload, as given by :meth:`Codec.iter_sections`.
+        """
+        self.ws = ws
+        start = time()
+        self.ready_stats = {}
+        handlers: Dict[str, Callable[[Any], Any]] = {
+            "users": self.handle_ready_user,
+            "servers": self.handle_ready_server,
+            "channels": self.handle_ready_channel,
+            "members": self.handle_ready_member,
+        }
+        counts = dict.fromkeys(handlers, 0)
+        seconds = dict.fromkeys(handlers, 0.0)
+        allocated = dict.fromkeys(handlers, 0)
+        tracing = tracemalloc.is_tracing()
+        deferred: List[Tuple[str, Any]] = []
+
+        def add(section: Tuple[str, Any], defer: bool):
+            key, data = section
+            if (handler := handlers.get(key)) is None:  # Not an entity, like the type of the payload.
+                return
+            before = tracemalloc.get_traced_memory()[0] if tracing else 0
+            handler_start = perf_counter()
+            try:
+                handler(data)
+            except KeyError:
+                if not defer:
+                    raise
+                deferred.append(section)  # Counted once it's cached.
+            else:
+                counts[key] += 1
+            finally:
+                seconds[key] += perf_counter() - handler_start
+                if tracing:
+                    allocated[key] += tracemalloc.get_traced_memory()[0] - before
+
+        print(f"\033[1;34m[CACHE]      Started caching {', '.join(handlers)}.\033[0m")
+        await self.ingest(sections, lambda section: add(section, True))
+        await self.ingest(deferred, lambda section: add(section, False))
+        for key in handlers:
+            self.ready_stats[key] = ReadyPhase(counts[key], seconds[key], allocated[key] if tracing else None)
+        print("\033[1;34m[CACHE]      Populating servers.\033[0m")
+        populate_start = perf_counter()
+        await self.populate_all_servers()
+        self.ready_stats["populate"] = ReadyPhase(len(self.servers), perf_counter() - populate_start, None)
+        print(
+            f"\033[1;32m[CACHE]      Finished caching {len(self.servers)} servers, {len(self.channels)} channels, {len(self.users)} users and {(sum([len(i) for i in self.members.values()]))} members in {time() - start:.2f} seconds.\033[0m"
+        )
+
+    def mark_changed(self, key: str):
+        """
+        Notes that a live event created or updated an entity, see :attr:`changed`.
+
+        Parameters
+        ----------
+        key: :class:`str`
+            The id of the entity, ``server_id:user_id`` for members.
+        """
+        if self.ready_frame is not None:
+            self.changed.add(key)
+
+    def previous_ready(self) -> Optional[Dict[str, Any]]:
+        """
+        Decodes the entities of :attr:`ready_frame` one at a time.
+
+        Returns
+        -------
+        Optional[Dict[:class:`str`, Any]]
+            The payload of each entity by key, None if no frame was kept.
+        """
+        if self.ready_frame is None:
+            return None
+        codec = self.ws.codec
+        sections = codec.iter_sections(self.ready_frame)
+        if sections is None:
+            data = codec.loads(self.ready_frame)
+            sections = ((section, item) for section in READY_SECTIONS for item in data.get(section, ()))
+        return {entity_key(section, item): item for section, item in sections if section in READY_SECTIONS}
+
+    async def reconcile_ready(self, data: OnReadyPayload) -> List[Tuple[Any, ...]]:
+        """
+        Brings the cache up to date with the ready payload of a new connection instead of rebuilding it.
+
+        The payload is compared with the previous one, which is only decoded now, so that only the entities
+        that changed since are touched. Changed objects are updated in place so references held elsewhere stay
+        valid and only new servers get populated. Entities that changed live in the meantime are refreshed
+        without an event as they were already dispatched.
+
+        Parameters
+        ----------
+        data: :class:`OnReadyPayload`
+            The ready payload.
+
+        Returns
+        -------
+        List[Tuple[Any, ...]]
+            The events to dispatch for the changes, as tuples of the event name followed by its arguments.
+        """
+        start = time()
+        events: List[Tuple[Any, ...]] = []
+        previous = self.previous_ready()
+        changed, self.changed = self.changed, set()
+
+        def unchanged(key: str, payload: Any) -> Optional[bool]:
+            """Whether an entity is the same as in the previous payload, None if it's not known."""
+            if previous is None or key in changed:
+                return None
+            return previous.get(key) == payload
+
+        def known(key: str) -> bool:
+            """Whether an entity came from the gateway, the ones only fetched from the api can't be deleted."""
+            return key in changed or (previous is not None and key in previous)
+
+        for user_data in data["users"]:
+            if (same := unchanged(user_data["_id"], user_data)) is True:
+                continue
+            if user := self.users.get(user_data["_id"]):
+                old = copy(user)
+                refresh(user, User(user_data, self))
+                if same is False:
+                    events.append(("user_update", old, user))
+            else:
+                self.add_user(user_data)
+
+        seen = set()
+        new_servers = []
+        for server_data in data["servers"]:
+            seen.add(server_data["_id"])
+            if (same := unchanged(server_data["_id"], server_data)) is True:
+                continue
+            if server := self.servers.get(server_data["_id"]):
+                old = copy(server)
+                refresh(server, Server(server_data, self), keep=("member_ids",))
+                if same is False:
+                    events.append(("server_update", old, server))
+            else:
+                new_servers.append(self.handle_ready_server(server_data))
+        for server_id in [i for i in self.servers if i not in seen and known(i)]:
+            server = self.servers.pop(server_id)
+            self.members.pop(server_id, None)
+            events.append(("server_delete", server))
+
+        seen = set()
+        for channel_data in data["channels"]:
+            seen.add(channel_data["_id"])
+            if (same := unchanged(channel_data["_id"], channel_data)) is True:
+                continue
+            if channel := self.channels.get(channel_data["_id"]):
+                old = copy(channel)
+                refresh(channel, create_channel(channel_data, self, str(channel_data.get("server"))))
+                if same is False:
+                    events.append(("channel_update", old, channel))
+            else:
+                events.append(("channel_create", self.add_channel(channel_data)))
+        for channel_id in [i for i in self.channels if i not in seen and known(i)]:
+            events.append(("channel_delete", self.channels.pop(channel_id)))
+
+        for member_data in data["members"]:
+            server_id, user_id = member_data["_id"]["server"], member_data["_id"]["user"]
+            same = unchanged(f"{server_id}:{user_id}", member_data)
+            if same is True or server_id not in self.servers:
+                continue
+            if member := self.members.get(server_id, {}).get(user_id):
+                old = copy(member)
+                refresh(member, Member(member_data, member.server, self))
+                if same is False:
+                    events.append(("server_member_update", old, member))
+            else:
+                self.add_member(server_id, member_data)
+
+        await gather(*[self.populate_server(server.id) for server in new_servers])
+        events.extend(("server_create", server) for server in new_servers)
+        print(f"\033[1;32m[CACHE]      Reconciled {len(events)} changes in {time() - start:.2f} seconds.\033[0m")
+        return events
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable, Iterator, Literal, Optional, Tuple, Union, cast
+
+# Revolt always serializes the event type first so it can be read without decoding the whole frame.
+TYPE_PATTERN = re.compile(r'^\{\s*"type"\s*:\s*"(\w+)"')
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# The keys of the ready payload that hold the (potentially huge) lists of entities.
+READY_SECTIONS = frozenset({"users", "servers", "channels", "members", "emojis"})
+
+decoder = json.JSONDecoder()
+
+
+def iter_json_sections(data: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally decodes a json object, yielding the elements of its top level lists one at a time.
+
+    Only one element is decoded at a time so the whole tree never exists in memory at once.
+
+    Parameters
+    ----------
+    data: :class:`str`
+        The json object.
+
+    Yields
+    ------
+    Tuple[:class:`str`, Any]
+        The key and an element of its list, or the key and its value if it isn't a list.
+    """
+    index = WHITESPACE.match(data, 0).end()  # type: ignore
+    if data[index] != "{":
+        raise ValueError("Expected a json object")
+    index = WHITESPACE.match(data, index + 1).end()  # type: ignore
+    if data[index] == "}":
+        return
+    while True:
+        key, index = decoder.raw_decode(data, index)
+        index = WHITESPACE.match(data, index).end()  # type: ignore
+        if data[index] != ":":
+            raise ValueError(f"Expected ':' at {index}")
+        index = WHITESPACE.match(data, index + 1).end()  # type: ignore
+        if data[index] == "[":
+            index = WHITESPACE.match(data, index + 1).end()  # type: ignore
+            if data[index] == "]":
+                index += 1
+            else:
+                while True:
+                    item, index = decoder.raw_decode(data, index)
+                    yield key, item
+                    index = WHITESPACE.match(data, index).end()  # type: ignore
+                    if data[index] == "]":
+                        index += 1
+                        break
+                    if data[index] != ",":
+                        raise ValueError(f"Expected ',' or ']' at {index}")
+                    index = WHITESPACE.match(data, index + 1).end()  # type: ignore
+        else:
+            value, index = decoder.raw_decode(data, index)
+            yield key, value
+        index = WHITESPACE.match(data, index).end()  # type: ignore
+        if data[index] == "}":
+            return
+        if data[index] != ",":
+            raise ValueError(f"Expected ',' or '}}' at {index}")
+        index = WHITESPACE.match(data, index + 1).end()  # type: ignore
+
+
+class Codec:
+    """
+    The base class for the codecs that encode and decode gateway frames.
+
+    Attributes
+    ----------
+    format: Literal["json", "msgpack"]
+        The wire format the codec negotiates with the gateway.
+    binary: :class:`bool`
+        Whether the encoded frames are sent as binary or text.
+    """
+
+    __slots__ = ()
+
+    format: Literal["json", "msgpack"]
+    binary: bool
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decodes a frame.
+
+        Parameters
+        ----------
+        data: Union[:class:`str`, :class:`bytes`]
+            The raw frame.
+        """
+        raise NotImplementedError
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        """
+        Encodes an object into a frame.
+
+        Parameters
+        ----------
+        obj: Any
+            The object to encode.
+        """
+        raise NotImplementedError
+
+    def peek_type(self, data: Union[str, bytes]) -> Optional[str]:
+        """
+        Gets the event type of a frame without decoding all of it.
+
+        Parameters
+        ----------
+        data: Union[:class:`str`, :class:`bytes`]
+            The raw frame.
+
+        Returns
+        -------
+        Optional[:class:`str`]
+            The event type, None if it can't be found cheaply.
+        """
+        return None
+
+    def iter_sections(self, data: Union[str, bytes]) -> Optional[Iterator[Tuple[str, Any]]]:
+        """
+        Incrementally decodes a frame, one element of its top level lists at a time.
+
+        This is used for the ready payload so that its full tree never has to exist in memory.
+
+        Parameters
+        ----------
+        data: Union[:class:`str`, :class:`bytes`]
+            The raw frame.
+
+        Returns
+        -------
+        Optional[Iterator[Tuple[:class:`str`, Any]]]
+            An iterator of key-element pairs (key-value pairs for keys that aren't lists), None if the codec
+            can't decode the frame incrementally.
+        """
+        return None
+
+
+class JSONCodec(Codec):
+    """
+    A codec for the json wire format.
+
+    Parameters
+    ----------
+    loads: Optional[Callable[[Union[:class:`str`, :class:`bytes`]], Any]]
+        The function used to decode json, defaults to :func:`json.loads`.
+    dumps: Optional[Callable[[Any], Union[:class:`str`, :class:`bytes`]]]
+        The function used to encode json, defaults to :func:`json.dumps`.
+    """
+
+    __slots__ = ("_loads", "_dumps")
+
+    format = "json"
+    binary = False
+
+    def __init__(
+        self,
+        loads: Optional[Callable[[Union[str, bytes]], Any]] = None,
+        dumps: Optional[Callable[[Any], Union[str, bytes]]] = None,
+    ):
+        self._loads = loads or json.loads
+        self._dumps = dumps or json.dumps
+
+    @classmethod
+    def best_available(cls) -> JSONCodec:
+        """
+        Creates a json codec that uses the fastest json library that's installed.
+
+        ``orjson`` is preferred, then ``ujson``, falling back to the standard library.
+
+        Returns
+        -------
+        :class:`JSONCodec`
+            The codec.
+        """
+        try:
+            import orjson  # type: ignore
+
+            return cls(orjson.loads, orjson.dumps)
+        except ImportError:
+            pass
+        try:
+            import ujson  # type: ignore
+
+            return cls(ujson.loads, ujson.dumps)
+        except ImportError:
+            return cls()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def peek_type(self, data: Union[str, bytes]) -> Optional[str]:
+        if isinstance(data, str) and (match := TYPE_PATTERN.match(data, 0, 64)):
+            return match.group(1)
+        return None
+
+    def iter_sections(self, data: Union[str, bytes]) -> Optional[Iterator[Tuple[str, Any]]]:
+        if isinstance(data, bytes):
+            data = data.decode()
+        return iter_json_sections(data)
+
+    def dumps(self, obj: Any) -> str:
+        data = self._dumps(obj)
+        if isinstance(data, bytes):  # orjson only speaks bytes.
+            return data.decode()
+        return data
+
+
+class MsgpackCodec(Codec):
+    """
+    A codec for the msgpack wire format, this requires the ``msgpack`` library.
+    """
+
+    __slots__ = ("packb", "unpackb", "Unpacker")
+
+    format = "msgpack"
+    binary = True
+
+    def __init__(self):
+        try:
+            import msgpack  # type: ignore
+        except ImportError:
+            raise RuntimeError("msgpack is required for the msgpack codec, install it with `pip install msgpack`.")
+        self.packb = msgpack.packb
+        self.unpackb = msgpack.unpackb
+        self.Unpacker = msgpack.Unpacker
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, str):  # The gateway might still send the occasional text frame.
+            return json.loads(data)
+        return self.unpackb(data, raw=False)
+
+    def dumps(self, obj: Any) -> bytes:
+        # Packer.pack only returns None without autoreset, which packb never turns off.
+        return cast(bytes, self.packb(obj))
+
+    def peek_type(self, data: Union[str, bytes]) -> Optional[str]:
+        if isinstance(data, str):
+            return None
+        unpacker = self.Unpacker(raw=False)
+        unpacker.feed(data[:64])
+        try:
+            unpacker.read_map_header()
+            if unpacker.unpack() == "type":
+                return unpacker.unpack()
+        except Exception:  # Truncated or not a map, let the full decode deal with it.
+            pass
+        return None
+
+    def iter_sections(self, data: Union[str, bytes]) -> Optional[Iterator[Tuple[str, Any]]]:
+        if isinstance(data, str):
+            return iter_json_sections(data)
+        return self._iter_sections(data)
+
+    def _iter_sections(self, data: bytes) -> Iterator[Tuple[str, Any]]:
+        unpacker = self.Unpacker(raw=False)
+        unpacker.feed(data)
+        for _ in range(unpacker.read_map_header()):
+            key = unpacker.unpack()
+            if key in READY_SECTIONS:
+                for _ in range(unpacker.read_array_header()):
+                    yield key, unpacker.unpack()
+            else:
+                yield key, unpacker.unpack()
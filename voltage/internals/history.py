@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from typing import List, Optional, Tuple
+
+
+class ChannelHistory:
+    """
+    Keeps track of the cached messages of a channel and of the ranges of its history that are fully cached.
+
+    A range is only known to be complete when all of its messages were seen live, ranges are split when a
+    message in them is evicted from the cache and stop growing when the connection drops.
+
+    Attributes
+    ----------
+    ids: List[:class:`str`]
+        The ids of the cached messages, oldest first.
+    ranges: List[List[:class:`str`]]
+        The oldest and newest id of each complete range, oldest first.
+    open: :class:`bool`
+        Whether or not the newest range reaches the latest message of the channel.
+    """
+
+    __slots__ = ("ids", "ranges", "open")
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.ranges: List[List[str]] = []
+        self.open = False
+
+    def add(self, message_id: str, *, live: bool = False):
+        """
+        Adds a cached message.
+
+        Parameters
+        ----------
+        message_id: :class:`str`
+            The id of the message.
+        live: :class:`bool`
+            Whether or not the message was received live, which extends the open range.
+        """
+        index = bisect_left(self.ids, message_id)
+        if index == len(self.ids) or self.ids[index] != message_id:
+            self.ids.insert(index, message_id)
+        if not live:
+            return
+        if self.open and self.ranges:
+            newest = self.ranges[-1]
+            newest[0] = min(newest[0], message_id)
+            newest[1] = max(newest[1], message_id)
+        else:
+            insort(self.ranges, [message_id, message_id])
+            self.open = True
+
+    def discard(self, message_id: str, *, evicted: bool = False):
+        """
+        Removes a message.
+
+        Parameters
+        ----------
+        message_id: :class:`str`
+            The id of the message.
+        evicted: :class:`bool`
+            Whether the message was evicted from the cache, which splits its range, rather than deleted.
+        """
+        index = bisect_left(self.ids, message_id)
+        if index == len(self.ids) or self.ids[index] != message_id:
+            return
+        del self.ids[index]
+        if not evicted:
+            return
+        for position, (low, high) in enumerate(self.ranges):
+            if low <= message_id <= high:
+                split = []
+                if index > 0 and self.ids[index - 1] >= low:
+                    split.append([low, self.ids[index - 1]])
+                if index < len(self.ids) and self.ids[index] <= high:
+                    split.append([self.ids[index], high])
+                elif position == len(self.ranges) - 1:
+                    self.open = False  # The newest message isn't cached anymore.
+                self.ranges[position : position + 1] = split
+                return
+
+    def find(self, message_id: str) -> Optional[int]:
+        """
+        Gets the index of the range a message id falls in, ids newer than the open range fall in it.
+        """
+        for position, (low, high) in enumerate(self.ranges):
+            if low <= message_id <= high:
+                return position
+        if self.open and self.ranges and message_id > self.ranges[-1][1]:
+            return len(self.ranges) - 1
+        return None
+
+    def newest(self, limit: Optional[int], before: Optional[str], after: Optional[str]) -> Tuple[List[str], bool]:
+        """
+        Gets the newest cached messages older than ``before`` that are part of a complete range.
+
+        Parameters
+        ----------
+        limit: Optional[:class:`int`]
+            The maximum amount of messages, None for no limit.
+        before: Optional[:class:`str`]
+            The id to get the messages older than, None for the latest messages.
+        after: Optional[:class:`str`]
+            The id to get the messages newer than, if any.
+
+        Returns
+        -------
+        Tuple[List[:class:`str`], :class:`bool`]
+            The ids, newest first, and whether or not they're all the messages that were asked for.
+        """
+        if before is None:
+            if not self.open or not self.ranges:
+                return [], False
+            position = len(self.ranges) - 1
+        elif (position := self.find(before)) is None:
+            return [], False
+        low, high = self.ranges[position]
+        end = bisect_right(self.ids, high) if before is None else bisect_left(self.ids, before)
+        start = bisect_left(self.ids, low)
+        if after is not None:
+            start = max(start, bisect_right(self.ids, after))
+        if limit is not None:
+            start = max(start, end - limit)
+        ids = self.ids[start:end][::-1]
+        return ids, (limit is not None and len(ids) == limit) or (after is not None and after >= low)
+
+    def oldest(self, limit: Optional[int], before: Optional[str], after: Optional[str]) -> Tuple[List[str], bool]:
+        """
+        Gets the oldest cached messages newer than ``after`` that are part of a complete range.
+
+        Parameters
+        ----------
+        limit: Optional[:class:`int`]
+            The maximum amount of messages, None for no limit.
+        before: Optional[:class:`str`]
+            The id to get the messages older than, if any.
+        after: Optional[:class:`str`]
+            The id to get the messages newer than, without one the oldest messages of the channel would be
+            needed and those are never known to be cached.
+
+        Returns
+        -------
+        Tuple[List[:class:`str`], :class:`bool`]
+            The ids, oldest first, and whether or not they're all the messages that were asked for.
+        """
+        if after is None or (position := self.find(after)) is None:
+            return [], False
+        low, high = self.ranges[position]
+        start = bisect_right(self.ids, after)
+        end = bisect_right(self.ids, high)
+        if before is not None:
+            end = min(end, bisect_left(self.ids, before))
+        if limit is not None:
+            end = min(end, start + limit)
+        ids = self.ids[start:end]
+        reaches_latest = self.open and position == len(self.ranges) - 1
+        return ids, (
+            (limit is not None and len(ids) == limit) or (before is not None and before <= high) or reaches_latest
+        )
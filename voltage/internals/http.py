@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from asyncio import gather
-from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Union
-
-from aiohttp import ClientSession, FormData
+from asyncio import TimeoutError, gather, sleep
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession, FormData
 
 from ..embed import SendableEmbed
 
@@ -11,54 +22,180 @@ from ..embed import SendableEmbed
 from ..errors import HTTPError, PermissionError
 from ..file import File
 from ..message import MessageInteractions, MessageMasquerade, MessageReply
+from .assetcache import AssetCache
+from .codec import JSONCodec
+from .metrics import MetricsRegistry
+from .priority import Priority, PriorityScheduler, current_priority
+from .ratelimit import RateLimiter, route_key
+from .responsecache import MISSING, ResponseCache
+from .retry import RetryPolicy, RetryStats
+from .singleflight import SingleFlight
+from .transport import AiohttpTransport, Transport
+from .uploads import UploadManager
 
 if TYPE_CHECKING:
     from ..enums import *
     from ..types import *
 
 
+class PoolStats(NamedTuple):
+    """
+    The saturation of the connection pool of a session.
+
+    Attributes
+    ----------
+    limit: :class:`int`
+        The maximum amount of connections, 0 if there's no limit.
+    limit_per_host: :class:`int`
+        The maximum amount of connections to a single host, 0 if there's no limit.
+    in_use: :class:`int`
+        The amount of connections currently used by requests.
+    idle: :class:`int`
+        The amount of open connections kept alive for reuse.
+    waiters: :class:`int`
+        The amount of requests waiting for a connection because the pool is full.
+    """
+
+    limit: int
+    limit_per_host: int
+    in_use: int
+    idle: int
+    waiters: int
+
+
 class HTTPHandler:
     """
     A simple handler for http requests.
 
     Parameters
     ----------
-    client: :class:`aiohttp.ClientSession`
-        The client to use for the http requests.
+    client: Optional[:class:`aiohttp.ClientSession`]
+        The client to use for the http requests, can be None when a ``transport`` is given.
     token: :class:`str`
         The bot token to use for authentication.
     api_url: Optional[:class:`str`]
         The url of the api. Defaults to "https://api.revolt.chat/".
     bot: :class:`bool`
         Whether or not the token is a bot token.
+    retry_policy: Optional[:class:`RetryPolicy`]
+        Which failed requests are sent again and when, defaults to retrying idempotent requests that failed with
+        a 5xx status code or a connection error up to 3 times.
+    response_cache: Optional[:class:`ResponseCache`]
+        If set, the responses of the endpoints whose data rarely changes are cached. Requests that change a
+        resource invalidate its cached responses.
+    json_codec: Optional[:class:`JSONCodec`]
+        The codec used to encode request bodies and decode responses, for example
+        :meth:`JSONCodec.best_available` for a faster json library. Defaults to the standard library.
+    asset_cache: Optional[:class:`AssetCache`]
+        If set, downloaded assets are stored on disk and served from there when they're downloaded again.
+    upload_concurrency: :class:`int`
+        The maximum amount of files uploaded to autumn at once.
+    upload_dedup: :class:`bool`
+        Whether or not to reuse the autumn ids of content uploaded recently instead of uploading it again.
+    metrics: Optional[:class:`MetricsRegistry`]
+        The registry the latency, status codes, bytes and retries of the requests are recorded in, a new one is
+        created if not given.
+    request_concurrency: Optional[:class:`int`]
+        The maximum amount of requests sent at once, the most urgent waiting request is sent first. Defaults to
+        the connection limit of the session minus two connections left for the websocket and uploads.
+    transport: Optional[:class:`Transport`]
+        What sends the requests, for example a :class:`MockTransport` to run offline. Defaults to sending them
+        with ``client``.
+
+    Attributes
+    ----------
+    ratelimiter: :class:`RateLimiter`
+        Keeps track of the rate limits of the api, requests that would exceed them are queued until they reset.
+    retry_stats: Dict[:class:`str`, :class:`RetryStats`]
+        The retry counters of each route that had to retry, see :func:`route_key`.
+    single_flight: :class:`SingleFlight`
+        Coalesces concurrent identical GET requests so they share one round trip.
+    uploads: :class:`UploadManager`
+        Uploads files to autumn, reusing the ids of recently uploaded content if ``upload_dedup`` is set.
+    scheduler: :class:`PriorityScheduler`
+        Hands out the request slots by priority, background requests can only take half of them.
     """
 
-    __slots__ = ("client", "token", "api_url", "api_info", "bot")
+    __slots__ = (
+        "client",
+        "token",
+        "api_url",
+        "api_info",
+        "bot",
+        "ratelimiter",
+        "retry_policy",
+        "retry_stats",
+        "single_flight",
+        "response_cache",
+        "json_codec",
+        "asset_cache",
+        "uploads",
+        "metrics",
+        "scheduler",
+        "transport",
+    )
 
     def __init__(
         self,
-        client: ClientSession,
+        client: Optional[ClientSession],
         token: str,
         *,
         api_url: str = "https://api.revolt.chat/",
         bot: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        response_cache: Optional[ResponseCache] = None,
+        json_codec: Optional[JSONCodec] = None,
+        asset_cache: Optional[AssetCache] = None,
+        upload_concurrency: int = 4,
+        upload_dedup: bool = False,
+        metrics: Optional[MetricsRegistry] = None,
+        request_concurrency: Optional[int] = None,
+        transport: Optional[Transport] = None,
     ):
         self.client = client
         self.token = token
         self.api_url = api_url
         self.api_info: Optional[ApiInfoPayload] = None
         self.bot = bot
+        self.ratelimiter = RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats: Dict[str, RetryStats] = {}
+        self.single_flight = SingleFlight()
+        self.response_cache = response_cache
+        self.json_codec = json_codec or JSONCodec()
+        self.asset_cache = asset_cache
+        self.uploads = UploadManager(self, concurrency=upload_concurrency, dedup=upload_dedup)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        if transport is None:
+            if client is None:
+                raise ValueError("Either a client or a transport is needed")
+            transport = AiohttpTransport(client)
+        self.transport = transport
+        if request_concurrency is None:
+            limit = client.connector.limit if client is not None and client.connector is not None else 0
+            request_concurrency = max(limit - 2, 1) if limit else 100
+        self.scheduler = PriorityScheduler(request_concurrency)
 
     async def request(
         self,
         method: Literal["GET", "POST", "PUT", "DELETE", "PATCH"],
         url: str,
         auth: Optional[bool] = True,
+        *,
+        decode: bool = True,
+        priority: Optional[Priority] = None,
         **kwargs,
     ) -> Any:
         """
         Makes a request to the API.
 
+        Requests that would exceed their rate limit bucket wait for it to reset and requests the api rate limited
+        anyway are sent again once allowed, as many times as :attr:`retry_policy` allows. Transient failures are
+        retried according to it too.
+        A GET request identical to one that's already in flight shares its response instead of being sent, and
+        one that's in the :attr:`response_cache` isn't sent at all. Background requests yield the connection pool
+        and the end of each rate limit window to more urgent ones.
+
         Parameters
         ----------
         method: Literal["GET", "POST", "PUT", "DELETE", "PATCH"]
@@ -67,40 +204,190 @@ class HTTPHandler:
             The url to send the request to.
         auth: Optional[:class:`bool`]
             Whether or not to use authentication. Defaults to True.
+        decode: :class:`bool`
+            Whether or not to decode the response, callers that discard it can skip that. Defaults to True.
+        priority: Optional[:class:`Priority`]
+            How urgent the request is, defaults to the priority set with :func:`prioritized` or normal.
         kwargs: dict
-            The kwargs to pass to the request.
+            The kwargs to pass to the request, a ``json`` body is encoded with :attr:`json_codec`.
 
         Raises
         ------
-        HTTPError: If the request didn't respond with a status code between 200 and 300.
+        HTTPError: If the request didn't respond with a status code between 200 and 300, or stayed rate limited.
+        aiohttp.ClientConnectionError: If the connection failed and the request can't be retried.
+
+        Returns
+        -------
+        The response of the request, an empty dict if it was empty or it wasn't decoded.
+        """
+        if priority is None:
+            priority = current_priority.get()
+        cache = self.response_cache
+        if method == "GET" and decode and kwargs.keys() <= {"params"}:
+            if cache is not None and not kwargs and (response := cache.get(url)) is not MISSING:
+                return response
+            params = kwargs.get("params")
+            key = (url, auth, repr(sorted(params.items())) if params else None)
+
+            async def fetch() -> Any:
+                # A write that lands while the request is in flight makes its response stale before it arrives.
+                generation = cache.generation(url) if cache is not None else None
+                response = await self.send_request(method, url, auth, priority=priority, **kwargs)
+                if cache is not None and not kwargs:
+                    cache.put(url, response, generation)
+                return response
+
+            return await self.single_flight.run(key, fetch)
+        response = await self.send_request(method, url, auth, decode=decode, priority=priority, **kwargs)
+        if cache is not None:
+            cache.invalidate(url)
+        return response
+
+    def pool_stats(self) -> PoolStats:
+        """
+        Gets the saturation of the connection pool of the session.
 
         Returns
         -------
-        The response of the request.
+        :class:`PoolStats`
+            The stats, all zeros if there's no session or it has no connector.
+        """
+        connector = self.client.connector if self.client is not None else None
+        if connector is None:
+            return PoolStats(0, 0, 0, 0, 0)
+        # aiohttp doesn't expose these, so they're read defensively in case its internals change.
+        in_use = len(getattr(connector, "_acquired", ()))
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        waiters = sum(len(waiting) for waiting in getattr(connector, "_waiters", {}).values())
+        return PoolStats(connector.limit, connector.limit_per_host, in_use, idle, waiters)
+
+    def invalidate(self, url: str):
+        """
+        Removes the cached responses a change to a resource made stale, does nothing without a response cache.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url of the resource relative to the api url, for example ``servers/{id}``.
         """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(url)
+
+    async def send_request(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE", "PATCH"],
+        url: str,
+        auth: Optional[bool] = True,
+        *,
+        decode: bool = True,
+        priority: Priority = Priority.normal,
+        **kwargs,
+    ) -> Any:
+        """
+        Sends a request to the API, bypassing the coalescing of :meth:`request`.
+        """
+        if "json" in kwargs:
+            kwargs["data"] = self.json_codec.dumps(kwargs.pop("json"))
         header = {"User-Agent": "Voltage", "Content-Type": "application/json"}
         token_header = "x-bot-token" if self.bot else "x-session-token"
         if auth:
             header[token_header] = self.token
-        async with self.client.request(method, self.api_url + url, headers=header, **kwargs) as request:
-            headers = request.headers
-            # print(headers.get("X-Ratelimit-Remaining"))
-            if request.status >= 200 and request.status <= 300:
-                if (await request.read()) == b"":
-                    return {}
-                return await request.json()
-            elif request.status == 403:
-                raise PermissionError()
-            raise HTTPError(request)
+        route = route_key(method, url)
+        metrics = self.metrics.route(route)
+        data = kwargs.get("data")
+        attempt = 1
+        ratelimited = 0
+        stats = None
+        start = sent = perf_counter()
+        metrics.in_flight += 1
+        try:
+            while True:
+                await self.ratelimiter.acquire(route, priority)
+                await self.scheduler.acquire(priority)
+                sent = perf_counter()
+                if isinstance(data, (bytes, str)):
+                    metrics.bytes_sent += len(data)
+                retry_after = None
+                try:
+                    async with self.transport.request(method, self.api_url + url, headers=header, **kwargs) as request:
+                        self.ratelimiter.update(route, request.headers)
+                        if request.status >= 200 and request.status <= 300:
+                            # The body is read even when it's not decoded so the connection can be reused.
+                            body = await request.read()
+                            metrics.observe(str(request.status), perf_counter() - sent, len(body))
+                            if not decode or body == b"":
+                                return {}
+                            return self.json_codec.loads(body)
+                        metrics.observe(str(request.status), perf_counter() - sent, request.content_length or 0)
+                        if request.status == 429:
+                            self.ratelimiter.exhaust(route, await self.get_retry_after(request))
+                            stats = stats or self.retry_stats.setdefault(route, RetryStats())
+                            if ratelimited >= self.retry_policy.max_ratelimited:
+                                stats.exhausted += 1
+                                raise HTTPError(request)
+                            ratelimited += 1
+                            stats.ratelimited += 1
+                            metrics.retries += 1
+                            continue
+                        elif request.status == 403:
+                            raise PermissionError()
+                        if not self.retry_policy.should_retry(method, attempt, request.status):
+                            if stats is not None and request.status in self.retry_policy.statuses:
+                                stats.exhausted += 1
+                            raise HTTPError(request)
+                        if (header_value := request.headers.get("Retry-After")) is not None:
+                            try:
+                                retry_after = float(header_value)
+                            except ValueError:  # An http date, not worth parsing.
+                                pass
+                except (ClientConnectionError, TimeoutError):
+                    metrics.observe("error", perf_counter() - sent)
+                    if not self.retry_policy.should_retry(method, attempt):
+                        if stats is not None:
+                            stats.exhausted += 1
+                        raise
+                finally:
+                    self.scheduler.release(priority)
+                stats = stats or self.retry_stats.setdefault(route, RetryStats())
+                stats.retries += 1
+                metrics.retries += 1
+                await sleep(self.retry_policy.delay(attempt, retry_after))
+                attempt += 1
+        finally:
+            metrics.in_flight -= 1
+            if stats is not None:
+                stats.delay += sent - start
+
+    @staticmethod
+    async def get_retry_after(response: ClientResponse) -> float:
+        """
+        Gets how long to wait before retrying a rate limited request.
+
+        Parameters
+        ----------
+        response: :class:`aiohttp.ClientResponse`
+            The rate limited response.
 
-    async def upload_file(self, file: bytes, name: str, tag: str) -> AutumnPayload:
+        Returns
+        -------
+        :class:`float`
+            The seconds to wait.
+        """
+        if (reset_after := response.headers.get("X-RateLimit-Reset-After")) is not None:
+            return int(reset_after) / 1000
+        try:
+            return (await response.json(content_type=None))["retry_after"] / 1000
+        except (ValueError, KeyError, TypeError):
+            return 1.0
+
+    async def upload_file(self, file: Union[bytes, AsyncIterable[bytes]], name: str, tag: str) -> AutumnPayload:
         """
         Uploads a file to autumn.
 
         Parameters
         ----------
-        file: :class:`bytes`
-            The file to upload.
+        file: Union[:class:`bytes`, AsyncIterable[:class:`bytes`]]
+            The file to upload, an async iterable is streamed chunk by chunk.
         name: :class:`str`
             The name of the file.
         tag: :class:`str`
@@ -119,8 +406,8 @@ class HTTPHandler:
         form = FormData()
         form.add_field("file", file, filename=name)
 
-        async with self.client.post(autumn, data=form, headers=headers) as request:
-            if 200 >= request.status <= 300:
+        async with self.transport.request("POST", autumn, data=form, headers=headers) as request:
+            if 200 <= request.status < 300:
                 return await request.json()
             raise HTTPError(request)
 
@@ -133,11 +420,45 @@ class HTTPHandler:
         url: :class:`str`
             The url of the file.
         """
-        async with self.client.get(url) as request:
-            if 200 >= request.status <= 300:
+        async with self.transport.request("GET", url) as request:
+            if 200 <= request.status < 300:
                 return await request.read()
             raise HTTPError(request)
 
+    async def stream_file(
+        self, url: str, *, key: Optional[str] = None, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """
+        Downloads a file in chunks.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url of the file.
+        key: Optional[:class:`str`]
+            What identifies the file in the :attr:`asset_cache`, files without one aren't cached.
+        chunk_size: :class:`int`
+            The maximum size of the chunks.
+
+        Yields
+        ------
+        :class:`bytes`
+            The next chunk of the file.
+        """
+        if key is not None and self.asset_cache is not None:
+            if (path := self.asset_cache.get(key)) is not None:
+                async for chunk in self.asset_cache.read(path, chunk_size):
+                    yield chunk
+                return
+            async for chunk in self.asset_cache.store(key, self.stream_file(url, chunk_size=chunk_size)):
+                yield chunk
+            return
+        async with self.transport.request("GET", url) as request:
+            if not 200 <= request.status < 300:
+                raise HTTPError(request)
+            async for chunk in request.content.iter_chunked(chunk_size):
+                yield chunk
+
     async def query_node(self) -> ApiInfoPayload:
         """
         Gets info about the API.
@@ -227,7 +548,13 @@ class HTTPHandler:
         user_id: :class:`str`
             The id of the user.
         """
-        return await self.get_file_binary(f"{self.api_url}/users/{user_id}/default_avatar")
+        url = f"users/{user_id}/default_avatar"
+        if self.response_cache is not None and (avatar := self.response_cache.get(url)) is not MISSING:
+            return avatar
+        avatar = await self.get_file_binary(f"{self.api_url}/{url}")
+        if self.response_cache is not None:
+            self.response_cache.put(url, avatar)
+        return avatar
 
     async def fetch_mutuals(self, user_id: str):
         """
@@ -318,9 +645,9 @@ class HTTPHandler:
         channel_id: :class:`str`
             The id of the channel.
         """
-        return await self.request("DELETE", f"channels/{channel_id}")
+        return await self.request("DELETE", f"channels/{channel_id}", decode=False)
 
-    async def create_invite(self, channel_id: str) -> InvitePayload:
+    async def create_invite(self, channel_id: str) -> PartialInvitePayload:
         """
         Creates an invite for a channel.
 
@@ -329,7 +656,10 @@ class HTTPHandler:
         channel_id: :class:`str`
             The id of the channel.
         """
-        return await self.request("POST", f"channels/{channel_id}/invites")
+        invite: PartialInvitePayload = await self.request("POST", f"channels/{channel_id}/invites")
+        # The invites are listed under the server, not the channel the request went to.
+        self.invalidate(f"servers/{invite['server']}/invites")
+        return invite
 
     async def set_role_perms(self, channel_id: str, role_id: str, permissions: OverrideFieldPayload):
         """
@@ -419,15 +749,32 @@ class HTTPHandler:
             data["interactions"] = (
                 interactions.to_dict() if isinstance(interactions, MessageInteractions) else interactions
             )
-        return await self.request("POST", f"channels/{channel_id}/messages", json=data)
+        try:
+            return await self.request(
+                "POST", f"channels/{channel_id}/messages", json=data, priority=Priority.interactive
+            )
+        except HTTPError:
+            # A reused autumn id may have been attached to another message already, those are single use.
+            if not attachments or not any([self.uploads.forget(id) for id in data["attachments"]]):
+                raise
+            data["attachments"] = await gather(*[self.handle_attachment(attachment) for attachment in attachments])
+            return await self.request(
+                "POST", f"channels/{channel_id}/messages", json=data, priority=Priority.interactive
+            )
 
     async def add_reaction(self, channel_id: str, message_id: str, emoji_id: str):
-        return await self.request("PUT", f"channels/{channel_id}/messages/{message_id}/reactions/{emoji_id}")
+        return await self.request(
+            "PUT",
+            f"channels/{channel_id}/messages/{message_id}/reactions/{emoji_id}",
+            decode=False,
+            priority=Priority.interactive,
+        )
 
     async def delete_reaction(self, channel_id: str, message_id: str, emoji_id: str):
         return await self.request(
             "DELETE",
             f"channels/{channel_id}/messages/{message_id}/reactions/{emoji_id}",
+            decode=False,
         )
 
     async def delete_all_reaction(
@@ -435,7 +782,7 @@ class HTTPHandler:
         channel_id: str,
         message_id: str,
     ):
-        return await self.request("DELETE", f"channels/{channel_id}/messages/{message_id}/reactions")
+        return await self.request("DELETE", f"channels/{channel_id}/messages/{message_id}/reactions", decode=False)
 
     async def fetch_messages(
         self,
@@ -521,7 +868,9 @@ class HTTPHandler:
             data["content"] = content
         if embeds:
             data["embeds"] = await gather(*[self.handle_embed(embed) for embed in embeds])
-        return await self.request("PATCH", f"channels/{channel_id}/messages/{message_id}", json=data)
+        return await self.request(
+            "PATCH", f"channels/{channel_id}/messages/{message_id}", json=data, priority=Priority.interactive
+        )
 
     async def delete_message(self, channel_id: str, message_id: str):
         """
@@ -534,7 +883,22 @@ class HTTPHandler:
         message_id: :class:`str`
             The id of the message.
         """
-        return await self.request("DELETE", f"channels/{channel_id}/messages/{message_id}")
+        return await self.request("DELETE", f"channels/{channel_id}/messages/{message_id}", decode=False)
+
+    async def delete_messages(self, channel_id: str, message_ids: List[str]):
+        """
+        Deletes up to 100 messages at once, they must be less than a week old.
+
+        Parameters
+        ----------
+        channel_id: :class:`str`
+            The id of the channel.
+        message_ids: List[:class:`str`]
+            The ids of the messages to delete.
+        """
+        return await self.request(
+            "DELETE", f"channels/{channel_id}/messages/bulk", json={"ids": message_ids}, decode=False
+        )
 
     async def poll_message_changed(
         self, channel_id: str, ids: List[str]
@@ -696,7 +1060,7 @@ class HTTPHandler:
         server_id: :class:`str`
             The id of the server.
         """
-        return await self.request("DELETE", f"servers/{server_id}")
+        return await self.request("DELETE", f"servers/{server_id}", decode=False)
 
     async def create_channel(
         self,
@@ -804,9 +1168,9 @@ class HTTPHandler:
         member_id: :class:`str`
             The id of the member.
         """
-        return await self.request("DELETE", f"servers/{server_id}/members/{member_id}")
+        return await self.request("DELETE", f"servers/{server_id}/members/{member_id}", decode=False)
 
-    async def fetch_members(self, server_id) -> GetServerMembersPayload:
+    async def fetch_members(self, server_id, *, priority: Priority = Priority.background) -> GetServerMembersPayload:
         """
         Gets the members of a server.
 
@@ -814,8 +1178,10 @@ class HTTPHandler:
         ----------
         server_id: :class:`str`
             The id of the server.
+        priority: :class:`Priority`
+            How urgent the request is, it's bulk work done in the background by default.
         """
-        return await self.request("GET", f"servers/{server_id}/members")
+        return await self.request("GET", f"servers/{server_id}/members", priority=priority)
 
     async def ban_member(self, server_id: str, member_id: str, *, reason: Optional[str] = None):
         """
@@ -846,7 +1212,7 @@ class HTTPHandler:
         member_id: :class:`str`
             The id of the member.
         """
-        return await self.request("DELETE", f"servers/{server_id}/bans/{member_id}")
+        return await self.request("DELETE", f"servers/{server_id}/bans/{member_id}", decode=False)
 
     async def fetch_bans(self, server_id: str) -> List[BanPayload]:
         """
@@ -966,7 +1332,7 @@ class HTTPHandler:
         role_id: :class:`str`
             The id of the role.
         """
-        return await self.request("DELETE", f"servers/{server_id}/roles/{role_id}")
+        return await self.request("DELETE", f"servers/{server_id}/roles/{role_id}", decode=False)
 
     async def fetch_invite(self, invite_code: str) -> InvitePayload:
         """
@@ -988,7 +1354,7 @@ class HTTPHandler:
         invite_code: :class:`str`
             The code of the invite.
         """
-        return await self.request("DELETE", f"invites/{invite_code}")
+        return await self.request("DELETE", f"invites/{invite_code}", decode=False)
 
     async def handle_attachment(self, attachment_data: Union[str, File]) -> str:
         """
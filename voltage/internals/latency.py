@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import deque
+from math import ceil
+from typing import Deque, Optional
+
+
+class LatencyHistogram:
+    """
+    A rolling window of latency samples.
+
+    Parameters
+    ----------
+    size: :class:`int`
+        The maximum amount of samples kept, older samples are discarded first.
+
+    Attributes
+    ----------
+    samples: Deque[:class:`float`]
+        The kept samples in seconds, oldest first.
+    """
+
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int = 100):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def record(self, sample: float):
+        """
+        Adds a sample to the window.
+
+        Parameters
+        ----------
+        sample: :class:`float`
+            The latency in seconds.
+        """
+        self.samples.append(sample)
+
+    def clear(self):
+        """
+        Discards all the samples.
+        """
+        self.samples.clear()
+
+    @property
+    def latest(self) -> Optional[float]:
+        """The most recent sample, None if there aren't any."""
+        return self.samples[-1] if self.samples else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        """The average of the samples, None if there aren't any."""
+        return sum(self.samples) / len(self.samples) if self.samples else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Gets a percentile of the samples using the nearest-rank method.
+
+        Parameters
+        ----------
+        percent: :class:`float`
+            The percentile to get, between 0 and 100.
+
+        Returns
+        -------
+        Optional[:class:`float`]
+            The percentile in seconds, None if there aren't any samples.
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be between 0 and 100")
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(ceil(percent * len(ordered) / 100), 1)
+        return ordered[rank - 1]
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from aiohttp import web
+
+# The upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The type and description of each exported metric, by name without the prefix.
+METRICS: Dict[str, Tuple[str, str]] = {
+    "requests_total": ("counter", "The api responses received, by status code."),
+    "request_duration_seconds": ("histogram", "How long the api took to respond."),
+    "requests_in_flight": ("gauge", "The api requests being sent or waiting to be."),
+    "request_bytes_total": ("counter", "The size of the api request bodies."),
+    "response_bytes_total": ("counter", "The size of the api response bodies."),
+    "retries_total": ("counter", "The api requests sent again after a failure or a rate limit."),
+}
+
+
+class RouteSnapshot(NamedTuple):
+    """
+    The metrics of a route at a point in time.
+
+    Attributes
+    ----------
+    requests: :class:`int`
+        The amount of responses received, retries included.
+    in_flight: :class:`int`
+        The amount of requests currently being sent or waiting to be.
+    statuses: Dict[:class:`str`, :class:`int`]
+        The amount of responses by status code, failed connections are counted as ``"error"``.
+    latency_sum: :class:`float`
+        The total seconds spent waiting for responses.
+    latency_buckets: List[Tuple[:class:`float`, :class:`int`]]
+        The amount of responses that took at most each bucket's upper bound, cumulative like prometheus'.
+    bytes_sent: :class:`int`
+        The size of the request bodies.
+    bytes_received: :class:`int`
+        The size of the response bodies.
+    retries: :class:`int`
+        The amount of requests sent again after a failure or a rate limit.
+    """
+
+    requests: int
+    in_flight: int
+    statuses: Dict[str, int]
+    latency_sum: float
+    latency_buckets: List[Tuple[float, int]]
+    bytes_sent: int
+    bytes_received: int
+    retries: int
+
+
+class RouteMetrics:
+    """
+    The counters of a single route.
+
+    Parameters
+    ----------
+    buckets: Sequence[:class:`float`]
+        The upper bounds of the latency histogram buckets, in seconds and ascending.
+    """
+
+    __slots__ = (
+        "buckets",
+        "counts",
+        "requests",
+        "in_flight",
+        "statuses",
+        "latency_sum",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+    )
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is for the responses slower than every bound.
+        self.requests = 0
+        self.in_flight = 0
+        self.statuses: Dict[str, int] = {}
+        self.latency_sum = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+
+    def observe(self, status: str, latency: float, received: int = 0):
+        """
+        Records a response.
+
+        Parameters
+        ----------
+        status: :class:`str`
+            The status code of the response, ``"error"`` if the connection failed.
+        latency: :class:`float`
+            The seconds it took.
+        received: :class:`int`
+            The size of its body.
+        """
+        self.requests += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency_sum += latency
+        self.counts[bisect_left(self.buckets, latency)] += 1
+        self.bytes_received += received
+
+    def snapshot(self) -> RouteSnapshot:
+        """
+        Gets the current values of the counters.
+        """
+        buckets = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            buckets.append((bound, total))
+        buckets.append((float("inf"), self.requests))
+        return RouteSnapshot(
+            self.requests,
+            self.in_flight,
+            dict(self.statuses),
+            self.latency_sum,
+            buckets,
+            self.bytes_sent,
+            self.bytes_received,
+            self.retries,
+        )
+
+
+def escape_label(value: str) -> str:
+    """
+    Escapes a label value for the prometheus text format.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_bound(bound: float) -> str:
+    """
+    Formats a bucket bound the way prometheus clients do.
+    """
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class MetricsRegistry:
+    """
+    Collects the latency, status codes, bytes and retries of the api requests per route.
+
+    Routes are templated with :func:`route_key`, so ``GET channels/{id}/messages`` covers every channel.
+
+    Parameters
+    ----------
+    buckets: Sequence[:class:`float`]
+        The upper bounds of the latency histogram buckets, in seconds. Defaults to :data:`DEFAULT_BUCKETS`.
+    prefix: :class:`str`
+        The prefix of the names of the exported metrics.
+
+    Attributes
+    ----------
+    routes: Dict[:class:`str`, :class:`RouteMetrics`]
+        The counters of each route that was requested.
+    """
+
+    __slots__ = ("buckets", "prefix", "routes")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "voltage_http"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.routes: Dict[str, RouteMetrics] = {}
+
+    def __len__(self):
+        return len(self.routes)
+
+    def route(self, route: str) -> RouteMetrics:
+        """
+        Gets the counters of a route, creating them if needed.
+
+        Parameters
+        ----------
+        route: :class:`str`
+            The route, as given by :func:`route_key`.
+        """
+        if (metrics := self.routes.get(route)) is None:
+            metrics = self.routes[route] = RouteMetrics(self.buckets)
+        return metrics
+
+    def snapshot(self) -> Dict[str, RouteSnapshot]:
+        """
+        Gets the current values of the counters of every route.
+
+        Returns
+        -------
+        Dict[:class:`str`, :class:`RouteSnapshot`]
+            The snapshots by route.
+        """
+        return {route: metrics.snapshot() for route, metrics in self.routes.items()}
+
+    def clear(self):
+        """
+        Forgets every route, in flight requests stop being tracked too.
+        """
+        self.routes.clear()
+
+    def render(self) -> str:
+        """
+        Exports the metrics in the prometheus text format.
+
+        Returns
+        -------
+        :class:`str`
+            The metrics, ready to be scraped.
+        """
+        name = self.prefix
+        lines: Dict[str, List[str]] = {metric: [] for metric in METRICS}
+        for route, snapshot in sorted(self.snapshot().items()):
+            method, _, path = route.partition(" ")
+            labels = f'method="{escape_label(method)}",route="{escape_label(path)}"'
+            for status, count in sorted(snapshot.statuses.items()):
+                lines["requests_total"].append(f'{name}_requests_total{{{labels},status="{status}"}} {count}')
+            histogram = lines["request_duration_seconds"]
+            for bound, count in snapshot.latency_buckets:
+                bucket = f'{labels},le="{format_bound(bound)}"'
+                histogram.append(f"{name}_request_duration_seconds_bucket{{{bucket}}} {count}")
+            histogram.append(f"{name}_request_duration_seconds_sum{{{labels}}} {snapshot.latency_sum!r}")
+            histogram.append(f"{name}_request_duration_seconds_count{{{labels}}} {snapshot.requests}")
+            lines["requests_in_flight"].append(f"{name}_requests_in_flight{{{labels}}} {snapshot.in_flight}")
+            lines["request_bytes_total"].append(f"{name}_request_bytes_total{{{labels}}} {snapshot.bytes_sent}")
+            lines["response_bytes_total"].append(f"{name}_response_bytes_total{{{labels}}} {snapshot.bytes_received}")
+            lines["retries_total"].append(f"{name}_retries_total{{{labels}}} {snapshot.retries}")
+        output = []
+        for metric, (kind, description) in METRICS.items():
+            output.append(f"# HELP {name}_{metric} {description}")
+            output.append(f"# TYPE {name}_{metric} {kind}")
+            output.extend(lines[metric])
+        return "\n".join(output) + "\n"
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9090, path: str = "/metrics") -> web.AppRunner:
+        """
+        Serves the metrics over http for prometheus to scrape.
+
+        Parameters
+        ----------
+        host: :class:`str`
+            The address to listen on, only the local machine by default.
+        port: :class:`int`
+            The port to listen on, 0 picks a free one.
+        path: :class:`str`
+            The path the metrics are served at.
+
+        Returns
+        -------
+        :class:`aiohttp.web.AppRunner`
+            The runner of the server, call its ``cleanup`` method to stop it.
+        """
+
+        async def metrics(_: web.Request) -> web.Response:
+            return web.Response(body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get(path, metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
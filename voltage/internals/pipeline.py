@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from asyncio import AbstractEventLoop, Queue, Task
+from collections import deque
+from time import monotonic
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+OverflowPolicy = Literal["block", "drop", "spill"]
+
+# Events that are fine to lose when the bot can't keep up, none of them changes the cache.
+DEFAULT_LOW_PRIORITY = frozenset({"ChannelStartTyping", "ChannelStopTyping", "ChannelAck"})
+
+
+def default_event_key(payload: Dict[Any, Any]) -> Optional[str]:
+    """
+    Gets the id of the entity a payload is about, used to order events in an :class:`EventPipeline`.
+
+    Message events are keyed by their channel, member events by their server and everything else by its own id.
+
+    Parameters
+    ----------
+    payload: Dict[Any, Any]
+        The gateway payload.
+
+    Returns
+    -------
+    Optional[:class:`str`]
+        The key of the payload or None if it doesn't have one.
+    """
+    if payload.get("type", "").startswith("Message"):
+        return payload.get("channel") or payload.get("channel_id")
+    key = payload.get("id") or payload.get("_id")
+    if isinstance(key, dict):  # Member ids are a server-user pair.
+        return key.get("server")
+    return key
+
+
+class PipelineStats(NamedTuple):
+    """
+    A snapshot of the state of an :class:`EventPipeline`.
+
+    Attributes
+    ----------
+    depth: :class:`int`
+        The amount of payloads waiting in the queue.
+    spilled: :class:`int`
+        The amount of payloads waiting in the overflow buffer.
+    processed: :class:`int`
+        The amount of payloads that were handled so far.
+    dropped: :class:`int`
+        The amount of payloads that were dropped by the overflow policy.
+    lag: :class:`float`
+        How long, in seconds, the last payload waited before a worker picked it up.
+    max_lag: :class:`float`
+        The longest time, in seconds, a payload waited before a worker picked it up.
+    lanes: Tuple[:class:`int`, ...]
+        The amount of payloads waiting in each lane, including spilled ones.
+    """
+
+    depth: int
+    spilled: int
+    processed: int
+    dropped: int
+    lag: float
+    max_lag: float
+    lanes: Tuple[int, ...]
+
+
+class EventPipeline:
+    """
+    A bounded queue of gateway payloads that's consumed by a fixed pool of workers.
+
+    By default all the workers share a single queue so events are handled in no particular order. If ``lanes``
+    is set the pipeline is ordered instead, payloads are sharded by their key into that many queues which each
+    have a single worker, so events about the same entity are handled one after another in the order they arrived.
+
+    Parameters
+    ----------
+    handler: Callable[[Dict[Any, Any]], Awaitable[Any]]
+        The coroutine function that handles a single payload.
+    loop: :class:`asyncio.AbstractEventLoop`
+        The event loop.
+    maxsize: :class:`int`
+        The maximum amount of payloads waiting to be handled.
+    workers: :class:`int`
+        The amount of workers handling payloads concurrently.
+    overflow: Literal["block", "drop", "spill"]
+        What to do when the queue is full. ``block`` stops reading from the websocket until there's room,
+        ``drop`` discards low priority events (and blocks for the rest) and ``spill`` moves the payloads
+        to an unbounded overflow buffer that's drained back into the queue as it empties.
+    low_priority: Iterable[:class:`str`]
+        The event types that the ``drop`` policy is allowed to discard.
+    lanes: Optional[:class:`int`]
+        The amount of serial lanes to shard payloads into, enables ordered mode and replaces ``workers``.
+    key: Optional[Callable[[Dict[Any, Any]], Optional[:class:`str`]]]
+        The function that gets the key of a payload in ordered mode, defaults to :func:`default_event_key`.
+    """
+
+    __slots__ = (
+        "handler",
+        "loop",
+        "maxsize",
+        "overflow",
+        "low_priority",
+        "key",
+        "ordered",
+        "queues",
+        "spills",
+        "pending",
+        "tasks",
+        "worker_count",
+        "processed",
+        "dropped",
+        "lag",
+        "max_lag",
+    )
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[Any, Any]], Awaitable[Any]],
+        loop: AbstractEventLoop,
+        *,
+        maxsize: int = 1000,
+        workers: int = 4,
+        overflow: OverflowPolicy = "block",
+        low_priority: Iterable[str] = DEFAULT_LOW_PRIORITY,
+        lanes: Optional[int] = None,
+        key: Optional[Callable[[Dict[Any, Any]], Optional[str]]] = None,
+    ):
+        if overflow not in ("block", "drop", "spill"):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.ordered = lanes is not None
+        if self.ordered:
+            workers = lanes  # type: ignore
+        if workers < 1:
+            raise ValueError("An event pipeline needs at least one worker")
+        self.handler = handler
+        self.loop = loop
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.overflow = overflow
+        self.low_priority = frozenset(low_priority)
+        self.key = key or default_event_key
+        if self.ordered:
+            lane_size = max(maxsize // workers, 1)
+            self.queues: List[Queue[Tuple[float, Dict[Any, Any]]]] = [Queue(lane_size) for _ in range(workers)]
+        else:
+            self.queues = [Queue(maxsize)]
+        self.spills: List[Deque[Tuple[float, Dict[Any, Any]]]] = [deque() for _ in self.queues]
+        self.pending: Dict[str, int] = {}
+        self.tasks: List[Task] = []
+        self.processed = 0
+        self.dropped = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self) -> int:
+        """The amount of payloads waiting to be handled, including spilled ones."""
+        return sum(queue.qsize() for queue in self.queues) + sum(len(spill) for spill in self.spills)
+
+    def lane_of(self, payload: Dict[Any, Any]) -> int:
+        """
+        Gets the index of the lane a payload goes in.
+
+        Parameters
+        ----------
+        payload: Dict[Any, Any]
+            The payload.
+
+        Returns
+        -------
+        :class:`int`
+            The index of the lane, always 0 if the pipeline isn't ordered.
+        """
+        if not self.ordered:
+            return 0
+        key = self.key(payload)
+        return hash(key if key is not None else payload.get("type")) % len(self.queues)
+
+    def hot_keys(self, amount: int = 10) -> List[Tuple[str, int]]:
+        """
+        Gets the keys with the most payloads waiting to be handled, only tracked in ordered mode.
+
+        Parameters
+        ----------
+        amount: :class:`int`
+            The maximum amount of keys to return.
+
+        Returns
+        -------
+        List[Tuple[:class:`str`, :class:`int`]]
+            Key-count pairs sorted from the busiest key.
+        """
+        return sorted(self.pending.items(), key=lambda item: item[1], reverse=True)[:amount]
+
+    def stats(self) -> PipelineStats:
+        """
+        Gets a snapshot of the pipeline's counters.
+
+        Returns
+        -------
+        :class:`PipelineStats`
+            The current state of the pipeline.
+        """
+        return PipelineStats(
+            sum(queue.qsize() for queue in self.queues),
+            sum(len(spill) for spill in self.spills),
+            self.processed,
+            self.dropped,
+            self.lag,
+            self.max_lag,
+            tuple(queue.qsize() + len(spill) for queue, spill in zip(self.queues, self.spills)),
+        )
+
+    def start(self):
+        """
+        Starts the workers, does nothing if they're already running.
+        """
+        if self.tasks:
+            return
+        self.tasks = [
+            self.loop.create_task(self.worker(index if self.ordered else 0)) for index in range(self.worker_count)
+        ]
+
+    def stop(self):
+        """
+        Cancels the workers, payloads that are still queued are kept.
+        """
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    async def put(self, payload: Dict[Any, Any]):
+        """
+        Queues a payload, applying the overflow policy if the queue is full.
+
+        Parameters
+        ----------
+        payload: Dict[Any, Any]
+            The payload to queue.
+        """
+        item = (monotonic(), payload)
+        lane = self.lane_of(payload)
+        queue, spill = self.queues[lane], self.spills[lane]
+        if self.overflow == "drop" and queue.full() and payload.get("type") in self.low_priority:
+            self.dropped += 1
+            return
+        if self.ordered:
+            key = self.key(payload)
+            if key is not None:
+                self.pending[key] = self.pending.get(key, 0) + 1
+        if self.overflow == "spill":
+            if spill or queue.full():
+                spill.append(item)
+            else:
+                queue.put_nowait(item)
+            return
+        await queue.put(item)
+
+    async def worker(self, lane: int = 0):
+        """
+        Handles payloads from a lane until cancelled.
+
+        Parameters
+        ----------
+        lane: :class:`int`
+            The index of the lane to take payloads from.
+        """
+        queue, spill = self.queues[lane], self.spills[lane]
+        while True:
+            enqueued_at, payload = await queue.get()
+            while spill and not queue.full():
+                queue.put_nowait(spill.popleft())
+            self.lag = monotonic() - enqueued_at
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+            try:
+                await self.handler(payload)
+            except Exception as e:
+                self.loop.call_exception_handler(
+                    {
+                        "message": "Unhandled exception while handling a gateway event",
+                        "exception": e,
+                        "payload": payload,
+                    }
+                )
+            finally:
+                self.processed += 1
+                queue.task_done()
+                if self.ordered and (key := self.key(payload)) is not None:
+                    if self.pending.get(key, 0) <= 1:
+                        self.pending.pop(key, None)
+                    else:
+                        self.pending[key] -= 1
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import enum
+from asyncio import Future, get_running_loop
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from heapq import heappop, heappush
+from itertools import count
+from typing import AsyncIterator, Iterator, List, Tuple
+
+
+class Priority(enum.IntEnum):
+    """
+    How urgent an api request is, lower values go first.
+
+    Interactive requests are the ones a user is waiting on (replies, reactions...), background requests are bulk
+    work nobody is waiting on (populating the member cache for example).
+    """
+
+    interactive = 0
+    normal = 1
+    background = 2
+
+
+# The priority of the requests that don't specify one, see :func:`prioritized`.
+current_priority: ContextVar[Priority] = ContextVar("current_priority", default=Priority.normal)
+
+
+@contextmanager
+def prioritized(priority: Priority) -> Iterator[None]:
+    """
+    Sets the priority of the api requests made inside the block that don't specify one.
+
+    Parameters
+    ----------
+    priority: :class:`Priority`
+        The priority of the requests.
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class PriorityScheduler:
+    """
+    Limits how many requests are sent at once, giving a free slot to the most urgent waiting request first.
+
+    Background requests can only take part of the slots so a burst of them leaves room for interactive ones.
+
+    Parameters
+    ----------
+    concurrency: :class:`int`
+        The maximum amount of requests sent at once.
+    background_share: :class:`float`
+        The share of the slots background requests can take, at least one.
+
+    Attributes
+    ----------
+    in_flight: :class:`int`
+        The amount of requests being sent.
+    background: :class:`int`
+        The amount of background requests being sent.
+    waiters: List[Tuple[:class:`Priority`, :class:`int`, :class:`asyncio.Future`]]
+        A heap of the requests waiting for a slot, most urgent then oldest first.
+    """
+
+    __slots__ = ("concurrency", "background_limit", "in_flight", "background", "waiters", "counter")
+
+    def __init__(self, concurrency: int = 32, background_share: float = 0.5):
+        self.concurrency = concurrency
+        self.background_limit = max(int(concurrency * background_share), 1)
+        self.in_flight = 0
+        self.background = 0
+        self.waiters: List[Tuple[Priority, int, Future[None]]] = []
+        self.counter = count()
+
+    @property
+    def waiting(self) -> int:
+        """The amount of requests waiting for a slot."""
+        return sum(not waiter.done() for *_, waiter in self.waiters)
+
+    def can_run(self, priority: Priority) -> bool:
+        """
+        Whether or not a request with the given priority can take a slot now.
+        """
+        if self.in_flight >= self.concurrency:
+            return False
+        return priority != Priority.background or self.background < self.background_limit
+
+    def take(self, priority: Priority):
+        """
+        Takes a slot for a request with the given priority.
+        """
+        self.in_flight += 1
+        if priority == Priority.background:
+            self.background += 1
+
+    async def acquire(self, priority: Priority = Priority.normal):
+        """
+        Waits for a slot then takes it.
+
+        Parameters
+        ----------
+        priority: :class:`Priority`
+            The priority of the request.
+        """
+        if self.can_run(priority) and (not self.waiters or self.waiters[0][0] > priority):
+            return self.take(priority)
+        waiter: Future[None] = get_running_loop().create_future()
+        heappush(self.waiters, (priority, next(self.counter), waiter))
+        try:
+            await waiter  # The slot is taken on our behalf by release.
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)
+            raise
+
+    def release(self, priority: Priority = Priority.normal):
+        """
+        Frees a slot and hands it to the most urgent waiting request that can take it.
+
+        Parameters
+        ----------
+        priority: :class:`Priority`
+            The priority of the request that held the slot.
+        """
+        self.in_flight -= 1
+        if priority == Priority.background:
+            self.background -= 1
+        while self.waiters:
+            waiter_priority, _, waiter = self.waiters[0]
+            if waiter.done():  # Cancelled while waiting.
+                heappop(self.waiters)
+                continue
+            if not self.can_run(waiter_priority):
+                break
+            heappop(self.waiters)
+            self.take(waiter_priority)
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.normal) -> AsyncIterator[None]:
+        """
+        Holds a slot for the duration of the block.
+
+        Parameters
+        ----------
+        priority: :class:`Priority`
+            The priority of the request.
+        """
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
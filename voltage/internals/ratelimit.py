@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import re
+from asyncio import Lock, sleep
+from time import monotonic
+from typing import Dict, Mapping, NamedTuple, Optional
+
+from .priority import Priority
+
+# Revolt ids are ULIDs, replacing them gives the route a request belongs to.
+ID_PATTERN = re.compile(r"(?<=/)[0-9A-HJKMNP-TV-Z]{26}(?=/|$)")
+
+
+def route_key(method: str, url: str) -> str:
+    """
+    Gets the route of a request, that's its method and its url with the ids templated out.
+
+    Parameters
+    ----------
+    method: :class:`str`
+        The method of the request.
+    url: :class:`str`
+        The url of the request relative to the api url.
+
+    Returns
+    -------
+    :class:`str`
+        The route, for example ``POST channels/{id}/messages``.
+    """
+    return f"{method} {ID_PATTERN.sub('{id}', '/' + url.split('?', 1)[0])[1:]}"
+
+
+class BucketState(NamedTuple):
+    """
+    A snapshot of a rate limit bucket.
+
+    Attributes
+    ----------
+    limit: :class:`int`
+        The amount of requests the bucket allows per window.
+    remaining: :class:`int`
+        The amount of requests left in the current window.
+    reset_after: :class:`float`
+        The seconds until the window resets.
+    waiting: :class:`int`
+        The amount of requests queued on the bucket.
+    """
+
+    limit: int
+    remaining: int
+    reset_after: float
+    waiting: int
+
+
+class Bucket:
+    """
+    A rate limit bucket as reported by the api.
+
+    Requests acquire the bucket one at a time and in order, a request that would exceed it waits for it to reset.
+    Background requests leave the end of each window to the other requests.
+
+    Attributes
+    ----------
+    id: :class:`str`
+        The id of the bucket.
+    limit: :class:`int`
+        The amount of requests the bucket allows per window.
+    remaining: :class:`int`
+        The amount of requests left in the current window.
+    reset_at: :class:`float`
+        The :func:`time.monotonic` time the window resets at.
+    period: :class:`float`
+        The longest window the api reported, used to guess when a window that just started resets.
+    waiting: :class:`int`
+        The amount of requests queued on the bucket.
+    background_reserve: :class:`float`
+        The share of each window background requests can't use.
+    """
+
+    __slots__ = ("id", "limit", "remaining", "reset_at", "period", "waiting", "background_reserve", "lock")
+
+    def __init__(self, id: str, limit: int = 1, background_reserve: float = 0.0):
+        self.id = id
+        self.background_reserve = background_reserve
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at = 0.0
+        self.period = 0.0
+        self.waiting = 0
+        self.lock = Lock()
+
+    def __repr__(self):
+        return f"<Bucket id={self.id!r} remaining={self.remaining}/{self.limit}>"
+
+    @property
+    def reset_after(self) -> float:
+        """The seconds until the window resets."""
+        return max(self.reset_at - monotonic(), 0.0)
+
+    @property
+    def reserved(self) -> bool:
+        """Whether or not what's left of the current window is kept for requests that aren't background."""
+        return self.remaining <= int(self.limit * self.background_reserve) and self.reset_at > monotonic()
+
+    async def acquire(self, priority: Priority = Priority.normal):
+        """
+        Waits until the bucket allows another request then takes it.
+
+        Parameters
+        ----------
+        priority: :class:`Priority`
+            The priority of the request, background requests wait outside the queue while the window is reserved
+            so they don't hold up the others.
+        """
+        self.waiting += 1
+        try:
+            while True:
+                if priority == Priority.background and self.reserved:
+                    await sleep(self.reset_after)
+                    continue
+                async with self.lock:
+                    if priority == Priority.background and self.reserved:
+                        continue
+                    while self.remaining <= 0:
+                        if (delay := self.reset_at - monotonic()) > 0:
+                            await sleep(delay)
+                        else:  # The window is over, assume it's full until the api says otherwise.
+                            self.remaining = self.limit
+                            self.reset_at = monotonic() + self.period
+                    self.remaining -= 1
+                    return
+        finally:
+            self.waiting -= 1
+
+    def update(self, limit: int, remaining: int, reset_after: float):
+        """
+        Updates the bucket with the values the api returned.
+
+        Parameters
+        ----------
+        limit: :class:`int`
+            The amount of requests the bucket allows per window.
+        remaining: :class:`int`
+            The amount of requests left in the current window.
+        reset_after: :class:`float`
+            The seconds until the window resets.
+        """
+        now = monotonic()
+        self.limit = limit
+        if now >= self.reset_at:
+            self.remaining = remaining
+        else:  # Responses can arrive out of order, only the lowest count of the window is trustworthy.
+            self.remaining = min(self.remaining, remaining)
+        self.reset_at = now + reset_after
+        self.period = max(self.period, reset_after)
+
+    def exhaust(self, retry_after: float):
+        """
+        Marks the bucket as empty, used when the api rejected a request for being rate limited.
+
+        Parameters
+        ----------
+        retry_after: :class:`float`
+            The seconds until requests are allowed again.
+        """
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, monotonic() + retry_after)
+
+    def state(self) -> BucketState:
+        """
+        Gets a snapshot of the bucket.
+        """
+        return BucketState(self.limit, self.remaining, self.reset_after, self.waiting)
+
+
+class RateLimiter:
+    """
+    Keeps track of the api's rate limit buckets using the ``X-RateLimit-*`` headers of its responses.
+
+    The bucket of a route is only known after the first response, until then its requests go through unchecked.
+
+    Parameters
+    ----------
+    background_reserve: :class:`float`
+        The share of each window of each bucket that background requests can't use.
+
+    Attributes
+    ----------
+    buckets: Dict[:class:`str`, :class:`Bucket`]
+        The known buckets by id.
+    routes: Dict[:class:`str`, :class:`str`]
+        The bucket id of each known route, see :func:`route_key`.
+    """
+
+    __slots__ = ("buckets", "routes", "background_reserve")
+
+    def __init__(self, background_reserve: float = 0.2):
+        self.background_reserve = background_reserve
+        self.buckets: Dict[str, Bucket] = {}
+        self.routes: Dict[str, str] = {}
+
+    def get_bucket(self, route: str) -> Optional[Bucket]:
+        """
+        Gets the bucket of a route.
+
+        Parameters
+        ----------
+        route: :class:`str`
+            The route, see :func:`route_key`.
+
+        Returns
+        -------
+        Optional[:class:`Bucket`]
+            The bucket, None if the route hasn't been seen yet.
+        """
+        if bucket_id := self.routes.get(route):
+            return self.buckets[bucket_id]
+        return None
+
+    async def acquire(self, route: str, priority: Priority = Priority.normal):
+        """
+        Waits until a request to a route is allowed.
+
+        Parameters
+        ----------
+        route: :class:`str`
+            The route, see :func:`route_key`.
+        priority: :class:`Priority`
+            The priority of the request.
+        """
+        if bucket := self.get_bucket(route):
+            await bucket.acquire(priority)
+
+    def update(self, route: str, headers: Mapping[str, str]):
+        """
+        Updates the bucket of a route from the headers of a response.
+
+        Parameters
+        ----------
+        route: :class:`str`
+            The route, see :func:`route_key`.
+        headers: Mapping[:class:`str`, :class:`str`]
+            The headers of the response.
+        """
+        bucket_id = headers.get("X-RateLimit-Bucket")
+        remaining = headers.get("X-RateLimit-Remaining")
+        if bucket_id is None or remaining is None:
+            return
+        limit = int(headers.get("X-RateLimit-Limit", remaining))
+        reset_after = int(headers.get("X-RateLimit-Reset-After", 0)) / 1000
+        bucket = self.buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self.buckets[bucket_id] = Bucket(bucket_id, limit, self.background_reserve)
+        self.routes[route] = bucket_id
+        bucket.update(limit, int(remaining), reset_after)
+
+    def exhaust(self, route: str, retry_after: float):
+        """
+        Marks the bucket of a route as empty after the api rate limited a request to it.
+
+        Parameters
+        ----------
+        route: :class:`str`
+            The route, see :func:`route_key`.
+        retry_after: :class:`float`
+            The seconds until requests are allowed again.
+        """
+        if (bucket := self.get_bucket(route)) is None:
+            bucket = self.buckets[route] = Bucket(route, background_reserve=self.background_reserve)
+            self.routes[route] = route
+        bucket.exhaust(retry_after)
+
+    def snapshot(self) -> Dict[str, BucketState]:
+        """
+        Gets the state of every known bucket.
+
+        Returns
+        -------
+        Dict[:class:`str`, :class:`BucketState`]
+            The state of each bucket by id.
+        """
+        return {bucket_id: bucket.state() for bucket_id, bucket in self.buckets.items()}
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, List, Mapping, Optional, Pattern, Set, Tuple
+
+# How long the responses of the endpoints whose data rarely changes are kept, in seconds.
+DEFAULT_TTLS: Dict[str, float] = {
+    "users/{id}/profile": 300.0,
+    "users/{id}/mutual": 300.0,
+    "users/{id}/default_avatar": 3600.0,
+    "servers/{id}": 60.0,
+    "servers/{id}/invites": 60.0,
+    "servers/{id}/bans": 60.0,
+    "invites/{id}": 300.0,
+}
+
+MISSING: Any = object()
+
+
+def group_of(url: str) -> str:
+    """
+    Gets the resource a url belongs to, that's its first two segments (``servers/01FZ...`` for example).
+    """
+    return "/".join(url.split("/", 2)[:2])
+
+
+class ResponseCache:
+    """
+    An in-memory cache of api responses with a time to live per endpoint and least recently used eviction.
+
+    Parameters
+    ----------
+    ttls: Optional[Mapping[:class:`str`, :class:`float`]]
+        The seconds the responses of each endpoint are kept, ``{id}`` matches any single segment of the url.
+        Responses of other endpoints aren't cached. Defaults to :data:`DEFAULT_TTLS`.
+    max_size: :class:`int`
+        The maximum amount of responses kept, the least recently used ones are evicted first.
+
+    Attributes
+    ----------
+    entries: OrderedDict[:class:`str`, Tuple[:class:`float`, Any]]
+        The time each cached response expires at and the response, by url, least recently used first.
+    hits: :class:`int`
+        The amount of lookups that found a fresh response.
+    misses: :class:`int`
+        The amount of lookups that didn't.
+    generations: OrderedDict[:class:`str`, :class:`int`]
+        The generation of each recently invalidated resource, see :meth:`generation`.
+    """
+
+    __slots__ = ("ttls", "max_size", "entries", "groups", "hits", "misses", "generations", "version", "floor")
+
+    def __init__(self, ttls: Optional[Mapping[str, float]] = None, max_size: int = 1000):
+        self.ttls: List[Tuple[Pattern[str], float]] = [
+            (re.compile(re.escape(endpoint).replace(re.escape("{id}"), "[^/]+") + "$"), ttl)
+            for endpoint, ttl in (DEFAULT_TTLS if ttls is None else ttls).items()
+        ]
+        self.max_size = max_size
+        self.entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.groups: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.generations: OrderedDict[str, int] = OrderedDict()
+        self.version = 0
+        self.floor = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """
+        Gets how long the response of a url is kept.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url relative to the api url.
+
+        Returns
+        -------
+        Optional[:class:`float`]
+            The seconds, None if the url isn't cached.
+        """
+        for pattern, ttl in self.ttls:
+            if pattern.match(url):
+                return ttl
+        return None
+
+    def get(self, url: str) -> Any:
+        """
+        Gets the cached response of a url.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url relative to the api url.
+
+        Returns
+        -------
+        Any
+            The response, :data:`MISSING` if it isn't cached or it expired.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            if self.ttl_for(url) is not None:
+                self.misses += 1
+            return MISSING
+        if entry[0] <= monotonic():
+            self.discard(url)
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(url)
+        self.hits += 1
+        return entry[1]
+
+    def generation(self, url: str) -> int:
+        """
+        Gets the generation of the resource a url belongs to, it changes whenever the resource is invalidated.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url relative to the api url.
+
+        Returns
+        -------
+        :class:`int`
+            The generation, to give to :meth:`put` once the response arrives.
+        """
+        return self.generations.get(group_of(url.split("?", 1)[0].strip("/")), self.floor)
+
+    def put(self, url: str, response: Any, generation: Optional[int] = None):
+        """
+        Caches the response of a url if its endpoint has a time to live.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url relative to the api url.
+        response: Any
+            The response.
+        generation: Optional[:class:`int`]
+            The :meth:`generation` of the url when the request was sent, the response isn't cached if the resource
+            was invalidated since as it might predate the change.
+        """
+        if (ttl := self.ttl_for(url)) is None:
+            return
+        if generation is not None and generation != self.generation(url):
+            return
+        self.entries[url] = (monotonic() + ttl, response)
+        self.entries.move_to_end(url)
+        self.groups.setdefault(group_of(url), set()).add(url)
+        while len(self.entries) > self.max_size:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, url: str):
+        """
+        Removes the response of a url from the cache.
+        """
+        if self.entries.pop(url, None) is not None:
+            group = self.groups[group_of(url)]
+            group.discard(url)
+            if not group:
+                del self.groups[group_of(url)]
+
+    def invalidate(self, url: str):
+        """
+        Removes the responses that a change to a url could make stale.
+
+        That's the response of the url itself, of the urls it's under and of the urls under it, so invalidating
+        ``servers/{id}`` also removes that server's invites and bans.
+
+        Parameters
+        ----------
+        url: :class:`str`
+            The url relative to the api url.
+        """
+        url = url.split("?", 1)[0].strip("/")
+        group = group_of(url)
+        for cached in list(self.groups.get(group, ())):
+            if url == cached or cached.startswith(url + "/") or url.startswith(cached + "/"):
+                self.discard(cached)
+        self.version += 1
+        self.generations[group] = self.version
+        self.generations.move_to_end(group)
+        while len(self.generations) > self.max_size:
+            # Forgotten resources fall back to the newest generation forgotten, so requests sent before it was
+            # bumped still see a change.
+            self.floor = self.generations.popitem(last=False)[1]
+
+    def clear(self):
+        """
+        Removes every response from the cache.
+        """
+        self.entries.clear()
+        self.groups.clear()
+        self.version += 1
+        self.generations.clear()
+        self.floor = self.version
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from random import uniform
+from typing import FrozenSet, Iterable, Optional
+
+# Requests with these methods have the same effect however many times they're sent.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are sent again and how long to wait before doing so.
+
+    Rate limited requests are sent again once the rate limit resets whatever their method, up to
+    ``max_ratelimited`` times.
+
+    Parameters
+    ----------
+    max_attempts: :class:`int`
+        The maximum amount of times a request is sent, 1 disables retrying.
+    base_delay: :class:`float`
+        The delay in seconds the backoff starts from, it doubles with each attempt.
+    max_delay: :class:`float`
+        The maximum delay in seconds between attempts.
+    statuses: Iterable[:class:`int`]
+        The status codes that are considered transient.
+    retry_non_idempotent: :class:`bool`
+        Whether or not to also retry requests that could have an effect twice, like sending a message.
+        Only do this if a duplicate is better than a failure.
+    max_ratelimited: :class:`int`
+        The maximum amount of times a request is sent again after being rate limited, so an endpoint that keeps
+        rate limiting doesn't hold the request forever.
+    """
+
+    __slots__ = ("max_attempts", "base_delay", "max_delay", "statuses", "retry_non_idempotent", "max_ratelimited")
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        statuses: Iterable[int] = (500, 502, 503, 504),
+        retry_non_idempotent: bool = False,
+        max_ratelimited: int = 5,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if max_ratelimited < 0:
+            raise ValueError("max_ratelimited can't be negative")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses: FrozenSet[int] = frozenset(statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.max_ratelimited = max_ratelimited
+
+    @classmethod
+    def never(cls) -> RetryPolicy:
+        """
+        Creates a policy that doesn't retry anything.
+        """
+        return cls(max_attempts=1)
+
+    def should_retry(self, method: str, attempt: int, status: Optional[int] = None) -> bool:
+        """
+        Checks whether a failed request should be sent again.
+
+        Parameters
+        ----------
+        method: :class:`str`
+            The method of the request.
+        attempt: :class:`int`
+            The amount of times the request has been sent.
+        status: Optional[:class:`int`]
+            The status code of the response, None if the connection failed.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if status is not None and status not in self.statuses:
+            return False
+        return self.retry_non_idempotent or method in IDEMPOTENT_METHODS
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Gets how long to wait before sending a request again.
+
+        The backoff is exponential with full jitter, a retry-after given by the api is waited out in any case.
+
+        Parameters
+        ----------
+        attempt: :class:`int`
+            The amount of times the request has been sent.
+        retry_after: Optional[:class:`float`]
+            The seconds the api asked to wait for, if any.
+        """
+        delay = uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            return max(delay, retry_after)
+        return delay
+
+
+class RetryStats:
+    """
+    The retry counters of a route.
+
+    Attributes
+    ----------
+    retries: :class:`int`
+        The amount of times requests were sent again because of a transient failure.
+    ratelimited: :class:`int`
+        The amount of times requests were sent again because they were rate limited.
+    exhausted: :class:`int`
+        The amount of requests that still failed after the last attempt the policy allowed.
+    delay: :class:`float`
+        The total seconds requests spent on failed attempts and waiting to be sent again, that's the latency the
+        retries added.
+    """
+
+    __slots__ = ("retries", "ratelimited", "exhausted", "delay")
+
+    def __init__(self):
+        self.retries = 0
+        self.ratelimited = 0
+        self.exhausted = 0
+        self.delay = 0.0
+
+    def __repr__(self):
+        return (
+            f"<RetryStats retries={self.retries} ratelimited={self.ratelimited} exhausted={self.exhausted} "
+            f"delay={self.delay:.2f}>"
+        )
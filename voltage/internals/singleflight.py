@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from asyncio import Future, Task, ensure_future, shield
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls so that they share a single in-flight call.
+
+    Attributes
+    ----------
+    calls: Dict[Hashable, :class:`asyncio.Task`]
+        The in-flight calls by key.
+    hits: :class:`int`
+        The amount of calls that joined one already in flight.
+    misses: :class:`int`
+        The amount of calls that had to be made.
+    """
+
+    __slots__ = ("calls", "hits", "misses")
+
+    def __init__(self):
+        self.calls: Dict[Hashable, Task[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.calls)
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of calls that joined one already in flight."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs a call unless an identical one is already in flight, in which case its result is shared.
+
+        Cancelling one of the callers doesn't cancel the call the others are waiting for.
+
+        Parameters
+        ----------
+        key: Hashable
+            What identifies identical calls.
+        func: Callable[[], Awaitable[T]]
+            Makes the call.
+        """
+        task = self.calls.get(key)
+        if task is None:
+            self.misses += 1
+            task = self.calls[key] = ensure_future(func())
+            task.add_done_callback(lambda done: self.finish(key, done))
+        else:
+            self.hits += 1
+        return await shield(task)
+
+    def finish(self, key: Hashable, task: Future[Any]):
+        """
+        Forgets a call once it's done.
+        """
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved so it isn't reported when every caller was cancelled.
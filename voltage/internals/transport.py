@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import inspect
+import json
+from asyncio import sleep
+from collections import deque
+from contextlib import asynccontextmanager
+from math import ceil
+from random import Random
+from time import monotonic
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+from aiohttp import ClientConnectionError, ClientSession, FormData
+from aiohttp.abc import AbstractStreamWriter
+from multidict import CIMultiDict
+from yarl import URL
+
+from .ratelimit import route_key
+
+
+class Transport:
+    """
+    The base class for what sends the http requests of :class:`HTTPHandler`.
+
+    The responses only need the parts of :class:`aiohttp.ClientResponse` the handler uses: ``status``,
+    ``headers``, ``content_length``, ``read()``, ``json()`` and ``content.iter_chunked()``.
+    """
+
+    __slots__ = ()
+
+    def request(self, method: str, url: str, **kwargs) -> AsyncContextManager[Any]:
+        """
+        Sends a request.
+
+        Parameters
+        ----------
+        method: :class:`str`
+            The method of the request.
+        url: :class:`str`
+            The absolute url of the request.
+        kwargs: dict
+            The ``headers``, ``data`` and ``params`` of the request.
+
+        Returns
+        -------
+        AsyncContextManager[Any]
+            Gives the response and releases it on exit.
+        """
+        raise NotImplementedError
+
+
+class AiohttpTransport(Transport):
+    """
+    Sends the requests with an :class:`aiohttp.ClientSession`.
+
+    Parameters
+    ----------
+    session: :class:`aiohttp.ClientSession`
+        The session to use.
+    """
+
+    __slots__ = ("session",)
+
+    def __init__(self, session: ClientSession):
+        self.session = session
+
+    def request(self, method: str, url: str, **kwargs) -> AsyncContextManager[Any]:
+        return self.session.request(method, url, **kwargs)
+
+
+class MockRequest(NamedTuple):
+    """
+    A request received by a :class:`MockTransport`.
+
+    Attributes
+    ----------
+    method: :class:`str`
+        The method of the request.
+    url: :class:`str`
+        The absolute url of the request.
+    route: :class:`str`
+        The route of the request, see :func:`route_key`.
+    headers: Mapping[:class:`str`, :class:`str`]
+        The headers of the request.
+    params: Mapping[:class:`str`, Any]
+        The query parameters of the request.
+    body: :class:`bytes`
+        The body of the request, multipart forms and streamed bodies included.
+    """
+
+    method: str
+    url: str
+    route: str
+    headers: Mapping[str, str]
+    params: Mapping[str, Any]
+    body: bytes
+
+    def json(self) -> Any:
+        """
+        Decodes the body of the request.
+        """
+        return json.loads(self.body)
+
+
+class MockResponse:
+    """
+    A response of a :class:`MockTransport`, it behaves like the parts of :class:`aiohttp.ClientResponse` that
+    :class:`HTTPHandler` uses.
+
+    Parameters
+    ----------
+    status: :class:`int`
+        The status code.
+    body: Any
+        The body, anything other than bytes or a string is encoded to json.
+    headers: Optional[Mapping[:class:`str`, :class:`str`]]
+        The headers.
+    """
+
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status: int = 200, body: Any = b"", headers: Optional[Mapping[str, str]] = None):
+        self.status = status
+        if isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body).encode()
+        self.body = bytes(body)
+        self.headers: CIMultiDict[str] = CIMultiDict(headers or {})
+
+    def __repr__(self):
+        return f"<MockResponse status={self.status} size={len(self.body)}>"
+
+    @property
+    def content_length(self) -> int:
+        """The size of the body."""
+        return len(self.body)
+
+    @property
+    def content(self) -> MockResponse:
+        """The body as a stream, like :attr:`aiohttp.ClientResponse.content`."""
+        return self
+
+    async def read(self) -> bytes:
+        """Gets the body."""
+        return self.body
+
+    async def text(self) -> str:
+        """Gets the body as a string."""
+        return self.body.decode()
+
+    async def json(self, content_type: Optional[str] = None) -> Any:
+        """Decodes the body."""
+        return json.loads(self.body)
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        """Yields the body in chunks of at most ``size`` bytes."""
+        for start in range(0, len(self.body), size):
+            yield self.body[start : start + size]
+
+    def release(self):
+        """Does nothing, there's no connection to give back."""
+
+
+MockHandler = Callable[[MockRequest], Union[MockResponse, Any, Awaitable[Union[MockResponse, Any]]]]
+
+
+class BodySink:
+    """
+    Collects what a multipart form writes, it only implements the ``write`` of
+    :class:`aiohttp.abc.AbstractStreamWriter` the payloads use.
+    """
+
+    __slots__ = ("buffer",)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    async def write(self, chunk: bytes):
+        self.buffer += chunk
+
+
+async def read_body(data: Any) -> bytes:
+    """
+    Reads the whole body of a request the way aiohttp would send it.
+    """
+    if data is None:
+        return b""
+    if isinstance(data, str):
+        return data.encode()
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if isinstance(data, FormData):
+        sink = BodySink()
+        await data().write(cast(AbstractStreamWriter, sink))
+        return bytes(sink.buffer)
+    if hasattr(data, "__aiter__"):
+        return b"".join([chunk async for chunk in data])
+    raise TypeError(f"Can't send a body of type {type(data).__name__}")
+
+
+class MockTransport(Transport):
+    """
+    An in-memory transport that answers requests without touching the network, to test, benchmark and reproduce
+    failures offline.
+
+    Responses are registered per route with :meth:`add_route`, requests to other routes get a 404.
+
+    Parameters
+    ----------
+    latency: :class:`float`
+        The seconds each response takes.
+    jitter: :class:`float`
+        The maximum seconds randomly added to the latency of each response.
+    error_rate: :class:`float`
+        The share of requests that fail, between 0 and 1.
+    error_status: Optional[:class:`int`]
+        The status code of the failed requests, None to fail them with a connection error instead.
+    rate_limit: Optional[Tuple[:class:`int`, :class:`float`]]
+        The amount of requests each route allows per window and the seconds a window lasts. Responses carry the
+        ``X-RateLimit-*`` headers of the api and requests over the limit get a 429.
+    seed: Optional[:class:`int`]
+        The seed of the jitter and the error injection, for reproducible runs.
+    history_size: :class:`int`
+        The maximum amount of requests remembered in :attr:`history`.
+
+    Attributes
+    ----------
+    routes: Dict[:class:`str`, Union[:class:`MockResponse`, Any, Callable[[:class:`MockRequest`], Any]]]
+        What each route answers, see :meth:`add_route`.
+    history: Deque[:class:`MockRequest`]
+        The most recent requests, oldest first.
+    calls: Dict[:class:`str`, :class:`int`]
+        The amount of requests received by route.
+    errors: :class:`int`
+        The amount of injected failures.
+    ratelimited: :class:`int`
+        The amount of requests rejected for exceeding the rate limit.
+    """
+
+    __slots__ = (
+        "latency",
+        "jitter",
+        "error_rate",
+        "error_status",
+        "rate_limit",
+        "random",
+        "routes",
+        "buckets",
+        "history",
+        "calls",
+        "errors",
+        "ratelimited",
+    )
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = 503,
+        rate_limit: Optional[Tuple[int, float]] = None,
+        seed: Optional[int] = None,
+        history_size: int = 1000,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.random = Random(seed)
+        self.routes: Dict[str, Union[MockResponse, Any, MockHandler]] = {}
+        self.buckets: Dict[str, List[float]] = {}
+        self.history: Deque[MockRequest] = deque(maxlen=history_size)
+        self.calls: Dict[str, int] = {}
+        self.errors = 0
+        self.ratelimited = 0
+
+    def add_route(self, method: str, path: str, response: Union[MockResponse, Any, MockHandler]):
+        """
+        Sets what a route answers.
+
+        Parameters
+        ----------
+        method: :class:`str`
+            The method of the route.
+        path: :class:`str`
+            The path of the route with the ids templated out, for example ``channels/{id}/messages``.
+        response: Union[:class:`MockResponse`, Any, Callable[[:class:`MockRequest`], Any]]
+            The response, a body to answer with a 200 or a (possibly async) function that's given the request
+            and returns either.
+        """
+        self.routes[f"{method} {path.strip('/')}"] = response
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[MockResponse]:
+        yield await self.respond(method, url, **kwargs)
+
+    async def respond(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        data: Any = None,
+        params: Optional[Mapping[str, Any]] = None,
+        **_,
+    ) -> MockResponse:
+        """
+        Answers a request after the configured latency, injecting errors and enforcing the rate limit.
+        """
+        route = route_key(method, URL(url).path.strip("/"))
+        request = MockRequest(method, url, route, dict(headers or {}), dict(params or {}), await read_body(data))
+        self.history.append(request)
+        self.calls[route] = self.calls.get(route, 0) + 1
+        if delay := self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0):
+            await sleep(delay)
+        ratelimit_headers = {}
+        if self.rate_limit is not None:
+            limit, period = self.rate_limit
+            now = monotonic()
+            bucket = self.buckets.setdefault(route, [limit, now + period])
+            if now >= bucket[1]:
+                bucket[0], bucket[1] = limit, now + period
+            reset_after = str(ceil((bucket[1] - now) * 1000))  # Rounded up so clients never come back early.
+            ratelimit_headers = {"X-RateLimit-Bucket": route, "X-RateLimit-Limit": str(limit)}
+            ratelimit_headers["X-RateLimit-Reset-After"] = reset_after
+            if bucket[0] <= 0:
+                self.ratelimited += 1
+                ratelimit_headers["X-RateLimit-Remaining"] = "0"
+                return MockResponse(429, {"retry_after": int(reset_after)}, ratelimit_headers)
+            bucket[0] -= 1
+            ratelimit_headers["X-RateLimit-Remaining"] = str(int(bucket[0]))
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            if self.error_status is None:
+                raise ClientConnectionError(f"Injected failure of {route}")
+            return MockResponse(self.error_status, headers=ratelimit_headers)
+        response = self.routes.get(route, MockResponse(404))
+        if callable(response):
+            response = response(request)
+            if inspect.isawaitable(response):
+                response = await response
+        if isinstance(response, MockResponse):  # Copied as it can be shared between requests.
+            response = MockResponse(response.status, response.body, response.headers)
+        else:
+            response = MockResponse(200, response)
+        response.headers.update(ratelimit_headers)
+        return response
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from asyncio import Semaphore
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from .latency import LatencyHistogram
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from ..file import File
+    from .http import HTTPHandler
+
+
+class UploadManager:
+    """
+    Uploads files to autumn, capping how many uploads run at once and optionally skipping the ones whose content
+    was uploaded recently.
+
+    With deduplication, files are recognized by their tag, name and the hash of their content, which costs an
+    extra read of the file. Files that can only be read once (async iterables and unseekable file objects) are
+    always uploaded.
+
+    .. warning::
+
+        An autumn id can only be attached to one message, deduplication only helps when the same content is
+        uploaded several times before being sent (to edit it in, retry a send that failed...). Ids the api
+        rejects are forgotten with :meth:`forget` and the file is uploaded again.
+
+    Parameters
+    ----------
+    http: :class:`HTTPHandler`
+        The http handler used to upload.
+    concurrency: :class:`int`
+        The maximum amount of uploads running at once.
+    dedup: :class:`bool`
+        Whether or not to reuse the autumn ids of content uploaded recently, off by default.
+    ttl: :class:`float`
+        How long in seconds the autumn id of an uploaded file is reused for.
+    max_entries: :class:`int`
+        The maximum amount of autumn ids remembered, the oldest are forgotten first.
+
+    Attributes
+    ----------
+    uploaded: Dict[Tuple[:class:`str`, :class:`str`, :class:`str`], Tuple[:class:`float`, :class:`str`]]
+        The time each remembered autumn id expires at and the id, by tag, name and content hash.
+    latency: :class:`LatencyHistogram`
+        How long the recent uploads took, waiting for a free slot excluded.
+    uploads: :class:`int`
+        The amount of files actually uploaded.
+    deduplicated: :class:`int`
+        The amount of uploads skipped because the content was uploaded recently or was being uploaded.
+    """
+
+    __slots__ = (
+        "http",
+        "semaphore",
+        "dedup",
+        "ttl",
+        "max_entries",
+        "uploaded",
+        "single_flight",
+        "latency",
+        "uploads",
+        "deduplicated",
+    )
+
+    def __init__(
+        self,
+        http: HTTPHandler,
+        *,
+        concurrency: int = 4,
+        dedup: bool = False,
+        ttl: float = 3600.0,
+        max_entries: int = 1000,
+    ):
+        self.http = http
+        self.semaphore = Semaphore(concurrency)
+        self.dedup = dedup
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.uploaded: Dict[Tuple[str, str, str], Tuple[float, str]] = {}
+        self.single_flight = SingleFlight()
+        self.latency = LatencyHistogram()
+        self.uploads = 0
+        self.deduplicated = 0
+
+    async def upload(self, file: File, tag: str) -> str:
+        """
+        Uploads a file unless deduplication is on and its content was uploaded recently.
+
+        Parameters
+        ----------
+        file: :class:`File`
+            The file to upload.
+        tag: :class:`str`
+            The autumn tag to upload the file to.
+
+        Returns
+        -------
+        :class:`str`
+            The autumn id of the file.
+        """
+        content_hash = await file.get_hash() if self.dedup else None
+        if content_hash is None:
+            return await self.send(file, tag)
+        key = (tag, file.filename, content_hash)
+        if entry := self.uploaded.get(key):
+            if entry[0] > monotonic():
+                self.deduplicated += 1
+                return entry[1]
+            del self.uploaded[key]
+        if key in self.single_flight.calls:
+            self.deduplicated += 1
+
+        async def send():
+            id = await self.send(file, tag)
+            self.uploaded[key] = (monotonic() + self.ttl, id)
+            while len(self.uploaded) > self.max_entries:
+                del self.uploaded[next(iter(self.uploaded))]
+            return id
+
+        return await self.single_flight.run(key, send)
+
+    def forget(self, id: str) -> bool:
+        """
+        Stops reusing an autumn id, for example because the api rejected it.
+
+        Parameters
+        ----------
+        id: :class:`str`
+            The autumn id.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether or not the id was remembered.
+        """
+        keys = [key for key, (_, uploaded_id) in self.uploaded.items() if uploaded_id == id]
+        for key in keys:
+            del self.uploaded[key]
+        return bool(keys)
+
+    async def send(self, file: File, tag: str) -> str:
+        """
+        Uploads a file once a slot is free.
+
+        Parameters
+        ----------
+        file: :class:`File`
+            The file to upload.
+        tag: :class:`str`
+            The autumn tag to upload the file to.
+
+        Returns
+        -------
+        :class:`str`
+            The autumn id of the file.
+        """
+        async with self.semaphore:
+            start = perf_counter()
+            data = await self.http.upload_file(file.stream(), file.filename, tag)
+            self.latency.record(perf_counter() - start)
+        self.uploads += 1
+        return data["id"]
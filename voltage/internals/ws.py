@@ -1,19 +1,65 @@
 from __future__ import annotations
 
-from asyncio import get_event_loop, sleep
+from asyncio import TimeoutError, get_event_loop, sleep
 from copy import copy
-from json import loads
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from random import uniform
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from aiohttp import ClientError, WSMsgType
 
 from ..channels import GroupDMChannel
+from .codec import Codec, JSONCodec
+from .latency import LatencyHistogram
+from .pipeline import DEFAULT_LOW_PRIORITY, EventPipeline
 
 if TYPE_CHECKING:
     from aiohttp import ClientSession, ClientWebSocketResponse
 
+    from ..message import Message
     from ..types.ws import *
     from ..user import User
     from .cache import CacheHandler
     from .http import HTTPHandler
+    from .pipeline import OverflowPolicy
+
+
+# The event types the websocket api sends, routed once when the handler is created rather than on their first frame.
+EVENT_TYPES = (
+    "Error",
+    "Authenticated",
+    "Bulk",
+    "Pong",
+    "Ready",
+    "Message",
+    "MessageUpdate",
+    "MessageAppend",
+    "MessageDelete",
+    "BulkMessageDelete",
+    "MessageReact",
+    "MessageUnreact",
+    "MessageRemoveReaction",
+    "ChannelCreate",
+    "ChannelUpdate",
+    "ChannelDelete",
+    "ChannelGroupJoin",
+    "ChannelGroupLeave",
+    "ChannelStartTyping",
+    "ChannelStopTyping",
+    "ChannelAck",
+    "ServerCreate",
+    "ServerUpdate",
+    "ServerDelete",
+    "ServerMemberUpdate",
+    "ServerMemberJoin",
+    "ServerMemberLeave",
+    "ServerRoleUpdate",
+    "ServerRoleDelete",
+    "UserUpdate",
+    "UserRelationship",
+    "EmojiCreate",
+    "EmojiDelete",
+)
 
 
 class WebSocketHandler:
@@ -32,12 +78,38 @@ class WebSocketHandler:
         The websocket.
     token: :class:`str`
         The bot token.
-    dispatch: Callable[..., Any]
-        The dispatch function.
+    client_dispatch: Callable[..., Any]
+        The client's dispatch function.
     raw_dispatch: Callable[[Dict[Any, Any]], Any]
         The raw dispatch function.
     loop: :class:`asyncio.AbstractEventLoop`
         The event loop.
+    pipeline: :class:`voltage.internals.EventPipeline`
+        The queue the incoming payloads go through before getting handled.
+    codec: :class:`voltage.internals.Codec`
+        The codec used to encode and decode frames.
+    reconnect: :class:`bool`
+        Whether or not to reconnect when the websocket closes.
+    reconnect_delay: :class:`float`
+        The base delay, in seconds, of the exponential backoff between reconnection attempts.
+    max_reconnect_delay: :class:`float`
+        The maximum delay, in seconds, between reconnection attempts.
+    heartbeat_interval: :class:`float`
+        How often, in seconds, to ping the websocket api.
+    heartbeat_timeout: :class:`float`
+        How long, in seconds, a ping can go unanswered before the connection is considered dead and restarted.
+    latency: :class:`voltage.internals.LatencyHistogram`
+        The round trip times of the recent heartbeats.
+    loop_lag: :class:`voltage.internals.LatencyHistogram`
+        How late the heartbeat task woke up, a high value means the event loop is blocked.
+    subscribed: Callable[[:class:`str`], :class:`bool`]
+        Whether anything consumes an event, events nobody consumes aren't built or dispatched.
+    raw_subscribed: Callable[[:class:`str`], :class:`bool`]
+        Whether anything consumes a raw event, takes the lowercased event type.
+    filtered: :class:`int`
+        The amount of frames that were skipped without being decoded because nothing consumes them.
+    routes: Dict[:class:`str`, Tuple[:class:`str`, Optional[Callable[[Dict[Any, Any]], Any]]]]
+        The event types, as sent by the websocket api, mapped to their lowercased name and their handler.
     """
 
     __slots__ = (
@@ -46,9 +118,23 @@ class WebSocketHandler:
         "cache",
         "ws",
         "token",
-        "dispatch",
+        "client_dispatch",
         "raw_dispatch",
         "loop",
+        "pipeline",
+        "codec",
+        "reconnect",
+        "reconnect_delay",
+        "max_reconnect_delay",
+        "heartbeat_interval",
+        "heartbeat_timeout",
+        "latency",
+        "loop_lag",
+        "pending_pings",
+        "subscribed",
+        "raw_subscribed",
+        "filtered",
+        "routes",
         "ready",
         "user",
     )
@@ -61,6 +147,21 @@ class WebSocketHandler:
         token: str,
         dispatch: Callable[..., Any],
         raw_dispatch: Callable[[Dict[Any, Any]], Any],
+        *,
+        event_queue_size: int = 1000,
+        event_workers: int = 4,
+        event_overflow: OverflowPolicy = "block",
+        event_low_priority: Iterable[str] = DEFAULT_LOW_PRIORITY,
+        event_lanes: Optional[int] = None,
+        event_key: Optional[Callable[[Dict[Any, Any]], Optional[str]]] = None,
+        codec: Optional[Codec] = None,
+        reconnect: bool = True,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        heartbeat_interval: float = 15.0,
+        heartbeat_timeout: float = 45.0,
+        subscribed: Optional[Callable[[str], bool]] = None,
+        raw_subscribed: Optional[Callable[[str], bool]] = None,
     ):
         self.loop = get_event_loop()
         self.client = client
@@ -68,24 +169,85 @@ class WebSocketHandler:
         self.cache = cache
         self.ws: ClientWebSocketResponse
         self.token = token
-        self.dispatch = dispatch
+        self.client_dispatch = dispatch
         self.raw_dispatch = raw_dispatch
+        self.pipeline = EventPipeline(
+            self.process_payload,
+            self.loop,
+            maxsize=event_queue_size,
+            workers=event_workers,
+            overflow=event_overflow,
+            low_priority=event_low_priority,
+            lanes=event_lanes,
+            key=event_key,
+        )
+        self.codec = codec or JSONCodec()
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.latency = LatencyHistogram()
+        self.loop_lag = LatencyHistogram()
+        self.pending_pings: Dict[int, float] = {}
+        self.subscribed = subscribed or (lambda _: True)
+        self.raw_subscribed = raw_subscribed or (lambda _: True)
+        self.filtered = 0
+        self.routes: Dict[str, Tuple[str, Optional[Callable[[Dict[Any, Any]], Any]]]] = {}
+        for type in EVENT_TYPES:
+            self.route(type)
         self.ready = False
         self.user: User
 
+    async def send(self, payload: Dict[str, Any]):
+        """
+        Encodes a payload with the codec and sends it to the websocket api.
+
+        Parameters
+        ----------
+        payload: Dict[:class:`str`, Any]
+            The payload to send.
+        """
+        data = self.codec.dumps(payload)
+        if isinstance(data, bytes):
+            await self.ws.send_bytes(data)
+        else:
+            await self.ws.send_str(data)
+
     async def authorize(self):
         """
         Sends an authorization request to the websocket api.
         """
-        await self.ws.send_json({"type": "Authenticate", "token": self.token})
+        await self.send({"type": "Authenticate", "token": self.token})
 
     async def heartbeat(self):
         """
-        Sends regular heartbeats to the websocket api.
+        Sends regular heartbeats to the websocket api and closes the connection if they stop being answered.
         """
         while True:
-            await self.ws.ping()
-            await sleep(15)
+            now = monotonic()
+            if self.pending_pings and now - min(self.pending_pings.values()) > self.heartbeat_timeout:
+                print("\033[1;31m[Voltage]    The websocket stopped answering heartbeats, restarting it.\033[0m")
+                await self.dispatch("heartbeat_timeout")
+                return await self.ws.close()
+            data = int(time() * 1000)
+            self.pending_pings[data] = now
+            await self.send({"type": "Ping", "data": data})
+            before = monotonic()
+            await sleep(self.heartbeat_interval)
+            self.loop_lag.record(max(monotonic() - before - self.heartbeat_interval, 0.0))
+
+    def record_pong(self, payload: Dict[Any, Any]):
+        """
+        Records the round trip of the heartbeat a pong answers.
+
+        This runs as soon as the pong is read so the measurement doesn't include time spent in the pipeline.
+        """
+        if (sent := self.pending_pings.get(payload.get("data"))) is None:  # type: ignore
+            return
+        self.latency.record(monotonic() - sent)
+        # Pongs come in order, everything sent before this one is either answered or lost.
+        self.pending_pings = {data: at for data, at in self.pending_pings.items() if at > sent}
 
     async def connect(self, banner: bool = True):
         """
@@ -124,26 +286,184 @@ class WebSocketHandler:
     \033[1;31m                                                  \033[0m"""
             )
         info = await self.http.get_api_info()
-        ws_url = info["ws"]
+        ws_url = f"{info['ws']}?format={self.codec.format}"
+        self.pipeline.start()
+        attempt = 0
+        while True:
+            was_ready = self.ready
+            try:
+                await self.run(ws_url)
+            except (ClientError, OSError, TimeoutError) as e:
+                print(f"\033[1;31m[Voltage]    Connection failed: {e!r}\033[0m")
+            if not self.reconnect:
+                return
+            # Start the backoff over if the last connection got far enough to receive a ready payload.
+            attempt = 0 if self.ready and not was_ready else attempt + 1
+            delay = self.backoff(attempt)
+            print(f"\033[1;31m[Voltage]    Disconnected, reconnecting in {delay:.2f} seconds...\033[0m")
+            await sleep(delay)
+            if not self.reconnect:  # Closed while waiting.
+                return
+
+    async def close(self):
+        """
+        Closes the websocket for good and stops handling events.
+        """
+        self.reconnect = False
+        self.pipeline.stop()
+        if (ws := getattr(self, "ws", None)) is not None and not ws.closed:
+            await ws.close()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Gets how long to wait before a reconnection attempt, using exponential backoff with full jitter.
+
+        Parameters
+        ----------
+        attempt: :class:`int`
+            The amount of failed attempts in a row.
+        """
+        return uniform(0, min(self.max_reconnect_delay, self.reconnect_delay * 2**attempt))
+
+    async def run(self, ws_url: str):
+        """
+        Opens a websocket connection and feeds its payloads to the pipeline until it closes.
+
+        Parameters
+        ----------
+        ws_url: :class:`str`
+            The url of the websocket.
+        """
         print(f"\033[1;31m[Voltage]    Connecting to the websocket...\033[0m")
         self.ws = await self.client.ws_connect(ws_url)
+        self.pending_pings = {}
         await self.authorize()
-        self.loop.create_task(self.heartbeat())
+        heartbeat = self.loop.create_task(self.heartbeat())
         print(f"\033[1;31m[Voltage]    Connected to {ws_url}!\033[0m")
-        async for message in self.ws:
-            payload = loads(message.data)
-            self.loop.create_task(self.handle_event(payload))
+        try:
+            async for message in self.ws:
+                if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    # Closing frames end the iteration by themselves, anything else means the connection broke.
+                    print(f"\033[1;31m[Voltage]    Received a {message.type.name} frame: {message.data!r}\033[0m")
+                    break
+                data = message.data
+                try:
+                    type = self.codec.peek_type(data)
+                    if self.skippable(type):
+                        self.filtered += 1
+                        continue
+                    if type == "Ready" and not self.ready and not self.raw_subscribed("ready"):
+                        # Nothing needs the whole payload, so it's handed to the cache one entity at a time.
+                        sections = self.codec.iter_sections(data)
+                        if sections is not None:
+                            await self.pipeline.put({"type": "Ready", "sections": sections, "frame": data})
+                            continue
+                    payload = self.codec.loads(data)
+                    type = payload.get("type")
+                except (TypeError, ValueError) as e:
+                    print(f"\033[1;31m[Voltage]    Received an invalid frame: {e!r}\033[0m")
+                    break
+                if type == "Pong":
+                    self.record_pong(payload)
+                elif type == "Ready":
+                    payload["frame"] = data  # Kept by the cache to reconcile on reconnect, see handle_ready.
+                await self.pipeline.put(payload)
+        finally:
+            heartbeat.cancel()
+            self.cache.close_histories()  # Messages sent until we reconnect won't be seen.
+            if not self.ws.closed:
+                await self.ws.close()
+
+    def route(self, type: str) -> Tuple[str, Optional[Callable[[Dict[Any, Any]], Any]]]:
+        """
+        Gets the lowercased name and the handler of an event type.
+
+        Parameters
+        ----------
+        type: :class:`str`
+            The event type as sent by the websocket api.
+        """
+        try:
+            return self.routes[type]
+        except KeyError:
+            event = type.lower()
+            route = self.routes[type] = (event, getattr(self, f"handle_{event}", None))
+            return route
+
+    def skippable(self, type: Optional[str]) -> bool:
+        """
+        Checks whether a frame can be dropped before it's decoded.
+
+        That's the case for typing events nobody listens to and for events that have neither a handler nor a raw
+        listener, everything else has to be decoded to keep the cache up to date.
+
+        Parameters
+        ----------
+        type: Optional[:class:`str`]
+            The event type of the frame, None if it isn't known.
+        """
+        if type is None or type == "Pong":
+            return False
+        event, handler = self.route(type)
+        if self.raw_subscribed(event):
+            return False
+        if event == "channelstarttyping":
+            return not self.subscribed("channel_start_typing")
+        if event == "channelstoptyping":
+            return not self.subscribed("channel_stop_typing")
+        return handler is None
+
+    async def process_payload(self, payload: Dict[Any, Any]):
+        """
+        Handles a payload taken off the pipeline then passes it to the raw listeners.
+        """
+        await self.handle_event(payload)
+        self.dispatch_raw(payload)
+
+    def dispatch_raw(self, payload: Dict[Any, Any]):
+        """
+        Hands a payload over to the client's raw listeners if there are any.
+
+        Like :meth:`dispatch`, the listeners run in their own task so one waiting for another event doesn't hold
+        up a pipeline worker.
+        """
+        if self.raw_subscribed(self.route(payload["type"])[0]):
             self.loop.create_task(self.raw_dispatch(payload))
 
+    async def dispatch(self, event: str, *args, **kwargs):
+        """
+        Hands an event over to the client's listeners if anything consumes it.
+
+        The listeners run in their own task so that a slow listener or one that's waiting for another event
+        doesn't hold up a pipeline worker.
+        """
+        if self.subscribed(event):
+            self.loop.create_task(self.client_dispatch(event, *args, **kwargs))
+
     async def handle_event(self, payload: Dict[Any, Any]):
         """
         Handles an event.
         """
-        event = payload["type"].lower()
+        event, handler = self.route(payload["type"])
         if event != "ready" and not self.ready:
             return
-        if func := getattr(self, f"handle_{event}", None):
-            await func(payload)
+        if handler is not None:
+            await handler(payload)
+
+    async def handle_bulk(self, payload: OnBulkPayload):
+        """
+        Handles the bulk event.
+
+        The contained events are applied to the cache back to back so the batch only yields to the event loop
+        if one of them has to fetch something. Each one is then dispatched as usual and the whole batch is also
+        dispatched as a ``bulk`` event for listeners that would rather handle it at once.
+        """
+        events = payload["v"]
+        for event in events:
+            await self.handle_event(event)
+        for event in events:
+            self.dispatch_raw(event)
+        await self.dispatch("bulk", events)
 
     async def handle_authenticated(self, _):
         """
@@ -154,9 +474,28 @@ class WebSocketHandler:
     async def handle_ready(self, payload: OnReadyPayload):
         """
         Handles the ready event.
-        """
+
+        The raw frame of the payload is then kept by the cache if the websocket reconnects, it's compared with the
+        next ready payload to tell what changed in between.
+        """
+        frame: Optional[Union[str, bytes]] = payload.pop("frame", None)  # type: ignore
+        if self.ready:  # We reconnected, the cache only needs catching up.
+            if self.http.response_cache is not None:  # Anything could have changed while we were away.
+                self.http.response_cache.clear()
+            # Payloads still queued when the connection dropped may have reopened some histories.
+            self.cache.close_histories()
+            events = await self.cache.reconcile_ready(payload)
+            self.cache.ready_frame = frame if self.reconnect else None
+            for event, *args in events:
+                await self.dispatch(event, *args)
+            print("\033[1;32m[Voltage]    Reconnected!\033[0m")
+            return await self.dispatch("reconnect")
         print("\033[1;31m[Voltage]    Started caching data...\033[0m")
-        await self.cache.handle_ready_caching(payload, self)
+        if "sections" in payload:  # Decoded incrementally, see run.
+            await self.cache.handle_ready_stream(payload["sections"], self)  # type: ignore
+        else:
+            await self.cache.handle_ready_caching(payload, self)
+        self.cache.ready_frame = frame if self.reconnect else None
         print("\033[1;31m[Voltage]    Finished caching data.\033[0m")
         print("\033[1;32m[Voltage]    Bot is running!\033[0m")
         self.ready = True
@@ -168,7 +507,7 @@ class WebSocketHandler:
         """
         if payload["author"] == "00000000000000000000000000":  # system message
             return
-        await self.dispatch("message", self.cache.add_message(payload))
+        await self.dispatch("message", self.cache.add_message(payload, live=True))
 
     async def handle_messageupdate(self, payload: OnMessageUpdatePayload):
         """
@@ -178,11 +517,13 @@ class WebSocketHandler:
 
         try:
             message = self.cache.get_message(payload["id"])
-            old = copy(message)
-            message._update(payload)
-            await self.dispatch("message_update", old, message)
         except KeyError:
             return
+        if not self.subscribed("message_update"):
+            return message._update(payload)
+        old = copy(message)
+        message._update(payload)
+        await self.dispatch("message_update", old, message)
 
     async def handle_messagedelete(self, payload: OnMessageDeletePayload):
         """
@@ -191,17 +532,44 @@ class WebSocketHandler:
         await self.dispatch("raw_message_delete", payload)
 
         try:
-            message = self.cache.get_message(payload["id"])
-            self.cache.messages.pop(message.id)
+            message = self.cache.remove_message(payload["id"])
             await self.dispatch("message_delete", message)
         except KeyError:
             return
 
+    async def handle_bulkmessagedelete(self, payload: OnBulkMessageDeletePayload):
+        """
+        Handles the bulk message delete event.
+
+        The cached messages among the deleted ones are dispatched as a ``bulk_message_delete`` event, the raw
+        payload is dispatched too as most of them usually aren't cached.
+        """
+        await self.dispatch("raw_bulk_message_delete", payload)
+
+        messages = []
+        for id in payload["ids"]:
+            try:
+                messages.append(self.cache.remove_message(id))
+            except KeyError:
+                continue
+        await self.dispatch("bulk_message_delete", messages)
+
+    async def reacted_message(
+        self, payload: Union[OnMessageReactPayload, OnMessageRemoveReactionPayload], event: str
+    ) -> Optional[Message]:
+        """
+        Gets the message a reaction event is about, only fetching it if something consumes the event.
+        """
+        if self.subscribed(event):
+            return await self.cache.fetch_message(payload["channel_id"], payload["id"])
+        return self.cache.messages.get(payload["id"])
+
     async def handle_messagereact(self, payload: OnMessageReactPayload):
         """
         Handles the message react event.
         """
-        message = await self.cache.fetch_message(payload["channel_id"], payload["id"])
+        if (message := await self.reacted_message(payload, "message_react")) is None:
+            return
         user_id = payload["user_id"]
         emoji_id = payload["emoji_id"]
         message.interactions.reactions.setdefault(payload["emoji_id"], []).append(
@@ -213,7 +581,8 @@ class WebSocketHandler:
         """
         Handles the message remove reaction event.
         """
-        message = await self.cache.fetch_message(payload["channel_id"], payload["id"])
+        if (message := await self.reacted_message(payload, "message_react")) is None:
+            return
         emoji_id = payload["emoji_id"]
         message.interactions.reactions[payload["emoji_id"]] = []
         await self.dispatch("message_react", message, emoji_id)
@@ -222,7 +591,8 @@ class WebSocketHandler:
         """
         Handles the message unreact event.
         """
-        message = await self.cache.fetch_message(payload["channel_id"], payload["id"])
+        if (message := await self.reacted_message(payload, "message_unreact")) is None:
+            return
         user_id = payload["user_id"]
         emoji_id = payload["emoji_id"]
         reactions = message.interactions.reactions.setdefault(payload["emoji_id"], [])
@@ -235,6 +605,7 @@ class WebSocketHandler:
         """
         Handles the channel create event.
         """
+        self.cache.mark_changed(payload["_id"])
         await self.dispatch("channel_create", self.cache.add_channel(payload))
 
     async def handle_channelupdate(self, payload: OnChannelUpdatePayload):
@@ -242,6 +613,9 @@ class WebSocketHandler:
         Handles the channel update event.
         """
         channel = self.cache.get_channel(payload["id"])
+        self.cache.mark_changed(channel.id)
+        if not self.subscribed("channel_update"):
+            return channel._update(payload)
         old = copy(channel)
         channel._update(payload)
         await self.dispatch("channel_update", old, channel)
@@ -264,6 +638,7 @@ class WebSocketHandler:
             user = self.cache.add_user(await self.http.fetch_user(payload["user"]))
         channel = self.cache.get_channel(payload["id"])
         if isinstance(channel, GroupDMChannel):
+            self.cache.mark_changed(channel.id)
             channel.add_recepient(user)
             await self.dispatch("group_channel_join", channel, user)
 
@@ -274,6 +649,7 @@ class WebSocketHandler:
         channel = self.cache.get_channel(payload["id"])
         user = self.cache.get_user(payload["user"])
         if isinstance(channel, GroupDMChannel):
+            self.cache.mark_changed(channel.id)
             channel.remove_recepient(user)
             await self.dispatch("group_channel_leave", channel, user)
 
@@ -281,6 +657,8 @@ class WebSocketHandler:
         """
         Handles the channel start typing event.
         """
+        if not self.subscribed("channel_start_typing"):
+            return
         channel = self.cache.get_channel(payload["id"])
         user = self.cache.get_user(payload["user"])
         await self.dispatch("channel_start_typing", channel, user)
@@ -289,6 +667,8 @@ class WebSocketHandler:
         """
         Handles the channel stop typing event.
         """
+        if not self.subscribed("channel_stop_typing"):
+            return
         channel = self.cache.get_channel(payload["id"])
         user = self.cache.get_user(payload["user"])
         await self.dispatch("channel_stop_typing", channel, user)
@@ -298,7 +678,9 @@ class WebSocketHandler:
         Handles the server create event.
         """
         server = self.cache.add_server(payload["server"])
+        self.cache.mark_changed(server.id)
         for channel in payload["channels"]:
+            self.cache.mark_changed(channel["_id"])
             self.cache.add_channel(channel)
         await self.dispatch("server_create", server)
 
@@ -306,7 +688,11 @@ class WebSocketHandler:
         """
         Handles the server update event.
         """
+        self.http.invalidate(f"servers/{payload['id']}")
         server = self.cache.get_server(payload["id"])
+        self.cache.mark_changed(server.id)
+        if not self.subscribed("server_update"):
+            return server._update(payload)
         old = copy(server)
         server._update(payload)
         await self.dispatch("server_update", old, server)
@@ -315,6 +701,7 @@ class WebSocketHandler:
         """
         Handles the server delete event.
         """
+        self.http.invalidate(f"servers/{payload['id']}")
         server = self.cache.get_server(payload["id"])
         self.cache.servers.pop(server.id)
         await self.dispatch("server_delete", server)
@@ -326,6 +713,9 @@ class WebSocketHandler:
         server = self.cache.get_server(payload["id"]["server"])
         member = server.get_member(payload["id"]["user"])
         if member:
+            self.cache.mark_changed(f"{server.id}:{member.id}")
+            if not self.subscribed("server_member_update"):
+                return member._update(payload)
             old = copy(member)
             member._update(payload)
             await self.dispatch("server_member_update", old, member)
@@ -339,6 +729,7 @@ class WebSocketHandler:
         except KeyError:
             self.cache.add_user(await self.http.fetch_user(payload["user"]))
         member = self.cache.add_member(payload["id"], {"_id": {"server": payload["id"], "user": payload["user"]}})
+        self.cache.mark_changed(f"{payload['id']}:{payload['user']}")
         await self.dispatch("member_join", member)
 
     async def handle_memberleave(self, payload: OnServerMemberLeavePayload):
@@ -362,6 +753,9 @@ class WebSocketHandler:
         server = self.cache.get_server(payload["id"])
         role = server.get_role(payload["role_id"])
         if role:
+            self.cache.mark_changed(server.id)
+            if not self.subscribed("server_role_update"):
+                return role._update(payload)
             old = copy(role)
             role._update(payload)
             await self.dispatch("server_role_update", old, role)
@@ -373,6 +767,7 @@ class WebSocketHandler:
         server = self.cache.get_server(payload["id"])
         role = server.get_role(payload["role_id"])
         if role:
+            self.cache.mark_changed(server.id)
             server.roles.remove(role)
             await self.dispatch("server_role_delete", role)
 
@@ -380,7 +775,11 @@ class WebSocketHandler:
         """
         Handles the user update event.
         """
+        self.http.invalidate(f"users/{payload['id']}")
         user = self.cache.get_user(payload["id"])
+        self.cache.mark_changed(user.id)
+        if not self.subscribed("user_update"):
+            return user._update(payload)
         old = copy(user)
         user._update(payload)
         await self.dispatch("user_update", old, user)
@@ -389,10 +788,10 @@ class WebSocketHandler:
         """
         Starts typing in a channel.
         """
-        await self.ws.send_json({"type": "BeginTyping", "channel": channel_id})
+        await self.send({"type": "BeginTyping", "channel": channel_id})
 
     async def end_typing(self, channel_id):
         """
         Stops typing in a channel.
         """
-        await self.ws.send_json({"type": "EndTyping", "channel": channel_id})
+        await self.send({"type": "EndTyping", "channel": channel_id})
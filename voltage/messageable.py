@@ -1,19 +1,42 @@
 from __future__ import annotations
 
-from asyncio import Task, sleep
-from typing import TYPE_CHECKING, List, Optional, Union
+from asyncio import Future, Semaphore, Task, ensure_future, gather, sleep
+from collections import deque
+from time import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ulid import ULID
 
 # Internal imports
 from .enums import SortType
-from .errors import HTTPError
+from .errors import HTTPError, PermissionError
 from .message import Message, MessageInteractions
 
 if TYPE_CHECKING:
     from .embed import SendableEmbed
     from .file import File
     from .internals import CacheHandler
+    from .member import Member
     from .message import MessageMasquerade, MessageReply
     from .types import MessagePayload, MessageReplyPayload, SendableEmbedPayload
+    from .user import User
+
+# The bulk delete endpoint only takes messages younger than a week, with some leeway for clock drift.
+BULK_DELETE_MAX_AGE = 7 * 24 * 60 * 60 - 60
+# The maximum amount of messages the api returns at once.
+PAGE_SIZE = 100
+SYSTEM_USER_ID = "00000000000000000000000000"
 
 
 class Typing:
@@ -50,40 +73,182 @@ class Typing:
 
 
 class MessageIterator:
-    def __init__(self, data: list[MessagePayload], channel: Messageable):
-        self.data = data
-        self.processed: list[Message] = []
-        self.channel = channel
+    """
+    An async iterator over the messages of a channel that fetches them lazily, a page at a time.
 
-    def _process_next(self):
-        if len(self.data) == 0:
-            if len(self.processed) == 0:
-                return None
-            else:
-                self.processed.append(Message(self.data.pop(0), self.channel.cache))
-                return self.processed[-1]
+    The next page is fetched in the background while the current one is consumed, and nothing more is
+    fetched once the consumer stops. A consumer that stops early should call :meth:`aclose`, or use the
+    iterator as an async context manager, so the page being fetched is cancelled right away. It can also be
+    awaited to get all the messages in a list.
 
-    def _get_next_message(self):
-        return self.processed.pop(0)
+    When a lookup is given the messages it finds in the cache come first and only the rest is fetched.
 
-    def __iter__(self):
+    Parameters
+    ----------
+    channel: :class:`Messageable`
+        The channel the messages are in.
+    fetch: Callable[[:class:`int`, Optional[:class:`str`], Optional[:class:`str`]], Awaitable[Any]]
+        Fetches a page given its size and the before and after cursors.
+    limit: Optional[:class:`int`]
+        The maximum amount of messages to fetch, None to go through all of them.
+    sort: :class:`SortType`
+        The order the messages are fetched in, it decides which cursor moves.
+    before: Optional[:class:`str`]
+        The ID of the message to fetch before.
+    after: Optional[:class:`str`]
+        The ID of the message to fetch after.
+    paginate: :class:`bool`
+        Whether or not there's more than one page, the nearby and relevance queries can't be paginated.
+    lookup: Optional[Callable[[], Awaitable[Tuple[List[:class:`Message`], :class:`bool`]]]]
+        Gets the cached messages, in order, and whether or not they're all of them, see
+        :meth:`CacheHandler.cached_history`.
+    """
+
+    __slots__ = (
+        "channel",
+        "fetch",
+        "limit",
+        "sort",
+        "before",
+        "after",
+        "paginate",
+        "lookup",
+        "cached",
+        "buffer",
+        "fetched",
+        "page_size",
+        "task",
+        "done",
+    )
+
+    def __init__(
+        self,
+        channel: Messageable,
+        fetch: Callable[[int, Optional[str], Optional[str]], Awaitable[Any]],
+        *,
+        limit: Optional[int] = 100,
+        sort: SortType = SortType.latest,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        paginate: bool = True,
+        lookup: Optional[Callable[[], Awaitable[Tuple[List[Message], bool]]]] = None,
+    ):
+        self.channel = channel
+        self.fetch = fetch
+        self.limit = limit
+        self.sort = sort
+        self.before = before
+        self.after = after
+        self.paginate = paginate
+        self.lookup = lookup
+        self.cached: Deque[Message] = deque()
+        self.buffer: Deque[MessagePayload] = deque()
+        self.fetched = 0
+        self.page_size = 0
+        self.task: Optional[Future[Any]] = None
+        self.done = False
+
+    def __aiter__(self) -> MessageIterator:
         return self
 
-    def __next__(self):
-        if len(self.data) == 0:
-            raise StopIteration
-        return Message(self.data.pop(0), self.channel.cache)
+    async def __aenter__(self) -> MessageIterator:
+        return self
 
-    def __len__(self):
-        return len(self.data) + len(self.processed)
+    async def __aexit__(self, *_):
+        await self.aclose()
+
+    def __del__(self):
+        # Dropped without being closed, the page being fetched would otherwise be destroyed while pending.
+        task = getattr(self, "task", None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    async def __anext__(self) -> Message:
+        if self.lookup is not None:
+            await self.look_up()
+        if self.cached:
+            return self.cached.popleft()
+        while not self.buffer:
+            self.schedule()
+            if self.task is None:
+                raise StopAsyncIteration
+            task, self.task = self.task, None
+            messages = self.channel.cache.add_messages_response(await task)
+            self.fetched += len(messages)
+            if not self.paginate or len(messages) < self.page_size:
+                self.done = True
+            elif self.sort == SortType.oldest:
+                self.after = messages[-1]["_id"]
+            else:
+                self.before = messages[-1]["_id"]
+            self.buffer.extend(message for message in messages if message["author"] != SYSTEM_USER_ID)
+            self.schedule()
+        return Message(self.buffer.popleft(), self.channel.cache)
 
-    def __getitem__(self, index: int):
-        while len(self.processed) <= index:
-            self._process_next()
-        return Message(self.data[index], self.channel.cache)
+    def __await__(self):
+        return self.flatten().__await__()
 
-    def __reversed__(self):
-        return MessageIterator(list(reversed(self.data)), self.channel)
+    async def look_up(self):
+        """
+        Gets the cached messages and moves the cursor past them, the rest is fetched in the background.
+        """
+        lookup, self.lookup = self.lookup, None
+        messages, complete = await lookup()  # type: ignore
+        self.cached.extend(messages)
+        self.fetched += len(messages)
+        if complete:
+            self.done = True
+        elif messages:
+            if self.sort == SortType.oldest:
+                self.after = messages[-1].id
+            else:
+                self.before = messages[-1].id
+        self.schedule()
+
+    def schedule(self):
+        """
+        Starts fetching the next page if there's one and it isn't being fetched already.
+        """
+        if self.done or self.task is not None:
+            return
+        size = PAGE_SIZE if self.limit is None else min(PAGE_SIZE, self.limit - self.fetched)
+        if size <= 0:
+            self.done = True
+            return
+        self.page_size = size
+        self.task = ensure_future(self.fetch(size, self.before, self.after))
+
+    def close(self):
+        """
+        Stops the iterator, cancelling the fetch of the next page if it's running.
+        """
+        self.done = True
+        self.lookup = None
+        self.cached.clear()
+        self.buffer.clear()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def aclose(self):
+        """
+        Stops the iterator like :meth:`close` and waits for the cancelled fetch to wind down.
+        """
+        task = self.task
+        self.close()
+        if task is not None:
+            await gather(task, return_exceptions=True)
+
+    async def flatten(self) -> List[Message]:
+        """
+        Fetches all the messages.
+
+        Returns
+        -------
+        List[:class:`Message`]
+            The messages.
+        """
+        return [message async for message in self]
 
 
 class Messageable:  # Really missing rust traits rn :(
@@ -192,63 +357,101 @@ class Messageable:  # Really missing rust traits rn :(
         """
         return await self.cache.fetch_message(await self.get_id(), message_id)
 
-    async def history(
+    def history(
         self,
-        limit: int = 100,
+        limit: Optional[int] = 100,
         *,
         sort: SortType = SortType.latest,
         before: Optional[str] = None,
         after: Optional[str] = None,
         nearby: Optional[str] = None,
+        use_cache: bool = True,
     ) -> MessageIterator:
         """
         Fetch the messageable object's channel's history.
 
+        The messages are fetched lazily as they're iterated over with ``async for``, awaiting the result gets
+        all of them in a list. The part of the history that was seen live and is still cached is served from the
+        cache, only the rest is fetched.
+
         Parameters
         ----------
         limit: Optional[:class:`int`]
-            The limit of the history.
+            The limit of the history, None to go through all of it.
         sort: Optional[:class:`SortType`]
-            The sort type of the history.
+            The sort type of the history, either latest or oldest first.
         before: Optional[:class:`str`]
             The ID of the message to fetch before.
         after: Optional[:class:`str`]
             The ID of the message to fetch after.
         nearby: Optional[:class:`str`]
-            The ID of the message to fetch nearby.
+            The ID of the message to fetch nearby, this only fetches a single page.
+        use_cache: :class:`bool`
+            Whether or not to serve messages from the cache, nearby queries are always fetched.
 
         Returns
         -------
-        List[:class:`Message`]
-            The messages that got fetched.
+        :class:`MessageIterator`
+            The messages.
+
+        Raises
+        ------
+        :class:`ValueError`
+            If the history is sorted by relevance, only searches can be.
         """
-        messages = await self.cache.http.fetch_messages(await self.get_id(), sort.value, limit=limit, before=before, after=after, nearby=nearby, include_users=False)  # type: ignore
-        returned = []
-        for i in messages:
-            if i["author"] != "00000000000000000000000000":
-                returned.append(i)
-        return MessageIterator(returned, self)
-
-    async def search(
+        if sort == SortType.relevance:
+            raise ValueError("Only searches can be sorted by relevance")
+
+        async def fetch(size: int, before: Optional[str], after: Optional[str]) -> Any:
+            return await self.cache.http.fetch_messages(
+                await self.get_id(),
+                sort.value,
+                limit=size,
+                before=before,
+                after=after,
+                nearby=nearby,
+                include_users=True,
+            )
+
+        async def lookup() -> Tuple[List[Message], bool]:
+            return self.cache.cached_history(
+                await self.get_id(), limit, oldest_first=sort == SortType.oldest, before=before, after=after
+            )
+
+        return MessageIterator(
+            self,
+            fetch,
+            limit=limit,
+            sort=sort,
+            before=before,
+            after=after,
+            paginate=nearby is None,
+            lookup=lookup if use_cache and nearby is None else None,
+        )
+
+    def search(
         self,
         query: str,
         *,
         sort: SortType = SortType.latest,  # type: ignore
-        limit: int = 100,
+        limit: Optional[int] = 100,
         before: Optional[str] = None,
         after: Optional[str] = None,
     ) -> MessageIterator:
         """
         Search for messages in the messageable object's channel.
 
+        The messages are fetched lazily as they're iterated over with ``async for``, awaiting the result gets
+        all of them in a list.
+
         Parameters
         ----------
         query: :class:`str`
             The query to search for.
         sort: Optional[:class:`SortType`]
-            The sort type of the search.
+            The sort type of the search, results sorted by relevance only span a single page.
         limit: Optional[:class:`int`]
-            The limit of the search.
+            The limit of the search, None to go through all the results.
         before: Optional[:class:`str`]
             The ID of the message to fetch before.
         after: Optional[:class:`str`]
@@ -256,40 +459,144 @@ class Messageable:  # Really missing rust traits rn :(
 
         Returns
         -------
-        List[:class:`Message`]
+        :class:`MessageIterator`
             The messages that got found.
         """
-        messages = await self.cache.http.search_for_message(
-            await self.get_id(),
-            query,
-            sort=sort.value,
-            limit=limit,
-            before=before,
-            after=after,
-            include_users=False,
+
+        async def fetch(size: int, before: Optional[str], after: Optional[str]) -> Any:
+            return await self.cache.http.search_for_message(
+                await self.get_id(),
+                query,
+                sort=sort.value,
+                limit=size,
+                before=before,
+                after=after,
+                include_users=True,
+            )
+
+        return MessageIterator(
+            self, fetch, limit=limit, sort=sort, before=before, after=after, paginate=sort != SortType.relevance
         )
-        return MessageIterator(messages, self)
 
-    async def purge(self, amount: int):
+    async def purge(
+        self,
+        amount: int,
+        *,
+        author: Optional[Union[User, Member, str]] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        check: Optional[Callable[[Message], bool]] = None,
+        concurrency: int = 5,
+    ) -> int:
         """
         Purge messages from the messageable object's channel.
 
+        The history is paginated through from the newest message and the matching messages of each page are
+        deleted with :meth:`delete_messages`.
+
         Parameters
         ----------
         amount: :class:`int`
             The amount of messages to purge.
+        author: Optional[Union[:class:`User`, :class:`Member`, :class:`str`]]
+            Only purge the messages of this user.
+        before: Optional[:class:`str`]
+            Only purge the messages sent before the message with this ID.
+        after: Optional[:class:`str`]
+            Only purge the messages sent after the message with this ID.
+        check: Optional[Callable[[:class:`Message`], :class:`bool`]]
+            Only purge the messages this returns True for.
+        concurrency: :class:`int`
+            The maximum amount of messages deleted at once when they can't be deleted in bulk.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of messages that got deleted.
         """
         channel_id = await self.get_id()
-        for i in await self.cache.http.fetch_messages(channel_id, "Latest", limit=amount):
+        author_id = author if author is None or isinstance(author, str) else author.id
+        deleted = matched = 0
+        cursor = before
+        while matched < amount:
+            page = await self.cache.http.fetch_messages(
+                channel_id, "Latest", limit=100, before=cursor, after=after, include_users=check is not None
+            )
+            messages = self.cache.add_messages_response(page)
+            if not messages:
+                break
+            cursor = messages[-1]["_id"]
+            ids = []
+            for payload in messages:
+                if author_id is not None and payload["author"] != author_id:
+                    continue
+                if check is not None:
+                    message = self.cache.messages.get(payload["_id"]) or Message(payload, self.cache)
+                    if not check(message):
+                        continue
+                ids.append(payload["_id"])
+                if matched + len(ids) >= amount:
+                    break
+            matched += len(ids)
+            deleted += await self.delete_messages(ids, concurrency=concurrency)
+            if len(messages) < 100:
+                break
+        return deleted
+
+    async def delete_messages(self, message_ids: Iterable[str], *, concurrency: int = 5) -> int:
+        """
+        Delete messages from the messageable object's channel.
+
+        Messages younger than a week are deleted in batches of 100. The others, and those of batches the api
+        rejected (for example without the permission to manage messages), are deleted one by one a few at a
+        time while respecting the rate limits.
+
+        Parameters
+        ----------
+        message_ids: Iterable[:class:`str`]
+            The IDs of the messages to delete.
+        concurrency: :class:`int`
+            The maximum amount of messages deleted at once when they can't be deleted in bulk.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of messages that got deleted, messages that were already gone aren't counted.
+        """
+        channel_id = await self.get_id()
+        http = self.cache.http
+        horizon = (time() - BULK_DELETE_MAX_AGE) * 1000
+        recent: List[str] = []
+        single: List[str] = []
+        for message_id in message_ids:
+            (recent if ULID().decode(message_id)[0] > horizon else single).append(message_id)
+
+        deleted = 0
+        for start in range(0, len(recent), 100):
+            batch = recent[start : start + 100]
+            if len(batch) == 1:
+                single.extend(batch)
+                continue
             try:
-                await self.cache.http.delete_message(channel_id, i["_id"])
-            except HTTPError as e:
-                status = e.response.status
-                if status == 404:
-                    pass
-                else:
+                await http.delete_messages(channel_id, batch)
+                deleted += len(batch)
+            except (HTTPError, PermissionError):
+                single.extend(batch)
+
+        semaphore = Semaphore(concurrency)
+
+        async def delete(message_id: str) -> bool:
+            async with semaphore:
+                try:
+                    await http.delete_message(channel_id, message_id)
+                    return True
+                except HTTPError as e:
+                    if e.response.status == 404:
+                        return False
                     raise
 
+        return deleted + sum(await gather(*[delete(message_id) for message_id in single]))
+
     def typing(self) -> Typing:
         """
         A context manager that sends a typing indicator to the messageable object's channel.
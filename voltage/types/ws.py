@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List, Literal, TypedDict, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, TypedDict, Union
 
 from .channel import (
     DMChannelPayload,
@@ -33,6 +33,10 @@ class OnReadyPayload(BasePayload):
     members: List[MemberPayload]
 
 
+class OnBulkPayload(BasePayload):
+    v: List[Dict[str, Any]]
+
+
 class OnMessagePayload(BasePayload, MessagePayload):
     pass
 
@@ -54,6 +58,11 @@ class OnMessageDeletePayload(BasePayload):
     channel: str
 
 
+class OnBulkMessageDeletePayload(BasePayload):
+    channel: str
+    ids: List[str]
+
+
 class OnMessageReactPayload(BasePayload):
     id: str
     channel_id: str